@@ -0,0 +1,249 @@
+"""
+ALT 启发函数（A*、地标、三角不等式）
+
+预处理：选出 K 个地标，从每个地标对整张网格做一次完整的 Dijkstra（flow_field.distance_field），
+得到 K 张 float32 距离表，保存在网格文件旁边，网格哈希一致时直接加载。
+
+查询：对任意格子 n 和终点 t，由三角不等式 d(n, t) >= |d(L, t) - d(L, n)|，
+取所有地标中的最大值，再与八角距离取较大者作为启发函数，仍然是可采纳的。
+大块圆形障碍物后面的格子会得到远大于八角距离的估值，A* 不必绕着每个障碍物漫灌。
+"""
+import os
+import random
+import time
+from typing import Callable
+
+import numpy as np
+import numpy.typing as npt
+
+from .astar import (
+    MOVE_COST_DIAGONAL,
+    MOVE_COST_STRAIGHT,
+    Coord,
+    OccupancyGrid,
+    Path,
+    get_path_astar_2d_array,
+    grid_digest,
+)
+from .flow_field import distance_field
+
+DEFAULT_LANDMARK_COUNT = 8
+
+
+class LandmarkTable:
+    """
+    landmarks: 形如 (K, 2) 的地标坐标
+    distances: 形如 (K, rows, cols) 的 float32 距离表，障碍物和不可达的格子为 inf
+    """
+
+    def __init__(
+        self,
+        shape: tuple[int, int],
+        digest: str,
+        landmarks: npt.NDArray[np.int64],
+        distances: npt.NDArray[np.float32],
+    ):
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.digest = digest
+        self.landmarks = landmarks
+        self.distances = distances
+        finite = distances[np.isfinite(distances)]
+        max_distance = float(finite.max()) if finite.size else 0.0
+        # float32 存储带来的舍入误差，启发值统一减去这个余量以保证可采纳
+        self.slack = max_distance * 2.0**-21
+
+    @property
+    def count(self) -> int:
+        return len(self.landmarks)
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            shape=np.asarray(self.shape, dtype=np.int64),
+            digest=np.asarray(self.digest),
+            landmarks=self.landmarks,
+            distances=self.distances,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "LandmarkTable":
+        with np.load(path) as data:
+            return cls(
+                shape=tuple(data["shape"]),
+                digest=str(data["digest"]),
+                landmarks=data["landmarks"],
+                distances=data["distances"],
+            )
+
+    def lower_bound(self, a: Coord, b: Coord) -> float:
+        """
+        a 到 b 最短距离的下界（地标下界与八角距离中的较大者）。
+        """
+        dx, dy = abs(int(a[0]) - int(b[0])), abs(int(a[1]) - int(b[1]))
+        best = MOVE_COST_STRAIGHT * max(dx, dy) + (
+            MOVE_COST_DIAGONAL - MOVE_COST_STRAIGHT
+        ) * min(dx, dy)
+        from_a = self.distances[:, int(a[0]), int(a[1])]
+        from_b = self.distances[:, int(b[0]), int(b[1])]
+        usable = np.isfinite(from_b)
+        if usable.any():
+            with np.errstate(invalid="ignore"):
+                landmark_bound = float(np.abs(from_a[usable] - from_b[usable]).max())
+            best = max(best, landmark_bound - self.slack)
+        return best
+
+    def heuristic_for(self, end: Coord, width: int) -> Callable[[int], float]:
+        """
+        返回供 get_path_astar_2d_array 使用的启发函数，参数是加边网格的扁平下标。
+        """
+        cols = self.shape[1]
+        end_r, end_c = int(end[0]), int(end[1])
+        straight = MOVE_COST_STRAIGHT
+        diagonal_extra = MOVE_COST_DIAGONAL - MOVE_COST_STRAIGHT
+        slack = self.slack
+        # 只使用能到达终点的地标；终点不可达的地标给不出有效下界
+        tables = []
+        for distances in self.distances:
+            goal_distance = float(distances[end_r, end_c])
+            if np.isfinite(goal_distance):
+                tables.append((memoryview(distances.reshape(-1)), goal_distance))
+
+        def alt_heuristic(index: int) -> float:
+            r, c = divmod(index, width)
+            r -= 1
+            c -= 1
+            dx = r - end_r if r > end_r else end_r - r
+            dy = c - end_c if c > end_c else end_c - c
+            if dx > dy:
+                octile = straight * dx + diagonal_extra * dy
+            else:
+                octile = straight * dy + diagonal_extra * dx
+
+            flat = r * cols + c
+            best = 0.0
+            for table, goal_distance in tables:
+                diff = table[flat] - goal_distance
+                if diff < 0:
+                    diff = -diff
+                if diff > best:
+                    best = diff
+            best -= slack
+            return best if best > octile else octile
+
+        return alt_heuristic
+
+
+# 随机取一个可通行的格子作为最远点选择的出发点
+def _random_free_cell(grid: OccupancyGrid, rng: random.Random) -> Coord | None:
+    rows, cols = grid.shape
+    for _ in range(10000):
+        r, c = rng.randrange(rows), rng.randrange(cols)
+        if grid[r][c] == 0:
+            return r, c
+    free_cells = np.argwhere(np.asarray(grid) == 0)
+    if len(free_cells) == 0:
+        return None
+    r, c = free_cells[rng.randrange(len(free_cells))]
+    return int(r), int(c)
+
+
+def build_landmark_table(
+    grid: OccupancyGrid,
+    count: int = DEFAULT_LANDMARK_COUNT,
+    seed: int = 0,
+    digest: str | None = None,
+) -> LandmarkTable:
+    """
+    用最远点策略选地标：先从一个随机格子出发找到离它最远的格子作为第一个地标，
+    之后每次选离已有地标最近距离最大的格子，地标因此分散在地图的边缘和角落。
+    """
+    rows, cols = grid.shape
+    digest = digest if digest is not None else grid_digest(grid)
+    origin = _random_free_cell(grid, random.Random(seed))
+    if origin is None or count <= 0:
+        return LandmarkTable(
+            (rows, cols),
+            digest,
+            np.zeros((0, 2), dtype=np.int64),
+            np.zeros((0, rows, cols), dtype=np.float32),
+        )
+
+    begin = time.perf_counter()
+    # nearest[n] 是格子 n 到已选地标的最近距离，不可达的格子记为 -1 不参与选择
+    nearest = distance_field(grid, origin)
+    nearest[~np.isfinite(nearest)] = -1
+    landmarks: list[Coord] = []
+    distances = np.empty((count, rows, cols), dtype=np.float32)
+    for k in range(count):
+        flat = int(np.argmax(nearest))
+        if nearest.flat[flat] <= 0:
+            break
+        landmark = divmod(flat, cols)
+        landmarks.append(landmark)
+        distances[k] = distance_field(grid, landmark)
+        # 第一轮的 nearest 来自出发点，不是地标，直接替换
+        if k == 0:
+            nearest = distances[0].copy()
+            nearest[~np.isfinite(nearest)] = -1
+        else:
+            np.minimum(nearest, distances[k], out=nearest, where=nearest >= 0)
+        print(
+            f"地标 {k + 1}/{count}: {landmark}，累计 {time.perf_counter() - begin:.1f}s"
+        )
+
+    return LandmarkTable(
+        (rows, cols),
+        digest,
+        np.asarray(landmarks, dtype=np.int64).reshape(-1, 2),
+        distances[: len(landmarks)],
+    )
+
+
+def landmark_table_path(grid_path: str) -> str:
+    return os.path.splitext(grid_path)[0] + ".alt.npz"
+
+
+def load_or_build_landmark_table(
+    grid: OccupancyGrid, grid_path: str, count: int = DEFAULT_LANDMARK_COUNT
+) -> LandmarkTable:
+    """
+    网格哈希和地标数量都一致时直接加载已保存的距离表，否则重新构建并保存。
+    """
+    table_path = landmark_table_path(grid_path)
+    digest = grid_digest(grid)
+    if os.path.exists(table_path):
+        table = LandmarkTable.load(table_path)
+        if table.digest == digest and table.count == count:
+            return table
+        print("地标距离表与网格不一致，重新构建...")
+
+    table = build_landmark_table(grid, count, digest=digest)
+    table.save(table_path)
+    return table
+
+
+def get_path_alt(
+    grid: OccupancyGrid,
+    start: Coord,
+    end: Coord,
+    table: LandmarkTable,
+    stats: dict | None = None,
+    components=None,
+) -> Path:
+    """
+    使用 ALT 启发函数的数组版 A*，返回的仍是最优路径，只是展开的节点少得多。
+
+    table 必须由同一张网格构建（调用方保证，查询时不再重新计算网格哈希）。
+    components: 可选的 components.ComponentIndex，不可达时直接返回空路径
+    """
+    if tuple(grid.shape) != table.shape:
+        raise ValueError(f"地标距离表形状 {table.shape} 与网格形状 {grid.shape} 不匹配")
+    if components is not None and not components.is_reachable(start, end):
+        return np.array([])
+    return get_path_astar_2d_array(
+        grid,
+        start,
+        end,
+        stats,
+        heuristic_fn=table.heuristic_for(end, grid.shape[1] + 2),
+    )
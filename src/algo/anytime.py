@@ -0,0 +1,176 @@
+"""
+随时可用的有界次优搜索 (ARA*)
+
+先用较大的启发函数权重 ε 很快找到第一条路径，然后逐步减小 ε、复用之前的搜索结果继续改进，
+直到时间预算用完或证明已经最优。每一轮都会给出当前路径相对最优路径的次优界。
+启发函数和移动方式沿用 astar.py 中的 heuristic 和 NEIGHBORS_MOVES。
+"""
+import heapq
+import time
+
+import numpy as np
+
+from .astar import (
+    NEIGHBORS_MOVES,
+    Coord,
+    OccupancyGrid,
+    Path,
+    _padded_free_map,
+    _reconstruct_padded_path,
+    heuristic,
+)
+
+# 每展开这么多个节点检查一次时间预算
+_DEADLINE_CHECK_INTERVAL = 256
+
+
+def get_path_ara_star(
+    grid: OccupancyGrid,
+    start: Coord,
+    end: Coord,
+    time_budget: float = 0.2,
+    initial_weight: float = 2.5,
+    weight_step: float = 0.5,
+    stats: dict | None = None,
+) -> tuple[Path, float]:
+    """
+    ARA* 寻路，返回 (路径, 次优界)。
+
+    路径格式与 get_path_astar_2d 相同，路径长度不超过最优路径长度乘以次优界；
+    次优界为 1.0 表示已经证明最优。没有路径时返回 (空数组, inf)。
+
+    time_budget: 墙钟时间预算（秒）。第一条路径总会找完，之后的改进轮次在超时后停止。
+    initial_weight: 第一轮的启发函数权重 ε
+    weight_step: 每轮 ε 的减小量
+
+    如果传入 stats 字典，会写入轮数、每轮的 ε 和次优界、展开数、首条路径耗时和总耗时。
+    """
+    begin = time.perf_counter()
+    deadline = begin + time_budget
+    start, end = (int(start[0]), int(start[1])), (int(end[0]), int(end[1]))
+
+    free_array, width = _padded_free_map(grid)
+    size = free_array.size
+    index_dtype = np.int32 if size < 2**31 else np.int64
+    g_array = np.full(size, np.inf, dtype=np.float32)
+    came_from_array = np.full(size, -1, dtype=index_dtype)
+    closed_array = np.zeros(size, dtype=np.uint8)
+
+    free = memoryview(free_array)
+    g_score = memoryview(g_array)
+    came_from = memoryview(came_from_array)
+    closed = memoryview(closed_array)
+    moves = [(dr * width + dc, cost) for (dr, dc), cost in NEIGHBORS_MOVES]
+
+    start_idx = (start[0] + 1) * width + start[1] + 1
+    end_idx = (end[0] + 1) * width + end[1] + 1
+
+    h_cache: dict[int, float] = {}
+
+    def h(node: int) -> float:
+        value = h_cache.get(node)
+        if value is None:
+            r, c = divmod(node, width)
+            value = h_cache[node] = heuristic((r - 1, c - 1), end)
+        return value
+
+    weight = initial_weight
+    g_score[start_idx] = 0.0
+    open_members: set[int] = {start_idx}
+    open_heap: list[tuple[float, int]] = [(weight * h(start_idx), start_idx)]
+    incons: set[int] = set()
+    expansions = 0
+    rounds: list[dict] = []
+    first_solution_s = None
+
+    best_path = np.array([])
+    best_bound = float("inf")
+
+    # 按当前 ε 展开，直到终点的 f 值不大于开放列表中的最小 f 值
+    def improve_path(check_deadline: bool) -> bool:
+        nonlocal expansions
+        heappush, heappop = heapq.heappush, heapq.heappop
+        counter = 0
+        while open_heap:
+            f_min, current = open_heap[0]
+            # 丢弃已出列或优先级已过时的旧条目
+            if current not in open_members or f_min != g_score[current] + weight * h(
+                current
+            ):
+                heappop(open_heap)
+                continue
+            if g_score[end_idx] + weight * h(end_idx) <= f_min:
+                return True
+
+            heappop(open_heap)
+            open_members.discard(current)
+            closed[current] = 1
+            expansions += 1
+            counter += 1
+            if check_deadline and counter % _DEADLINE_CHECK_INTERVAL == 0:
+                if time.perf_counter() > deadline:
+                    return False
+
+            current_g = g_score[current]
+            for offset, move_cost in moves:
+                neighbor = current + offset
+                if not free[neighbor]:
+                    continue
+                tentative_g_score = current_g + move_cost
+                if tentative_g_score < g_score[neighbor]:
+                    g_score[neighbor] = tentative_g_score
+                    came_from[neighbor] = current
+                    if closed[neighbor]:
+                        # 本轮已经展开过，留到下一轮再处理
+                        incons.add(neighbor)
+                    else:
+                        open_members.add(neighbor)
+                        heappush(
+                            open_heap,
+                            (g_score[neighbor] + weight * h(neighbor), neighbor),
+                        )
+        return g_score[end_idx] < float("inf")
+
+    while True:
+        # 第一轮必须找到路径（或证明无解），后续轮次受时间预算约束
+        finished = improve_path(check_deadline=bool(rounds))
+        if not finished:
+            break
+
+        if g_score[end_idx] == float("inf"):
+            break
+
+        # 次优界：min(ε, g(goal) / min_{s∈OPEN∪INCONS}(g(s) + h(s)))
+        pending = open_members | incons
+        lower_bound = min(
+            (g_score[s] + h(s) for s in pending), default=g_score[end_idx]
+        )
+        bound = min(weight, g_score[end_idx] / lower_bound) if lower_bound > 0 else 1.0
+        best_bound = max(float(bound), 1.0)
+        best_path = _reconstruct_padded_path(came_from, end_idx, width)
+        if first_solution_s is None:
+            first_solution_s = time.perf_counter() - begin
+        rounds.append(
+            {"weight": weight, "bound": best_bound, "g_goal": g_score[end_idx]}
+        )
+
+        if best_bound <= 1.0 or time.perf_counter() > deadline:
+            break
+
+        # 减小 ε，把 INCONS 并入 OPEN，按新的 ε 重建堆，清空 CLOSED
+        weight = max(1.0, weight - weight_step)
+        open_members |= incons
+        incons.clear()
+        open_heap[:] = [(g_score[s] + weight * h(s), s) for s in open_members]
+        heapq.heapify(open_heap)
+        closed_array.fill(0)
+
+    if stats is not None:
+        stats.update(
+            rounds=rounds,
+            expansions=expansions,
+            first_solution_s=first_solution_s,
+            elapsed_s=time.perf_counter() - begin,
+        )
+
+    return best_path, best_bound
@@ -1,15 +1,20 @@
 """
 二维astar算法
 """
+import hashlib
 import heapq
+import sys
+import time
 from collections import defaultdict
-from typing import TypeAlias, Annotated
+from typing import Callable, TypeAlias, Annotated
 
 import numpy as np
 import numpy.typing as npt
-from matplotlib import pyplot as plt
-from matplotlib.colors import ListedColormap
-from scipy.ndimage import binary_dilation
+
+from .bitgrid import BitGrid
+from .indexed_heap import IndexedHeap
+from .path_overlay import PathOverlay
+from .search_trace import SearchTrace
 
 # 类型别名
 # 点坐标
@@ -18,38 +23,139 @@ Coord: TypeAlias = tuple[int, int]
 Path = Annotated[npt.NDArray[np.int64], ("N", 2)]
 # 网格
 Grid = Annotated[npt.NDArray[np.int64], ("N", "M")]
+# 稠密网格或按位打包的网格
+OccupancyGrid: TypeAlias = Grid | BitGrid
 
 MOVE_COST_STRAIGHT: float = 1.0
 MOVE_COST_DIAGONAL: float = np.sqrt(2)
 
+# 定义8个移动方向和对应的成本
+NEIGHBORS_MOVES: list[tuple[Coord, float]] = [
+    ((0, 1), MOVE_COST_STRAIGHT),
+    ((0, -1), MOVE_COST_STRAIGHT),
+    ((1, 0), MOVE_COST_STRAIGHT),
+    ((-1, 0), MOVE_COST_STRAIGHT),
+    ((1, 1), MOVE_COST_DIAGONAL),
+    ((-1, 1), MOVE_COST_DIAGONAL),
+    ((-1, -1), MOVE_COST_DIAGONAL),
+    ((1, -1), MOVE_COST_DIAGONAL),
+]
+
+# 估算 heapq 中每个 (float, int) 条目的内存：元组 + float + int + 列表槽位，按 sys.getsizeof 实测
+_HEAP_ENTRY_BYTES = (
+    sys.getsizeof((0.0, 0)) + sys.getsizeof(0.0) + sys.getsizeof(2**20) + 8
+)
+
+
+# 网格内容哈希，用于给预处理结果、缓存等做失效判断
+def grid_digest(grid: OccupancyGrid) -> str:
+    """
+    只对 grid != 0 的障碍物布局和形状做哈希，与 dtype 无关。
+    按行分块打包成位后再哈希，内存占用与网格大小无关；
+    BitGrid 本身就是同样的打包方式，直接哈希，结果与稠密网格一致。
+    """
+    rows, cols = grid.shape
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray((rows, cols), dtype=np.int64).tobytes())
+    block_rows = max(1, (1 << 24) // max(cols, 1))
+    for row_start in range(0, rows, block_rows):
+        if isinstance(grid, BitGrid):
+            packed = grid.bits[row_start : row_start + block_rows]
+        else:
+            block = np.asarray(grid[row_start : row_start + block_rows])
+            packed = np.packbits(block != 0, axis=1)
+        digest.update(np.ascontiguousarray(packed).tobytes())
+    return digest.hexdigest()
+
+
+# 优化点 1: 修正启发函数为八角距离 (Octile Distance)
+def heuristic(coord_a: Coord, coord_b: Coord) -> float:
+    dx = abs(coord_a[0] - coord_b[0])
+    dy = abs(coord_a[1] - coord_b[1])
+    # 这是八角距离的精确计算公式
+    return MOVE_COST_STRAIGHT * (dx + dy) + (
+        MOVE_COST_DIAGONAL - 2 * MOVE_COST_STRAIGHT
+    ) * min(dx, dy)
+
 
 # 二维astar算法
-def get_path_astar_2d(grid: Grid, start: Coord, end: Coord) -> Path:
+def get_path_astar_2d(
+    grid: OccupancyGrid,
+    start: Coord,
+    end: Coord,
+    mode: str = "classic",
+    components=None,
+    weight: float = 1.0,
+    open_list: str = "heapq",
+    min_clearance: float = 0.0,
+    trace: SearchTrace | None = None,
+    workspace: "AStarWorkspace | None" = None,
+) -> Path:
     """
     一个优化版本的二维A*寻路算法。
+
+    mode:
+        "classic": 基于 dict / set 的原始实现
+        "array": 基于扁平数组的实现，见 get_path_astar_2d_array
+        "jps": 跳点搜索，见 jps.get_path_jps_2d
+
+    components: 可选的 components.ComponentIndex，起点和终点不在同一个
+        连通分量时直接返回空路径，不再搜索整个可达区域。
+    weight: 启发函数权重 ε >= 1（加权 A*），路径长度不超过最优的 ε 倍，
+        只有 "array" 模式支持。
+    open_list: 开放列表实现，"heapq" 或 "indexed"（带 decrease-key 的索引堆），
+        只有 "array" 模式支持。"indexed" 的堆里没有过时条目，峰值条目数只有 heapq 的
+        1/5 ~ 1/8（2000² 圆形障碍物网格上实测），但位置表按页占用物理内存，
+        decrease-key 的维护又在纯 Python 里完成，同一查询比 heapq 慢约 50%，
+        只在开放列表内存吃紧时使用。
+    min_clearance: 格子到最近障碍物的欧氏距离（见 clearance.py，按网格哈希缓存）
+        小于该值时视为不可通行，用于有物理半径的车辆；0 表示不限制。
+        "classic" 和 "array" 模式支持。
+    trace: 可选的 search_trace.SearchTrace，记录搜索过程，只有 "array" 模式支持。
+    workspace: 可选的 AStarWorkspace，同一网格上连续查询时复用，只有 "array" 模式支持。
     """
+    if components is not None and not components.is_reachable(start, end):
+        return np.array([])
+
+    if (weight != 1.0 or open_list != "heapq") and mode != "array":
+        raise ValueError(f"寻路模式 {mode} 不支持加权启发函数或自选开放列表")
+    if min_clearance > 0 and mode not in ("classic", "array"):
+        raise ValueError(f"寻路模式 {mode} 不支持 min_clearance")
+    if (trace is not None or workspace is not None) and mode != "array":
+        raise ValueError(f"寻路模式 {mode} 不支持搜索埋点或复用工作区")
+    if mode == "array":
+        return get_path_astar_2d_array(
+            grid,
+            start,
+            end,
+            weight=weight,
+            open_list=open_list,
+            min_clearance=min_clearance,
+            trace=trace,
+            workspace=workspace,
+        )
+    if mode == "jps":
+        # 延迟导入，jps 模块本身依赖本模块
+        from .jps import get_path_jps_2d
+
+        return get_path_jps_2d(grid, start, end)
+    if mode != "classic":
+        raise ValueError(f"未知的寻路模式: {mode}")
+
     rows, cols = grid.shape
+    neighbors_moves = NEIGHBORS_MOVES
 
-    # 优化点 1: 修正启发函数为八角距离 (Octile Distance)
-    def heuristic(coord_a: Coord, coord_b: Coord) -> float:
-        dx = abs(coord_a[0] - coord_b[0])
-        dy = abs(coord_a[1] - coord_b[1])
-        # 这是八角距离的精确计算公式
-        return MOVE_COST_STRAIGHT * (dx + dy) + (
-            MOVE_COST_DIAGONAL - 2 * MOVE_COST_STRAIGHT
-        ) * min(dx, dy)
-
-    # 定义8个移动方向和对应的成本
-    neighbors_moves = [
-        ((0, 1), MOVE_COST_STRAIGHT),
-        ((0, -1), MOVE_COST_STRAIGHT),
-        ((1, 0), MOVE_COST_STRAIGHT),
-        ((-1, 0), MOVE_COST_STRAIGHT),
-        ((1, 1), MOVE_COST_DIAGONAL),
-        ((-1, 1), MOVE_COST_DIAGONAL),
-        ((-1, -1), MOVE_COST_DIAGONAL),
-        ((1, -1), MOVE_COST_DIAGONAL),
-    ]
+    clearance = None
+    if min_clearance > 0:
+        # 延迟导入，clearance 模块本身依赖本模块
+        from .clearance import get_clearance_map
+
+        clearance = get_clearance_map(grid)
+        if (
+            clearance[start[0], start[1]] < min_clearance
+            or clearance[end[0], end[1]] < min_clearance
+        ):
+            return np.array([])
 
     # 优先队列（小顶堆）
     open_set: list[tuple[float, Coord]] = [(heuristic(start, end), start)]
@@ -95,6 +201,11 @@ def get_path_astar_2d(grid: Grid, start: Coord, end: Coord) -> Path:
                 and grid[neighbor[0]][neighbor[1]] == 0
             ):
                 continue
+            if (
+                clearance is not None
+                and clearance[neighbor[0], neighbor[1]] < min_clearance
+            ):
+                continue
 
             # 检查邻居是否已在关闭列表中
             if neighbor in closed_set:
@@ -114,87 +225,369 @@ def get_path_astar_2d(grid: Grid, start: Coord, end: Coord) -> Path:
     return np.array([])  # 未找到路径
 
 
-# 测试二维Astar算法
-def get_astar_2d_result_grid(grid_map: Grid, start: Coord, end: Coord) -> Grid:
+# 把网格转换成带一圈障碍物边框的扁平可通行表，1 代表可通行
+def _padded_free_map(
+    grid: OccupancyGrid, min_clearance: float = 0.0
+) -> tuple[npt.NDArray[np.uint8], int]:
+    """
+    四周各加一格障碍物，这样邻居检查就不再需要做越界判断。
+    返回扁平化的可通行表和加边后的行宽。BitGrid 按行分块解包，不产生稠密的中间拷贝。
+    min_clearance 大于 0 时，离障碍物不足该距离的格子也标为不可通行。
+    """
+    rows, cols = grid.shape
+    width = cols + 2
+    free = np.zeros((rows + 2, width), dtype=np.uint8)
+    if isinstance(grid, BitGrid):
+        block_rows = max(1, (1 << 24) // max(cols, 1))
+        for row_start in range(0, rows, block_rows):
+            row_end = min(rows, row_start + block_rows)
+            occupied = np.unpackbits(grid.bits[row_start:row_end], axis=1, count=cols)
+            free[row_start + 1 : row_end + 1, 1:-1] = occupied == 0
+    else:
+        free[1:-1, 1:-1] = grid == 0
+    if min_clearance > 0:
+        from .clearance import get_clearance_map
+
+        free[1:-1, 1:-1] &= get_clearance_map(grid) >= min_clearance
+    return free.ravel(), width
+
+
+class AStarWorkspace:
+    """
+    数组版 A* 在同一网格上多次查询时复用的工作区。
+
+    加边的可通行表只在创建时构建一次；g_score / came_from 不再每次查询整块初始化，
+    而是配一个 uint32 的代数戳：第 k 次查询时戳为 2k 表示本次已写入 g_score，
+    2k + 1 表示已关闭，更小的值都视为未访问。每次查询只需把代数加一，
+    开销与搜索实际触及的格子数成正比，与网格大小无关。
+
+    网格内容改变后需要重新创建工作区。工作区不是线程安全的，
+    每个线程 / 进程各用一个。
+    """
+
+    def __init__(self, grid: OccupancyGrid, min_clearance: float = 0.0):
+        self.shape: tuple[int, int] = tuple(grid.shape)
+        self.min_clearance = min_clearance
+        self.free_array, self.width = _padded_free_map(grid, min_clearance)
+        size = self.free_array.size
+        index_dtype = np.int32 if size < 2**31 else np.int64
+        # np.empty / np.zeros 只申请虚拟内存，页面在第一次写入时才真正分配
+        self.g_array = np.empty(size, dtype=np.float32)
+        self.came_from_array = np.empty(size, dtype=index_dtype)
+        self.stamp_array = np.zeros(size, dtype=np.uint32)
+        self.generation = 0
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.free_array.nbytes
+            + self.g_array.nbytes
+            + self.came_from_array.nbytes
+            + self.stamp_array.nbytes
+        )
+
+    def check(self, grid: OccupancyGrid, min_clearance: float) -> None:
+        if tuple(grid.shape) != self.shape or min_clearance != self.min_clearance:
+            raise ValueError(
+                f"工作区按形状 {self.shape}、min_clearance={self.min_clearance} 构建，"
+                f"与本次查询的 {tuple(grid.shape)}、{min_clearance} 不一致"
+            )
+
+    def next_generation(self) -> int:
+        """
+        开始一次新查询，返回本次查询的代数；代数戳快要溢出时整体清零一次。
+        """
+        self.generation += 1
+        if 2 * self.generation + 1 > np.iinfo(np.uint32).max:
+            self.stamp_array.fill(0)
+            self.generation = 1
+        return self.generation
+
+
+# 把加边后的扁平下标回溯成路径
+def _reconstruct_padded_path(came_from: memoryview, end_idx: int, width: int) -> Path:
+    path: list[Coord] = []
+    current = end_idx
+    while current != -1:
+        r, c = divmod(current, width)
+        path.append((r - 1, c - 1))
+        current = came_from[current]
+    return np.array(path[::-1])
+
+
+# 二维astar算法，数组版本
+def get_path_astar_2d_array(
+    grid: OccupancyGrid,
+    start: Coord,
+    end: Coord,
+    stats: dict | None = None,
+    weight: float = 1.0,
+    open_list: str = "heapq",
+    heuristic_fn: Callable[[int], float] | None = None,
+    min_clearance: float = 0.0,
+    trace: SearchTrace | None = None,
+    workspace: AStarWorkspace | None = None,
+) -> Path:
+    """
+    与 get_path_astar_2d 相同签名的数组版 A*。
+
+    节点用扁平的线性下标表示，g_score 用预分配的 float32 数组，
+    came_from 用 int32 数组，开放 / 关闭状态用代数戳数组（见 AStarWorkspace），
+    堆里只放 (float, int)，不再对坐标元组做哈希。
+    热循环里通过 memoryview 访问这些数组，避免 numpy 标量的开销。
+
+    workspace 为同一网格构建的 AStarWorkspace 时，跨查询复用可通行表和状态数组，
+    每次查询不再有与网格大小成正比的分配和初始化；为 None 时临时创建一个。
 
-    path: Path = get_path_astar_2d(grid_map, start, end)
+    weight 大于 1 时是加权 A*（f = g + ε·h），展开的节点更少，
+    返回的路径长度不超过最优路径的 ε 倍。
 
-    # 赋初值
-    path_grid: Grid = grid_map
+    open_list 为 "indexed" 时用 IndexedHeap 作为开放列表，邻居变好时执行 decrease-key，
+    堆中没有过时条目，堆大小等于真正开放的节点数；默认 "heapq" 为重复入堆加延迟丢弃。
 
-    if path is not None and len(path) > 0:
-        # 把路径在网格上标出来
-        for r, c in path:
-            path_grid[r][c] = 2  # Path
+    heuristic_fn 供其他寻路模块替换启发函数（例如 alt.py 的地标启发函数），
+    参数是加边后网格的扁平下标（行宽为 cols + 2），必须是可采纳的。
+
+    min_clearance 的含义与 get_path_astar_2d 相同，在构建可通行表时一次性剔除。
+
+    如果传入 stats 字典，会写入展开数、入堆数、过期弹出数、
+    最大开放列表长度、耗时以及估算的堆内存和峰值内存（字节）。
+    heap_bytes 只统计堆中条目的峰值；"indexed" 的位置表按实际写过的页面单独记在 position_bytes。
+
+    trace 为 search_trace.SearchTrace 时记录邻居生成耗时、展开轨迹采样 / 回调，
+    并在结束时写入已展开格子的掩码；为 None 时热循环里只多一次布尔判断。
+    """
+    if open_list not in ("heapq", "indexed"):
+        raise ValueError(f"未知的开放列表实现: {open_list}")
+    begin = time.perf_counter()
+    # 坐标可能是 numpy 整数，统一转成 int，避免热循环里的标量开销
+    start, end = (int(start[0]), int(start[1])), (int(end[0]), int(end[1]))
+    if workspace is None:
+        workspace = AStarWorkspace(grid, min_clearance)
     else:
+        workspace.check(grid, min_clearance)
+    width = workspace.width
+    size = workspace.free_array.size
+    generation = workspace.next_generation()
+    # 戳等于 open_mark：本次查询写过 g_score；等于 closed_mark：已关闭
+    open_mark = 2 * generation
+    closed_mark = open_mark + 1
+
+    free = memoryview(workspace.free_array)
+    g_score = memoryview(workspace.g_array)
+    came_from = memoryview(workspace.came_from_array)
+    stamp = memoryview(workspace.stamp_array)
+
+    # 8个方向在扁平下标上的偏移
+    moves = [(dr * width + dc, cost) for (dr, dc), cost in NEIGHBORS_MOVES]
+
+    start_idx = (start[0] + 1) * width + start[1] + 1
+    end_idx = (end[0] + 1) * width + end[1] + 1
+    end_r, end_c = end[0] + 1, end[1] + 1
+    straight = MOVE_COST_STRAIGHT * weight
+    diagonal_extra = (MOVE_COST_DIAGONAL - MOVE_COST_STRAIGHT) * weight
+
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+
+    g_score[start_idx] = 0.0
+    came_from[start_idx] = -1
+    stamp[start_idx] = open_mark
+    if heuristic_fn is None:
+        start_f = weight * heuristic(start, end)
+    else:
+        start_f = weight * heuristic_fn(start_idx)
+    indexed = open_list == "indexed"
+    if indexed:
+        open_heap = IndexedHeap(size)
+        open_heap.push(start_f, start_idx)
+        indexed_push, indexed_pop = open_heap.push, open_heap.pop
+        open_set = open_heap
+    else:
+        open_set: list[tuple[float, int]] = [(start_f, start_idx)]
+    expansions = pushes = stale_pops = 0
+    max_open = 1
+    found = False
+    # 有间距要求时，起点或终点离障碍物太近直接视为无解
+    searchable = min_clearance <= 0 or (free[start_idx] and free[end_idx])
+    tracing = trace is not None
+    neighbor_time = 0.0
+    perf_counter = time.perf_counter
+
+    while searchable and open_set:
+        if indexed:
+            _, current = indexed_pop()
+        else:
+            _, current = heappop(open_set)
+
+            # 同一节点在堆里的旧副本，直接丢弃
+            if stamp[current] == closed_mark:
+                stale_pops += 1
+                continue
+        stamp[current] = closed_mark
+        expansions += 1
+
+        if current == end_idx:
+            found = True
+            break
+
+        current_g = g_score[current]
+        if tracing:
+            r, c = divmod(current, width)
+            trace.record_expansion(r - 1, c - 1, current_g, expansions)
+            neighbor_begin = perf_counter()
+        for offset, move_cost in moves:
+            neighbor = current + offset
+            # 边框保证不会越界，只需要判断是否可通行、是否已关闭
+            neighbor_stamp = stamp[neighbor]
+            if not free[neighbor] or neighbor_stamp == closed_mark:
+                continue
+
+            tentative_g_score = current_g + move_cost
+            # 戳不是本次查询的，g_score 里是上一次查询的旧值，视为无穷大
+            if neighbor_stamp != open_mark or tentative_g_score < g_score[neighbor]:
+                stamp[neighbor] = open_mark
+                g_score[neighbor] = tentative_g_score
+                came_from[neighbor] = current
+
+                if heuristic_fn is not None:
+                    h = weight * heuristic_fn(neighbor)
+                else:
+                    # 内联八角距离（系数里已经乘上了权重）
+                    r, c = divmod(neighbor, width)
+                    dx = r - end_r if r > end_r else end_r - r
+                    dy = c - end_c if c > end_c else end_c - c
+                    if dx > dy:
+                        h = straight * dx + diagonal_extra * dy
+                    else:
+                        h = straight * dy + diagonal_extra * dx
+
+                if indexed:
+                    indexed_push(tentative_g_score + h, neighbor)
+                    continue
+                heappush(open_set, (tentative_g_score + h, neighbor))
+                pushes += 1
+                if len(open_set) > max_open:
+                    max_open = len(open_set)
+        if tracing:
+            neighbor_time += perf_counter() - neighbor_begin
+
+    if tracing:
+        trace.neighbor_time_s = neighbor_time
+        rows = size // width
+        trace.record_explored(
+            workspace.stamp_array.reshape(rows, width)[1:-1, 1:-1] == closed_mark
+        )
+
+    path = (
+        _reconstruct_padded_path(came_from, end_idx, width) if found else np.array([])
+    )
+
+    if stats is not None:
+        elapsed = time.perf_counter() - begin
+        state_bytes = workspace.nbytes
+        if indexed:
+            heap_stats = open_heap.stats()
+            pushes, max_open = heap_stats["pushes"], heap_stats["max_heap_size"]
+            heap_bytes = heap_stats["heap_bytes"]
+            stats["decrease_keys"] = heap_stats["decrease_keys"]
+            # 本次查询入过堆的节点戳都不小于 open_mark，它们的位置都写过
+            position_bytes = open_heap.position_bytes(
+                np.flatnonzero(workspace.stamp_array >= open_mark)
+            )
+            stats["position_bytes"] = position_bytes
+        else:
+            heap_bytes = max_open * _HEAP_ENTRY_BYTES
+            position_bytes = 0
+        stats.update(
+            open_list=open_list,
+            expansions=expansions,
+            pushes=pushes,
+            stale_pops=stale_pops,
+            max_open=max_open,
+            heap_size=len(open_set),
+            elapsed_s=elapsed,
+            expansions_per_s=expansions / elapsed if elapsed > 0 else 0.0,
+            state_bytes=state_bytes,
+            heap_bytes=heap_bytes,
+            peak_bytes=state_bytes + heap_bytes + position_bytes,
+        )
+        if tracing:
+            stats["neighbor_time_s"] = neighbor_time
+
+    return path
+
+
+# 测试二维Astar算法
+def get_astar_2d_result_overlay(
+    grid_map: OccupancyGrid, start: Coord, end: Coord, mode: str = "classic"
+) -> PathOverlay:
+    """
+    返回稀疏的路径叠加层，不修改也不拷贝网格，内存与路径长度成正比。
+    需要显示时用 PathOverlay.rasterize 只栅格化感兴趣的区域。
+    """
+    path: Path = get_path_astar_2d(grid_map, start, end, mode=mode)
+    if path is None or len(path) == 0:
         print("\n未找到路径。")
+        path = np.zeros((0, 2), dtype=np.int32)
+    return PathOverlay.from_path(path, grid_map.shape)
+
+
+def get_astar_2d_result_grid(grid_map: Grid, start: Coord, end: Coord) -> Grid:
+    """
+    返回标出了路径（值为 2）的网格拷贝，grid_map 本身保持不变。
+    这会拷贝整张网格，大网格请改用 get_astar_2d_result_overlay。
+    """
+    return get_astar_2d_result_overlay(grid_map, start, end).rasterize(grid_map)
 
-    return np.array(path_grid)
 
 # 可视化展示
 def show_grid_high_clarity_overview():
-    # 1. 加载.npz文件 (您的原始逻辑)
-    # 为了让代码可以运行，我们先创建一个模拟文件
+    # 1. 优先以只读方式内存映射网格存储，路径标在拷贝上，不会改动网格
+    from .grid_store import open_grid_store
+
     try:
-        data = np.load("../algo/obstacle_grid_6000x6000.npz")
-        print("已成功加载文件。")
+        origin_grid = open_grid_store("../algo/obstacle_grid_6000x6000.npy")
+        print("已成功映射网格存储。")
     except FileNotFoundError:
-        print("未找到，正在创建模拟数据文件...")
-        grid_size = 10000
-        mock_grid = np.zeros((grid_size, grid_size), dtype=int)
-        num_obstacles = int(grid_size * grid_size * 0.6)
-        obstacle_rows = np.random.randint(0, grid_size, num_obstacles)
-        obstacle_cols = np.random.randint(0, grid_size, num_obstacles)
-        mock_grid[obstacle_rows, obstacle_cols] = 1  # 1 代表障碍物
-        np.savez_compressed("obstacles.npz", grid=mock_grid)
-        data = np.load("obstacles.npz")
-        print("模拟数据文件已创建并加载。")
-
-    # 2. 提取网格并运行A*算法
-    origin_grid = data["grid"]
+        # 没有网格存储时加载.npz文件 (您的原始逻辑)
+        # 为了让代码可以运行，我们先创建一个模拟文件
+        try:
+            data = np.load("../algo/obstacle_grid_6000x6000.npz")
+            print("已成功加载文件。")
+        except FileNotFoundError:
+            print("未找到，正在创建模拟数据文件...")
+            grid_size = 10000
+            mock_grid = np.zeros((grid_size, grid_size), dtype=int)
+            num_obstacles = int(grid_size * grid_size * 0.6)
+            obstacle_rows = np.random.randint(0, grid_size, num_obstacles)
+            obstacle_cols = np.random.randint(0, grid_size, num_obstacles)
+            mock_grid[obstacle_rows, obstacle_cols] = 1  # 1 代表障碍物
+            np.savez_compressed("obstacles.npz", grid=mock_grid)
+            data = np.load("obstacles.npz")
+            print("模拟数据文件已创建并加载。")
+        origin_grid = data["grid"]
+
+    # 2. 运行A*算法，路径以稀疏叠加层返回，不拷贝网格
     print("正在执行Astar算法...")
-    path_grid = get_astar_2d_result_grid(origin_grid, (5900, 0), (0, 1200))
-
-    # --- 路径加粗处理开始 ---
-    print("正在加粗路径...")
-
-    # 2. 创建一个只包含路径的布尔掩码 (True代表是路径)
-    path_mask = path_grid == 2
+    overlay = get_astar_2d_result_overlay(origin_grid, (5900, 0), (0, 1200))
 
-    # 3. 对路径掩码进行膨胀操作
-    # 'iterations' 参数控制加粗的程度，值越大，路径越粗。可以从 2 或 3 开始尝试。
-    dilated_path_mask = binary_dilation(path_mask, iterations=5)
+    # 3. 构建降采样金字塔（最大池化，细小障碍物不会丢失），路径用矢量折线绘制，
+    # 不再对全图做膨胀，也不再 imshow 全部格子
+    # matplotlib 只在可视化时导入，只做寻路的调用方（例如 path_service）不需要加载它
+    from matplotlib import pyplot as plt
 
-    # 4. 将加粗后的路径应用回网格
-    # 在原有的 path_grid 上，所有被膨胀区域覆盖的地方，都赋值为 2
-    path_grid[dilated_path_mask] = 2
+    from .render import GridPyramid, draw_view
 
-    print("路径加粗完成。")
-    # --- 路径加粗处理结束 ---
-
-    # --- 图像清晰化处理开始 ---
-
-    # 3. 定义一个高对比度的颜色映射来区分不同区域
-    # 0: 可通行区域 (白色)
-    # 1: 障碍物 (黑色)
-    # 2: 路径 (红色)
-    colors = ["white", "black", "red"]
-    cmap = ListedColormap(colors)
-    # 创建一个归一化器，确保数值和颜色正确对应
-    norm = plt.Normalize(vmin=0, vmax=2)
+    print("正在构建金字塔...")
+    pyramid = GridPyramid(origin_grid)
 
     # 4. 创建一个尺寸合适的图像画布
     # figsize 单位是英寸, 10x10英寸的画布可以容纳更多细节
     fig, ax = plt.subplots(figsize=(10, 10))
 
-    # 5. 使用 imshow 显示网格
-    # interpolation='none' 可以确保在放大时，单元格边缘保持清晰的方块状
-    ax.imshow(path_grid, cmap=cmap, norm=norm, interpolation="none")
-
-    # 6. 【核心改动】移除所有会造成混乱的细节元素
-    # 不再绘制网格线和单元格文本，因为在3000x3000的尺度下它们只会变成一团乱麻
-    ax.set_xticks([])
-    ax.set_yticks([])
+    # 5. 按画布像素数选择金字塔层绘制，放大时可以传入 roi 切换到更精细的层
+    draw_view(ax, pyramid, overlay, max_pixels=1000)
     ax.set_title("Grid - High Clarity Overview", fontsize=16)
 
     plt.show()  # 用于快速预览
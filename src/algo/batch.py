@@ -0,0 +1,111 @@
+"""
+批量寻路
+
+把网格放进 multiprocessing.shared_memory（只存 uint8 的障碍物表，1 字节/格），
+所有工作进程共享同一份数据，然后把 (起点, 终点) 查询分发到多个核心上，
+结果按完成顺序流式返回。
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from .astar import AStarWorkspace, Coord, Grid, Path, get_path_astar_2d
+
+# 工作进程内挂载的共享网格
+_worker_memory: shared_memory.SharedMemory | None = None
+_worker_grid: np.ndarray | None = None
+# 工作进程内复用的数组 A* 工作区，第一次 "array" 查询时创建
+_worker_workspace: AStarWorkspace | None = None
+
+
+def _attach_shared_grid(name: str, shape: tuple[int, int]) -> None:
+    global _worker_memory, _worker_grid
+    _worker_memory = shared_memory.SharedMemory(name=name)
+    _worker_grid = np.ndarray(shape, dtype=np.uint8, buffer=_worker_memory.buf)
+
+
+def _plan_chunk(
+    chunk: list[tuple[int, Coord, Coord]], mode: str
+) -> list[tuple[int, Path]]:
+    global _worker_workspace
+    if mode == "array" and _worker_workspace is None:
+        _worker_workspace = AStarWorkspace(_worker_grid)
+    workspace = _worker_workspace if mode == "array" else None
+    return [
+        (
+            index,
+            get_path_astar_2d(_worker_grid, start, end, mode=mode, workspace=workspace),
+        )
+        for index, start, end in chunk
+    ]
+
+
+def plan_many(
+    grid: Grid,
+    pairs: Iterable[tuple[Coord, Coord]],
+    workers: int | None = None,
+    mode: str = "array",
+    chunk_size: int = 1,
+    components=None,
+) -> Iterator[tuple[int, Path]]:
+    """
+    批量寻路，按完成顺序逐个产出 (查询序号, 路径)。
+
+    grid: 原始网格，只会被转换成 uint8 障碍物表拷贝进共享内存一次
+    pairs: (起点, 终点) 列表
+    workers: 进程数，默认等于 CPU 核数
+    mode: 传给 get_path_astar_2d 的寻路模式
+    chunk_size: 每个任务包含的查询数，查询很短时调大可以减少调度开销
+    components: 可选的 components.ComponentIndex，不可达的查询不进进程池，直接返回空路径
+    """
+    workers = workers or os.cpu_count() or 1
+    chunk: list[tuple[int, Coord, Coord]] = []
+    chunks: list[list[tuple[int, Coord, Coord]]] = []
+    unreachable: list[int] = []
+    for index, (start, end) in enumerate(pairs):
+        if components is not None and not components.is_reachable(start, end):
+            unreachable.append(index)
+            continue
+        chunk.append((index, tuple(start), tuple(end)))
+        if len(chunk) >= chunk_size:
+            chunks.append(chunk)
+            chunk = []
+    if chunk:
+        chunks.append(chunk)
+
+    for index in unreachable:
+        yield index, np.array([])
+    if not chunks:
+        return
+
+    memory = shared_memory.SharedMemory(create=True, size=max(grid.size, 1))
+    try:
+        shared_grid = np.ndarray(grid.shape, dtype=np.uint8, buffer=memory.buf)
+        np.not_equal(grid, 0, out=shared_grid, casting="unsafe")
+        del shared_grid
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_attach_shared_grid,
+            initargs=(memory.name, grid.shape),
+        ) as executor:
+            # 同时在途的任务数限制在进程数的两倍，避免一次性提交过多结果占内存
+            pending = set()
+            chunk_iter = iter(chunks)
+            for next_chunk in chunk_iter:
+                pending.add(executor.submit(_plan_chunk, next_chunk, mode))
+                if len(pending) >= workers * 2:
+                    break
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+                    next_chunk = next(chunk_iter, None)
+                    if next_chunk is not None:
+                        pending.add(executor.submit(_plan_chunk, next_chunk, mode))
+    finally:
+        memory.close()
+        memory.unlink()
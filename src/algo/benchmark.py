@@ -0,0 +1,365 @@
+"""
+寻路基准测试
+
+用固定种子调用 create_grid_with_circular_obstacles 生成若干尺寸、障碍物比例的网格，
+为每张网格构建固定的查询集（短程、长程、不可达），逐个寻路器运行，
+记录耗时、展开数、入堆数、单条查询的峰值内存和路径长度，写入 JSON / CSV，
+并与保存的基线结果对比，标出变慢或路径变长的组合。
+
+运行：python -m src.algo.benchmark
+"""
+import csv
+import json
+import math
+import os
+import random
+import statistics
+import time
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+
+from .alt import build_landmark_table, get_path_alt
+from .anytime import get_path_ara_star
+from .astar import Coord, Grid, Path, get_path_astar_2d, get_path_astar_2d_array
+from .components import build_component_index
+from .generate_grid import MAX_RADIUS, MIN_RADIUS, create_grid_with_circular_obstacles
+from .hpa import build_abstract_graph, get_path_hpa
+from .jps import get_path_jps_2d
+
+# --- 参数设置 ---
+BENCH_SIZES = (256, 512, 1024)
+BENCH_RATIOS = (0.2, 0.3)
+BENCH_SEED = 20240601
+QUERIES_PER_SET = 5
+# 短程查询的八角距离上限、长程查询的下限（相对网格边长）
+SHORT_QUERY_FRACTION = 0.05
+LONG_QUERY_FRACTION = 0.6
+OUTPUT_PREFIX = "benchmark_results"
+BASELINE_FILENAME = "benchmark_baseline.json"
+# 与基线相比耗时增加超过该比例视为变慢
+TIME_REGRESSION_TOLERANCE = 0.2
+
+QUERY_SETS = ("short", "long", "unreachable")
+CSV_FIELDS = (
+    "size",
+    "ratio",
+    "seed",
+    "query_set",
+    "planner",
+    "queries",
+    "found",
+    "total_s",
+    "median_s",
+    "expansions",
+    "pushes",
+    "path_cost",
+    "preprocess_s",
+    "peak_query_mb",
+)
+
+# 寻路器：(网格, 起点, 终点, stats) -> 路径
+Planner = Callable[[Grid, Coord, Coord, dict], Path]
+
+
+def generate_bench_grid(size: int, ratio: float, seed: int) -> Grid:
+    """
+    与生产地图形态一致的网格：半径范围按边长从 8000x8000 等比缩放。
+    """
+    scale = size / 8000
+    return create_grid_with_circular_obstacles(
+        size=size,
+        ratio=ratio,
+        seed=seed,
+        min_radius=max(1, round(MIN_RADIUS * scale)),
+        max_radius=max(2, round(MAX_RADIUS * scale)),
+        progress=False,
+    )
+
+
+def _octile(a: Coord, b: Coord) -> float:
+    dx, dy = abs(a[0] - b[0]), abs(a[1] - b[1])
+    return max(dx, dy) + (math.sqrt(2) - 1) * min(dx, dy)
+
+
+def path_cost(path: Path) -> float:
+    if len(path) < 2:
+        return 0.0
+    steps = np.abs(np.diff(np.asarray(path), axis=0)).sum(axis=1)
+    return float(np.where(steps == 2, math.sqrt(2), 1.0).sum())
+
+
+def build_query_sets(
+    grid: Grid, seed: int, count: int = QUERIES_PER_SET
+) -> dict[str, list[tuple[Coord, Coord]]]:
+    """
+    用固定种子抽取查询：短程和长程查询的两端在同一个连通分量内；
+    不可达查询优先取不同连通分量中的两点，只有一个分量时终点取在障碍物上。
+    """
+    rng = random.Random(seed)
+    size = grid.shape[0]
+    index = build_component_index(grid)
+    free_cells = np.argwhere(grid == 0)
+    labels = index.labels[free_cells[:, 0], free_cells[:, 1]]
+    # 只在最大的连通分量里取短程和长程查询
+    main_label = int(np.bincount(labels).argmax())
+    main_cells = free_cells[labels == main_label]
+    other_cells = free_cells[labels != main_label]
+    obstacle_cells = np.argwhere(grid != 0)
+
+    def pick(cells) -> Coord:
+        r, c = cells[rng.randrange(len(cells))]
+        return int(r), int(c)
+
+    query_sets: dict[str, list[tuple[Coord, Coord]]] = {name: [] for name in QUERY_SETS}
+    short_limit = max(4.0, SHORT_QUERY_FRACTION * size)
+    long_limit = LONG_QUERY_FRACTION * size
+    for _ in range(count * 1000):
+        if len(query_sets["short"]) >= count and len(query_sets["long"]) >= count:
+            break
+        start = pick(main_cells)
+        if len(query_sets["short"]) < count:
+            r = min(
+                size - 1,
+                max(0, start[0] + rng.randint(-int(short_limit), int(short_limit))),
+            )
+            c = min(
+                size - 1,
+                max(0, start[1] + rng.randint(-int(short_limit), int(short_limit))),
+            )
+            if index.labels[r, c] == main_label and (r, c) != start:
+                query_sets["short"].append((start, (r, c)))
+        if len(query_sets["long"]) < count:
+            end = pick(main_cells)
+            if _octile(start, end) >= long_limit:
+                query_sets["long"].append((start, end))
+
+    for _ in range(count):
+        start = pick(main_cells)
+        end = pick(other_cells) if len(other_cells) else pick(obstacle_cells)
+        query_sets["unreachable"].append((start, end))
+    return query_sets
+
+
+def build_planners(grid: Grid) -> tuple[dict[str, Planner], dict[str, float]]:
+    """
+    返回所有寻路器以及需要预处理的寻路器的预处理耗时。
+    """
+    preprocess: dict[str, float] = {}
+
+    begin = time.perf_counter()
+    graph = build_abstract_graph(grid, cluster_size=max(16, grid.shape[0] // 16))
+    preprocess["hpa"] = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    table = build_landmark_table(grid)
+    preprocess["alt"] = time.perf_counter() - begin
+
+    def classic(grid, start, end, stats):
+        return get_path_astar_2d(grid, start, end, mode="classic")
+
+    def ara(grid, start, end, stats):
+        path, _ = get_path_ara_star(grid, start, end, stats=stats)
+        return path
+
+    planners: dict[str, Planner] = {
+        "classic": classic,
+        "array": lambda grid, start, end, stats: get_path_astar_2d_array(
+            grid, start, end, stats
+        ),
+        "array_indexed": lambda grid, start, end, stats: get_path_astar_2d_array(
+            grid, start, end, stats, open_list="indexed"
+        ),
+        "weighted_1.5": lambda grid, start, end, stats: get_path_astar_2d_array(
+            grid, start, end, stats, weight=1.5
+        ),
+        "jps": get_path_jps_2d,
+        "hpa": lambda grid, start, end, stats: get_path_hpa(
+            grid, start, end, graph, stats=stats
+        ),
+        "alt": lambda grid, start, end, stats: get_path_alt(
+            grid, start, end, table, stats
+        ),
+        "ara": ara,
+    }
+    return planners, preprocess
+
+
+def _peak_query_mb(
+    planner: Planner, grid: Grid, queries: list[tuple[Coord, Coord]]
+) -> float:
+    """
+    单独再跑一遍查询集，用 tracemalloc 记录每条查询期间新增内存的峰值（MB），取最大值。
+    numpy 数组的分配也会被 tracemalloc 跟踪；它会明显拖慢分配，所以不与计时放在同一遍。
+    查询前已经存在的内存（网格、预处理结果）不计入。
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    peak = 0
+    try:
+        for start, end in queries:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            planner(grid, start, end, {})
+            _, query_peak = tracemalloc.get_traced_memory()
+            peak = max(peak, query_peak - before)
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return peak / 2**20
+
+
+def run_benchmark(
+    sizes=BENCH_SIZES,
+    ratios=BENCH_RATIOS,
+    seed: int = BENCH_SEED,
+    planners: tuple[str, ...] | None = None,
+    queries_per_set: int = QUERIES_PER_SET,
+    measure_memory: bool = True,
+) -> list[dict]:
+    """
+    运行所有组合，返回结果行（每行对应一个 网格 x 查询集 x 寻路器）。
+    planners: 只运行指定的寻路器，默认全部
+    measure_memory: 为每个寻路器额外跑一遍查询集测量单条查询的峰值内存，
+        关闭后 peak_query_mb 为 None
+    """
+    results: list[dict] = []
+    for size in sizes:
+        for ratio in ratios:
+            print(f"生成网格 size={size} ratio={ratio} seed={seed}...")
+            grid = generate_bench_grid(size, ratio, seed)
+            query_sets = build_query_sets(grid, seed, queries_per_set)
+            all_planners, preprocess = build_planners(grid)
+            names = planners if planners is not None else tuple(all_planners)
+
+            for query_set, queries in query_sets.items():
+                for name in names:
+                    planner = all_planners[name]
+                    durations: list[float] = []
+                    expansions = pushes = 0
+                    has_counters = False
+                    found = 0
+                    total_cost = 0.0
+                    for start, end in queries:
+                        stats: dict = {}
+                        begin = time.perf_counter()
+                        path = planner(grid, start, end, stats)
+                        durations.append(time.perf_counter() - begin)
+                        if "expansions" in stats:
+                            has_counters = True
+                            expansions += stats["expansions"]
+                            pushes += stats.get("pushes", 0)
+                        if len(path):
+                            found += 1
+                            total_cost += path_cost(path)
+
+                    row = {
+                        "size": size,
+                        "ratio": ratio,
+                        "seed": seed,
+                        "query_set": query_set,
+                        "planner": name,
+                        "queries": len(queries),
+                        "found": found,
+                        "total_s": sum(durations),
+                        "median_s": statistics.median(durations) if durations else 0.0,
+                        "expansions": expansions if has_counters else None,
+                        "pushes": pushes if has_counters else None,
+                        "path_cost": total_cost,
+                        "preprocess_s": preprocess.get(name, 0.0),
+                        "peak_query_mb": (
+                            _peak_query_mb(planner, grid, queries)
+                            if measure_memory
+                            else None
+                        ),
+                    }
+                    results.append(row)
+                    print(
+                        f"  {query_set:<12}{name:<15}{row['total_s']:>9.3f}s "
+                        f"found={found}/{len(queries)} cost={total_cost:.1f}"
+                    )
+    return results
+
+
+def save_results(results: list[dict], prefix: str = OUTPUT_PREFIX) -> None:
+    with open(f"{prefix}.json", "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    with open(f"{prefix}.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def _result_key(row: dict) -> tuple:
+    return row["size"], row["ratio"], row["seed"], row["query_set"], row["planner"]
+
+
+def compare_with_baseline(
+    results: list[dict],
+    baseline_path: str = BASELINE_FILENAME,
+    tolerance: float = TIME_REGRESSION_TOLERANCE,
+) -> list[dict]:
+    """
+    与基线逐行对比，返回对比行：耗时比、展开数比、路径长度差，以及是否退化。
+    路径长度变长、找到的路径数变化，或耗时超过基线 (1 + tolerance) 倍都视为退化。
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {_result_key(row): row for row in json.load(f)}
+
+    comparisons: list[dict] = []
+    for row in results:
+        base = baseline.get(_result_key(row))
+        if base is None:
+            continue
+        time_ratio = row["total_s"] / base["total_s"] if base["total_s"] > 0 else 1.0
+        expansion_ratio = None
+        if row["expansions"] is not None and base.get("expansions"):
+            expansion_ratio = row["expansions"] / base["expansions"]
+        cost_delta = row["path_cost"] - base["path_cost"]
+        regressed = (
+            time_ratio > 1 + tolerance
+            or cost_delta > 1e-6
+            or row["found"] != base["found"]
+        )
+        comparisons.append(
+            {
+                "key": _result_key(row),
+                "time_ratio": time_ratio,
+                "expansion_ratio": expansion_ratio,
+                "cost_delta": cost_delta,
+                "regressed": regressed,
+            }
+        )
+    return comparisons
+
+
+def main():
+    """
+    主函数：运行基准测试并保存结果；有基线时对比，没有时把本次结果保存为基线。
+    """
+    results = run_benchmark()
+    save_results(results)
+    print(f"\n结果已保存到 '{OUTPUT_PREFIX}.json' / '{OUTPUT_PREFIX}.csv'")
+
+    if not os.path.exists(BASELINE_FILENAME):
+        save_results(results, os.path.splitext(BASELINE_FILENAME)[0])
+        print(f"未找到基线，已将本次结果保存为 '{BASELINE_FILENAME}'")
+        return
+
+    print("\n--- 与基线对比 ---")
+    for item in compare_with_baseline(results):
+        size, ratio, _, query_set, planner = item["key"]
+        expansion_ratio = item["expansion_ratio"]
+        flag = "退化" if item["regressed"] else ""
+        print(
+            f"{size:>6} {ratio:<5}{query_set:<12}{planner:<15}"
+            f"耗时 x{item['time_ratio']:.2f}  "
+            f"展开 {'-' if expansion_ratio is None else f'x{expansion_ratio:.2f}'}  "
+            f"路径 {item['cost_delta']:+.2f}  {flag}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+按位打包的占用网格
+
+每个格子只占 1 位（1 代表障碍物），按行用 np.packbits 打包（高位在前），
+8000x8000 只需要 8 MB，50000x50000 也只需要约 300 MB。
+打包方式与 np.packbits(grid != 0, axis=1) 完全一致，因此可以直接与稠密网格互相转换、
+计算相同的内容哈希，也可以直接包装一个内存映射的打包数组。
+"""
+import numpy as np
+import numpy.typing as npt
+
+# 8个邻居方向，顺序与 astar.NEIGHBORS_MOVES 一致
+_NEIGHBOR_DR = np.array([0, 0, 1, -1, 1, -1, -1, 1])
+_NEIGHBOR_DC = np.array([1, -1, 0, 0, 1, 1, -1, -1])
+
+
+class _BitRow:
+    """
+    单行的只读视图，让 grid[r][c] 这种写法也能用在 BitGrid 上。
+    """
+
+    __slots__ = ("_row",)
+
+    def __init__(self, row: npt.NDArray[np.uint8]):
+        self._row = row
+
+    def __getitem__(self, c: int) -> int:
+        return (int(self._row[c >> 3]) >> (7 - (c & 7))) & 1
+
+
+class BitGrid:
+    """
+    bits: 形如 (rows, ceil(cols / 8)) 的 uint8 数组，每行末尾不足 8 位的部分补 0
+    """
+
+    def __init__(self, bits: npt.NDArray[np.uint8], shape: tuple[int, int]):
+        rows, cols = int(shape[0]), int(shape[1])
+        if bits.shape != (rows, (cols + 7) // 8):
+            raise ValueError(f"打包数组形状 {bits.shape} 与网格形状 {shape} 不匹配")
+        self.bits = bits
+        self.shape = (rows, cols)
+
+    @classmethod
+    def zeros(cls, shape: tuple[int, int]) -> "BitGrid":
+        rows, cols = shape
+        return cls(np.zeros((rows, (cols + 7) // 8), dtype=np.uint8), shape)
+
+    @classmethod
+    def from_dense(cls, grid: npt.NDArray) -> "BitGrid":
+        return cls(np.packbits(np.asarray(grid) != 0, axis=1), grid.shape)
+
+    @property
+    def size(self) -> int:
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def __getitem__(self, r: int) -> _BitRow:
+        return _BitRow(self.bits[r])
+
+    def is_free(self, r: int, c: int) -> bool:
+        rows, cols = self.shape
+        if not (0 <= r < rows and 0 <= c < cols):
+            return False
+        return not (int(self.bits[r, c >> 3]) >> (7 - (c & 7))) & 1
+
+    def are_free(
+        self, rows: npt.ArrayLike, cols: npt.ArrayLike
+    ) -> npt.NDArray[np.bool_]:
+        """
+        向量化判断一批格子是否可通行，界外的格子视为不可通行。
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        inside = (
+            (rows >= 0) & (rows < self.shape[0]) & (cols >= 0) & (cols < self.shape[1])
+        )
+        safe_rows = np.where(inside, rows, 0)
+        safe_cols = np.where(inside, cols, 0)
+        occupied = (self.bits[safe_rows, safe_cols >> 3] >> (7 - (safe_cols & 7))) & 1
+        return inside & (occupied == 0)
+
+    def neighbors_free(self, r: int, c: int) -> npt.NDArray[np.bool_]:
+        """
+        返回 8 个邻居是否可通行，顺序与 astar.NEIGHBORS_MOVES 一致。
+        """
+        return self.are_free(r + _NEIGHBOR_DR, c + _NEIGHBOR_DC)
+
+    def to_dense(
+        self, r0: int = 0, r1: int | None = None, c0: int = 0, c1: int | None = None
+    ) -> npt.NDArray[np.uint8]:
+        """
+        把 [r0:r1, c0:c1] 区域解包成 uint8 数组（0 可通行，1 障碍物）。
+        """
+        r1 = self.shape[0] if r1 is None else r1
+        c1 = self.shape[1] if c1 is None else c1
+        byte0 = c0 >> 3
+        unpacked = np.unpackbits(self.bits[r0:r1, byte0 : (c1 + 7) >> 3], axis=1)
+        offset = c0 - byte0 * 8
+        return unpacked[:, offset : offset + (c1 - c0)]
+
+    def stamp(self, r0: int, c0: int, mask: npt.NDArray[np.bool_]) -> int:
+        """
+        把布尔掩码按位或到以 (r0, c0) 为左上角的区域，返回新增的障碍物格子数。
+        调用方需要保证掩码不越界。
+        """
+        h, w = mask.shape
+        byte0 = c0 >> 3
+        byte1 = (c0 + w + 7) >> 3
+        offset = c0 - byte0 * 8
+        region = np.zeros((h, (byte1 - byte0) * 8), dtype=bool)
+        region[:, offset : offset + w] = mask
+        packed = np.packbits(region, axis=1)
+
+        target = self.bits[r0 : r0 + h, byte0:byte1]
+        new_points = int(np.bitwise_count(packed & ~target).sum())
+        target |= packed
+        return new_points
+
+    def count_obstacles(self) -> int:
+        return int(np.bitwise_count(self.bits).sum(dtype=np.int64))
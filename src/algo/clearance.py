@@ -0,0 +1,48 @@
+"""
+基于距离变换的安全间距
+
+对可通行区域做一次欧氏距离变换，得到每个格子到最近障碍物格子（中心到中心）的距离，
+按网格内容哈希缓存。寻路时 min_clearance 只需与该值比较，O(1) 剔除离障碍物太近的格子，
+不必为每种车辆尺寸单独膨胀一遍障碍物网格。
+"""
+from collections import OrderedDict
+
+import numpy as np
+import numpy.typing as npt
+from scipy.ndimage import distance_transform_edt
+
+from .astar import OccupancyGrid, grid_digest
+
+# 内存中最多缓存的网格数量
+_CACHE_SIZE = 4
+_clearance_cache: "OrderedDict[str, npt.NDArray[np.float32]]" = OrderedDict()
+
+
+def build_clearance_map(grid: OccupancyGrid) -> npt.NDArray[np.float32]:
+    """
+    返回与网格同形状的 float32 数组：可通行格子为到最近障碍物格子的欧氏距离，障碍物为 0。
+    网格中没有障碍物时所有格子都是 inf。
+    """
+    dense = grid.to_dense() if hasattr(grid, "to_dense") else np.asarray(grid)
+    free = dense == 0
+    if free.all():
+        return np.full(free.shape, np.inf, dtype=np.float32)
+    return distance_transform_edt(free).astype(np.float32)
+
+
+def get_clearance_map(
+    grid: OccupancyGrid, digest: str | None = None
+) -> npt.NDArray[np.float32]:
+    """
+    按网格内容哈希缓存距离变换，同一张网格只计算一次。
+    """
+    digest = digest if digest is not None else grid_digest(grid)
+    clearance = _clearance_cache.get(digest)
+    if clearance is None:
+        clearance = build_clearance_map(grid)
+        _clearance_cache[digest] = clearance
+        if len(_clearance_cache) > _CACHE_SIZE:
+            _clearance_cache.popitem(last=False)
+    else:
+        _clearance_cache.move_to_end(digest)
+    return clearance
@@ -0,0 +1,92 @@
+"""
+可通行区域的八连通分量索引
+
+对 grid == 0 的格子做一次八连通标记（与 A* 的移动规则一致），
+之后判断两点是否可达只需要比较两个标签，O(1) 完成。
+"""
+from collections import OrderedDict
+
+import numpy as np
+import numpy.typing as npt
+from scipy.ndimage import label
+
+from .astar import Coord, Grid, grid_digest
+
+# 八连通结构
+EIGHT_CONNECTIVITY_STRUCTURE = np.ones((3, 3), dtype=bool)
+# 内存中最多缓存的网格数量
+_CACHE_SIZE = 4
+_index_cache: "OrderedDict[str, ComponentIndex]" = OrderedDict()
+
+
+class ComponentIndex:
+    """
+    labels 与网格同形状，障碍物为 0，可通行格子为所属连通分量的编号（从 1 开始）。
+    """
+
+    def __init__(self, labels: npt.NDArray[np.int32], count: int, digest: str):
+        self.labels = labels
+        self.count = count
+        self.digest = digest
+
+    def component_of(self, cell: Coord) -> int:
+        r, c = cell
+        rows, cols = self.labels.shape
+        if not (0 <= r < rows and 0 <= c < cols):
+            return 0
+        return int(self.labels[r, c])
+
+    def is_reachable(self, start: Coord, end: Coord) -> bool:
+        """起点或终点落在障碍物或界外时视为不可达"""
+        start_label = self.component_of(start)
+        return start_label != 0 and start_label == self.component_of(end)
+
+    def reachable_many(
+        self, starts: npt.ArrayLike, ends: npt.ArrayLike
+    ) -> npt.NDArray[np.bool_]:
+        """
+        批量可达性判断，starts / ends 是形如 (K, 2) 的坐标数组。
+        """
+        starts = np.asarray(starts, dtype=np.int64).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=np.int64).reshape(-1, 2)
+        start_labels = self._labels_at(starts)
+        return (start_labels != 0) & (start_labels == self._labels_at(ends))
+
+    def _labels_at(self, cells: npt.NDArray[np.int64]) -> npt.NDArray[np.int32]:
+        rows, cols = self.labels.shape
+        inside = (
+            (cells[:, 0] >= 0)
+            & (cells[:, 0] < rows)
+            & (cells[:, 1] >= 0)
+            & (cells[:, 1] < cols)
+        )
+        result = np.zeros(len(cells), dtype=self.labels.dtype)
+        result[inside] = self.labels[cells[inside, 0], cells[inside, 1]]
+        return result
+
+
+def build_component_index(grid: Grid, digest: str | None = None) -> ComponentIndex:
+    labels, count = label(grid == 0, structure=EIGHT_CONNECTIVITY_STRUCTURE)
+    return ComponentIndex(
+        labels, int(count), digest if digest is not None else grid_digest(grid)
+    )
+
+
+def get_component_index(grid: Grid, digest: str | None = None) -> ComponentIndex:
+    """
+    按网格内容哈希缓存连通分量索引，同一张网格只标记一次。
+
+    digest: 可选的网格哈希。不传时每次都要对整张网格算一次 grid_digest，
+        和标记本身一样是 O(网格) 的；调用方应在网格不变期间算一次传进来，
+        或者直接持有返回的 ComponentIndex 反复调用 is_reachable。网格变化后必须重新计算
+    """
+    digest = digest if digest is not None else grid_digest(grid)
+    index = _index_cache.get(digest)
+    if index is None:
+        index = build_component_index(grid, digest)
+        _index_cache[digest] = index
+        if len(_index_cache) > _CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    else:
+        _index_cache.move_to_end(digest)
+    return index
@@ -0,0 +1,273 @@
+"""
+增量重规划 (D* Lite)
+
+规划器在多次查询之间保留搜索状态（g / rhs 数组和优先队列）。
+网格上有少量格子变化（例如增删几个圆形障碍物）时，只重新展开受影响的区域来修复路径，
+不必每次都从头跑一遍 A*。移动规则与 get_path_astar_2d 相同。
+"""
+import heapq
+import time
+from typing import Iterable
+
+import numpy as np
+
+from .astar import (
+    MOVE_COST_DIAGONAL,
+    MOVE_COST_STRAIGHT,
+    NEIGHBORS_MOVES,
+    Coord,
+    OccupancyGrid,
+    Path,
+    _padded_free_map,
+    get_path_astar_2d_array,
+)
+
+# 代价用整数定点数表示（乘以 COST_SCALE 后取整）。键的比较、rhs == g + c 的判断
+# 依赖精确相等，浮点数累加顺序不同会差一个 ulp，导致循环提前结束、返回空路径
+COST_SCALE = 1_000_000
+# 足够大又不会在 int64 数组里溢出的“无穷大”
+INF = 2**62
+
+
+class DStarLitePlanner:
+    """
+    用法：
+        planner = DStarLitePlanner(grid, start, goal)
+        path = planner.plan()
+        # 调用方原地修改 grid 之后，把变化的格子告诉规划器
+        path = planner.update_cells(changed_cells)
+
+    metrics 中记录首次搜索和每次修复展开的节点数，便于与从头搜索对比。
+    """
+
+    def __init__(self, grid: OccupancyGrid, start: Coord, goal: Coord):
+        self.grid = grid
+        free_array, self.width = _padded_free_map(grid)
+        # 规划器自己持有一份可通行表，格子变化时按 grid 的最新值刷新
+        self._free = bytearray(free_array.tobytes())
+        size = len(self._free)
+        # g / rhs 是定点整数，memoryview 取出的是 Python int，比较都是精确的
+        self._g_array = np.full(size, INF, dtype=np.int64)
+        self._rhs_array = np.full(size, INF, dtype=np.int64)
+        self._g = memoryview(self._g_array)
+        self._rhs = memoryview(self._rhs_array)
+        self._straight = round(MOVE_COST_STRAIGHT * COST_SCALE)
+        self._diagonal = round(MOVE_COST_DIAGONAL * COST_SCALE)
+        self._moves = [
+            (dr * self.width + dc, round(cost * COST_SCALE))
+            for (dr, dc), cost in NEIGHBORS_MOVES
+        ]
+        # 欠一致展开时需要同时处理节点自身
+        self._moves_and_self = self._moves + [(0, 0)]
+
+        self.start = self._index(start)
+        self.goal = self._index(goal)
+        self._last_start = self.start
+        self._k_m = 0
+
+        # 优先队列：堆中可能有过时条目，以 _queued 中记录的键为准
+        self._heap: list[tuple[int, int, int]] = []
+        self._queued: dict[int, tuple[int, int]] = {}
+
+        self._rhs[self.goal] = 0
+        self._push(self.goal, self._calculate_key(self.goal))
+
+        self._expansions = 0
+        self.metrics: dict = {
+            "initial_expansions": None,
+            "last_expansions": 0,
+            "total_expansions": 0,
+            "replans": 0,
+            "fresh_expansions": None,
+        }
+
+    def _index(self, cell: Coord) -> int:
+        return (int(cell[0]) + 1) * self.width + int(cell[1]) + 1
+
+    def _coord(self, node: int) -> Coord:
+        r, c = divmod(node, self.width)
+        return r - 1, c - 1
+
+    # 八角距离，与边代价使用同样的定点整数，因此仍然是一致的启发函数
+    def _heuristic(self, a: int, b: int) -> int:
+        ar, ac = divmod(a, self.width)
+        br, bc = divmod(b, self.width)
+        dx, dy = abs(ar - br), abs(ac - bc)
+        return self._straight * max(dx, dy) + (self._diagonal - self._straight) * min(
+            dx, dy
+        )
+
+    def _calculate_key(self, node: int) -> tuple[int, int]:
+        best = min(self._g[node], self._rhs[node])
+        return best + self._heuristic(self.start, node) + self._k_m, best
+
+    def _push(self, node: int, key: tuple[int, int]) -> None:
+        self._queued[node] = key
+        heapq.heappush(self._heap, (key[0], key[1], node))
+
+    def _top(self) -> tuple[tuple[int, int], int] | None:
+        heap = self._heap
+        while heap:
+            k1, k2, node = heap[0]
+            if self._queued.get(node) == (k1, k2):
+                return (k1, k2), node
+            heapq.heappop(heap)
+        return None
+
+    def _update_vertex(self, node: int) -> None:
+        if self._g[node] != self._rhs[node]:
+            self._push(node, self._calculate_key(node))
+        else:
+            self._queued.pop(node, None)
+
+    # 从后继中取 c(u, s') + g(s') 的最小值
+    def _best_successor_rhs(self, node: int) -> int:
+        if not self._free[node]:
+            return INF
+        free, g = self._free, self._g
+        best = INF
+        for offset, move_cost in self._moves:
+            neighbor = node + offset
+            if free[neighbor]:
+                value = g[neighbor] + move_cost
+                if value < best:
+                    best = value
+        return best
+
+    def _compute_shortest_path(self) -> int:
+        free, g, rhs = self._free, self._g, self._rhs
+        moves, goal = self._moves, self.goal
+        expansions = 0
+        while True:
+            top = self._top()
+            if top is None:
+                break
+            k_old, node = top
+            start_key = self._calculate_key(self.start)
+            if not (k_old < start_key or rhs[self.start] > g[self.start]):
+                break
+
+            k_new = self._calculate_key(node)
+            expansions += 1
+            if k_old < k_new:
+                self._push(node, k_new)
+            elif g[node] > rhs[node]:
+                # 局部过一致：确定 g 值，并松弛前驱
+                g[node] = rhs[node]
+                self._queued.pop(node, None)
+                node_g = g[node]
+                for offset, move_cost in moves:
+                    pred = node + offset
+                    if pred != goal and free[pred] and free[node]:
+                        value = node_g + move_cost
+                        if value < rhs[pred]:
+                            rhs[pred] = value
+                            self._update_vertex(pred)
+            else:
+                # 局部欠一致：g 置为无穷大，重新计算依赖它的前驱
+                g_old = g[node]
+                g[node] = INF
+                for offset, move_cost in self._moves_and_self:
+                    pred = node + offset
+                    if pred == goal:
+                        continue
+                    if offset == 0 or (free[pred] and rhs[pred] == g_old + move_cost):
+                        rhs[pred] = self._best_successor_rhs(pred)
+                    self._update_vertex(pred)
+
+        self._expansions += expansions
+        return expansions
+
+    def _extract_path(self) -> Path:
+        if self._g[self.start] == INF and self._rhs[self.start] == INF:
+            return np.array([])
+        path: list[Coord] = [self._coord(self.start)]
+        node = self.start
+        visited = {node}
+        free, g = self._free, self._g
+        # 沿 c + g 最小的后继走到终点。g 值一致时每一步都严格下降，
+        # 走进死路或回到走过的格子说明搜索状态已经损坏，直接报错而不是返回空路径
+        while node != self.goal:
+            best, best_node = INF, -1
+            for offset, move_cost in self._moves:
+                neighbor = node + offset
+                if free[neighbor]:
+                    value = g[neighbor] + move_cost
+                    if value < best:
+                        best, best_node = value, neighbor
+            if best_node == -1:
+                raise RuntimeError(
+                    f"D* Lite 状态不一致：{self._coord(node)} 没有 g 值有限的后继"
+                )
+            if best_node in visited:
+                raise RuntimeError(
+                    f"D* Lite 状态不一致：路径在 {self._coord(best_node)} 处成环"
+                )
+            node = best_node
+            visited.add(node)
+            path.append(self._coord(node))
+        return np.array(path)
+
+    def plan(self) -> Path:
+        """
+        计算（或在已有状态上继续计算）最短路径，返回与 get_path_astar_2d 相同格式的路径。
+        """
+        begin = time.perf_counter()
+        expansions = self._compute_shortest_path()
+        if self.metrics["initial_expansions"] is None:
+            self.metrics["initial_expansions"] = expansions
+        self.metrics.update(
+            last_expansions=expansions,
+            total_expansions=self._expansions,
+            last_elapsed_s=time.perf_counter() - begin,
+        )
+        return self._extract_path()
+
+    def move_start(self, new_start: Coord) -> None:
+        """
+        智能体沿路径前进后更新起点，之后的重规划复用现有状态。
+        """
+        new_index = self._index(new_start)
+        self._k_m += self._heuristic(self._last_start, new_index)
+        self._last_start = new_index
+        self.start = new_index
+
+    def update_cells(
+        self, changed_cells: Iterable[Coord], compare_fresh: bool = False
+    ) -> Path:
+        """
+        调用方已经原地修改了 self.grid，把变化的格子列表传进来修复当前路径。
+
+        compare_fresh 为 True 时，额外在新网格上从头跑一次 get_path_astar_2d_array，
+        把它的展开数记录到 metrics["fresh_expansions"] 以便对比。
+        """
+        rows, cols = self.grid.shape
+        affected: set[int] = set()
+        for r, c in changed_cells:
+            r, c = int(r), int(c)
+            if not (0 <= r < rows and 0 <= c < cols):
+                continue
+            node = self._index((r, c))
+            is_free = 1 if self.grid[r][c] == 0 else 0
+            if self._free[node] == is_free:
+                continue
+            self._free[node] = is_free
+            # 该格子相关的所有边都变了：它自己和它的所有邻居都需要重新计算 rhs
+            affected.add(node)
+            affected.update(node + offset for offset, _ in self._moves)
+
+        for node in affected:
+            if node != self.goal:
+                self._rhs[node] = self._best_successor_rhs(node)
+            self._update_vertex(node)
+
+        self.metrics["replans"] += 1
+        path = self.plan()
+
+        if compare_fresh:
+            fresh_stats: dict = {}
+            get_path_astar_2d_array(
+                self.grid, self._coord(self.start), self._coord(self.goal), fresh_stats
+            )
+            self.metrics["fresh_expansions"] = fresh_stats["expansions"]
+        return path
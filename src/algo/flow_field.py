@@ -0,0 +1,164 @@
+"""
+单目标流场
+
+大量智能体前往同一个终点时，不必为每个智能体各跑一次 get_path_astar_2d：
+从终点出发对整张网格做一次 Dijkstra，得到距离场，再由距离场得到每个格子下一步的方向场，
+任何智能体的路径都只需沿方向场走，耗时与路径长度成正比。
+
+Dijkstra 按宽度为 1 的桶推进：所有边的代价都不小于 1（直行 1，斜行 √2），
+同一个桶里的格子之间无法互相松弛，距离在 [k, k + 1) 内的格子可以一次性全部确定，
+每一轮用 numpy 向量化地松弛整个前沿，不需要逐格的 Python 循环。
+"""
+import time
+
+import numpy as np
+import numpy.typing as npt
+
+from .astar import (
+    MOVE_COST_STRAIGHT,
+    NEIGHBORS_MOVES,
+    Coord,
+    OccupancyGrid,
+    Path,
+    _padded_free_map,
+)
+
+# 方向场中表示“没有下一步”（终点、障碍物或不可达）的编码
+NO_DIRECTION = -1
+
+
+class FlowField:
+    """
+    distances: 与网格同形状的 float32 距离场，障碍物和不可达的格子为 inf
+    directions: 与网格同形状的 int8 方向场，值是 NEIGHBORS_MOVES 的下标
+    """
+
+    def __init__(
+        self,
+        goal: Coord,
+        distances: npt.NDArray[np.float32],
+        directions: npt.NDArray[np.int8],
+    ):
+        self.goal = (int(goal[0]), int(goal[1]))
+        self.distances = distances
+        self.directions = directions
+        self.shape = distances.shape
+
+    def distance_to_goal(self, cell: Coord) -> float:
+        r, c = int(cell[0]), int(cell[1])
+        rows, cols = self.shape
+        if not (0 <= r < rows and 0 <= c < cols):
+            return float("inf")
+        return float(self.distances[r, c])
+
+    def path_from(self, start: Coord) -> Path:
+        """
+        沿方向场从 start 走到终点，返回与 get_path_astar_2d 相同格式的路径，不可达时为空数组。
+        """
+        r, c = int(start[0]), int(start[1])
+        if not np.isfinite(self.distance_to_goal((r, c))):
+            return np.array([])
+        moves = [move for move, _ in NEIGHBORS_MOVES]
+        directions = self.directions
+        path: list[Coord] = [(r, c)]
+        while (r, c) != self.goal:
+            dr, dc = moves[directions[r, c]]
+            r += dr
+            c += dc
+            path.append((r, c))
+        return np.array(path)
+
+    def paths_from(self, starts) -> list[Path]:
+        return [self.path_from(start) for start in starts]
+
+
+# 在加边网格的扁平下标上做分桶 Dijkstra，返回 float64 距离数组和行宽
+def _padded_distance_field(
+    grid: OccupancyGrid, source: Coord, stats: dict | None = None
+) -> tuple[npt.NDArray[np.float64], int]:
+    begin = time.perf_counter()
+    free_array, width = _padded_free_map(grid)
+    free = free_array.view(bool)
+    distance = np.full(free_array.size, np.inf, dtype=np.float64)
+    settled = np.zeros(free_array.size, dtype=bool)
+    queued = np.zeros(free_array.size, dtype=bool)
+    moves = [(dr * width + dc, cost) for (dr, dc), cost in NEIGHBORS_MOVES]
+
+    source_idx = (int(source[0]) + 1) * width + int(source[1]) + 1
+    rounds = 0
+    if free[source_idx]:
+        distance[source_idx] = 0.0
+        queued[source_idx] = True
+        pending = np.array([source_idx], dtype=np.int64)
+        while pending.size:
+            pending_distance = distance[pending]
+            # 当前桶：距离不超过最小值 + 1 的格子（不含上界）都已经是最终值
+            bucket_end = pending_distance.min() + MOVE_COST_STRAIGHT
+            in_bucket = pending_distance < bucket_end
+            frontier = pending[in_bucket]
+            pending = pending[~in_bucket]
+            settled[frontier] = True
+            frontier_distance = distance[frontier]
+            rounds += 1
+
+            for offset, move_cost in moves:
+                neighbors = frontier + offset
+                usable = free[neighbors] & ~settled[neighbors]
+                neighbors = neighbors[usable]
+                np.minimum.at(
+                    distance, neighbors, frontier_distance[usable] + move_cost
+                )
+                fresh = np.unique(neighbors[~queued[neighbors]])
+                queued[fresh] = True
+                pending = np.concatenate((pending, fresh))
+
+    if stats is not None:
+        stats.update(
+            rounds=rounds,
+            reached=int(settled.sum()),
+            elapsed_s=time.perf_counter() - begin,
+        )
+    return distance, width
+
+
+def distance_field(
+    grid: OccupancyGrid, source: Coord, stats: dict | None = None
+) -> npt.NDArray[np.float32]:
+    """
+    从 source 出发到所有格子的最短距离（移动规则与 get_path_astar_2d 相同），
+    返回与网格同形状的 float32 数组，障碍物和不可达的格子为 inf。
+    """
+    distance, width = _padded_distance_field(grid, source, stats)
+    rows = grid.shape[0]
+    return (
+        distance.reshape(rows + 2, width)[1:-1, 1:-1].astype(np.float32).copy(order="C")
+    )
+
+
+def build_flow_field(
+    grid: OccupancyGrid, goal: Coord, stats: dict | None = None
+) -> FlowField:
+    """
+    计算以 goal 为终点的距离场和方向场。
+    每个格子的方向指向使 (邻居距离 + 移动代价) 最小的邻居，沿方向场走出的路径就是最短路径。
+    """
+    distance, width = _padded_distance_field(grid, goal, stats)
+    rows, cols = grid.shape
+    padded_rows = rows + 2
+
+    # 用 float64 距离逐个方向比较，避免 float32 舍入导致方向指向更远的格子
+    best = np.full((rows, cols), np.inf, dtype=np.float64)
+    directions = np.full((rows, cols), NO_DIRECTION, dtype=np.int8)
+    field = distance.reshape(padded_rows, width)
+    for code, ((dr, dc), move_cost) in enumerate(NEIGHBORS_MOVES):
+        candidate = field[1 + dr : padded_rows - 1 + dr, 1 + dc : width - 1 + dc]
+        candidate = candidate + move_cost
+        better = candidate < best
+        best[better] = candidate[better]
+        directions[better] = code
+
+    interior = field[1:-1, 1:-1]
+    # 终点、障碍物和不可达的格子没有下一步
+    directions[~np.isfinite(interior)] = NO_DIRECTION
+    directions[int(goal[0]), int(goal[1])] = NO_DIRECTION
+    return FlowField(goal, interior.astype(np.float32), directions)
@@ -1,11 +1,27 @@
 """
 生成二进制格子
 """
+import math
 import numpy as np
+import numpy.typing as npt
 import random
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from tqdm import tqdm
 
+try:
+    from .bitgrid import BitGrid
+    from .grid_store import save_grid_store, write_grid_store_meta
+except ImportError:
+    # 直接以脚本运行（cd src/algo && python generate_grid.py）时没有包上下文，
+    # 把 src 加入模块搜索路径后按 algo 包导入
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from algo.bitgrid import BitGrid
+    from algo.grid_store import save_grid_store, write_grid_store_meta
+
 # --- 参数设置 ---
 GRID_SIZE = 8000
 TARGET_OBSTACLE_RATIO = 0.30
@@ -13,54 +29,359 @@ TARGET_OBSTACLE_RATIO = 0.30
 MIN_RADIUS = 30
 MAX_RADIUS = 250
 OUTPUT_FILENAME = "obstacle_grid_8000x8000.npz"
+# 不压缩、可内存映射的网格存储，寻路进程优先加载它
+GRID_STORE_FILENAME = "obstacle_grid_8000x8000.npy"
+
+# --- 并行分块生成 ---
+GEN_TILE_SIZE = 2048
+# 每一轮按剩余障碍物点数的这个比例投放圆形，为随机波动留出余量，避免一次越过目标
+GEN_FILL_FRACTION = 0.75
+
+# 工作进程内打开的输出文件（可读写的内存映射）
+_worker_output: np.memmap | None = None
+
+
+@lru_cache(maxsize=None)
+def _disk_stamp(radius: int) -> npt.NDArray[np.bool_]:
+    """
+    半径为 radius 的圆形掩码，形如 (2r+1, 2r+1)，同一半径只计算一次。
+    """
+    yy, xx = np.mgrid[-radius : radius + 1, -radius : radius + 1]
+    return yy**2 + xx**2 <= radius**2
+
+
+@lru_cache(maxsize=None)
+def _disk_offsets(radius: int) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """
+    圆形内各格子相对圆心的 (行偏移, 列偏移)，批量盖章时使用。
+    """
+    dy, dx = np.nonzero(_disk_stamp(radius))
+    return dy - radius, dx - radius
+
+
+def _clip_disk(
+    shape: tuple[int, int], center_y: int, center_x: int, radius: int
+) -> tuple[int, int, npt.NDArray[np.bool_]]:
+    """
+    圆形与形状为 shape 的网格相交的部分：返回边界框左上角 (行, 列) 和裁剪后的掩码。
+    圆心可以在网格之外（分块生成时来自相邻的块）。
+    """
+    y_start = max(0, center_y - radius)
+    y_end = max(y_start, min(shape[0], center_y + radius + 1))
+    x_start = max(0, center_x - radius)
+    x_end = max(x_start, min(shape[1], center_x + radius + 1))
+    mask = _disk_stamp(radius)[
+        y_start - center_y + radius : y_end - center_y + radius,
+        x_start - center_x + radius : x_end - center_x + radius,
+    ]
+    return y_start, x_start, mask
+
+
+def _stamp_disk(
+    grid: npt.NDArray[np.uint8], center_y: int, center_x: int, radius: int
+) -> int:
+    """
+    在稠密网格上盖一个圆形，只在边界框内统计新增的障碍物点数。
+    """
+    y_start, x_start, mask = _clip_disk(grid.shape, center_y, center_x, radius)
+    if mask.size == 0:
+        return 0
+    region = grid[y_start : y_start + mask.shape[0], x_start : x_start + mask.shape[1]]
+    new_points = int(np.count_nonzero(mask & (region == 0)))
+    region[mask] = 1
+    return new_points
+
 
+def _stamp_disks(
+    grid: npt.NDArray[np.uint8], circles: list[tuple[int, int, int]]
+) -> int:
+    """
+    一次性在稠密网格上盖多个圆形：同一半径的圆形用广播一次算出所有格子的一维下标，
+    统一写入，返回新增的障碍物点数（同一批内互相重叠的格子只计一次）。
+    """
+    size = grid.shape[0]
+    flat = grid.reshape(-1)
+    circles = np.asarray(circles, dtype=np.int64)
+    indices = []
+    for radius in np.unique(circles[:, 2]):
+        same = circles[circles[:, 2] == radius]
+        dy, dx = _disk_offsets(int(radius))
+        rows = same[:, 0:1] + dy
+        cols = same[:, 1:2] + dx
+        inside = (rows >= 0) & (rows < size) & (cols >= 0) & (cols < size)
+        indices.append(rows[inside] * size + cols[inside])
+    indices = np.concatenate(indices)
+    new_indices = np.unique(indices[flat[indices] == 0])
+    flat[new_indices] = 1
+    return len(new_indices)
 
-def create_grid_with_circular_obstacles():
+
+def create_grid_with_circular_obstacles(
+    packed: bool = False,
+    size: int = GRID_SIZE,
+    ratio: float = TARGET_OBSTACLE_RATIO,
+    seed: int | None = None,
+    min_radius: int = MIN_RADIUS,
+    max_radius: int = MAX_RADIUS,
+    progress: bool = True,
+    batch_size: int = 1,
+):
     """
     生成一个带有圆形障碍物的大型二进制网格。
 
+    Args:
+        packed (bool): 为 True 时直接在按位打包的 BitGrid 上生成，每格只占 1 位。
+        size (int): 网格边长。
+        ratio (float): 目标障碍物比例。
+        seed (int | None): 随机种子，相同参数和种子生成完全相同的网格；None 时使用全局 random。
+        min_radius / max_radius (int): 圆形障碍物的半径范围。
+        progress (bool): 是否显示进度条。
+        batch_size (int): 每批最多同时盖章的圆形数，结果与批大小无关。
+            逐个盖章只处理边界框，半径较大时最快；半径只有几个格子、圆形数以万计时，
+            设为 256 左右可以减少逐个处理的开销。
+
     Returns:
-        np.ndarray: 生成的二进制网格。
+        np.ndarray | BitGrid: 生成的二进制网格。
     """
-    print(f"开始创建 {GRID_SIZE}x{GRID_SIZE} 的网格...")
+    rng = random.Random(seed) if seed is not None else random
+    if progress:
+        print(f"开始创建 {size}x{size} 的网格...")
     # 使用 uint8 类型以节省内存，0 代表可通行，1 代表障碍物
-    grid = np.zeros((GRID_SIZE, GRID_SIZE), dtype=np.uint8)
+    if packed:
+        grid = BitGrid.zeros((size, size))
+    else:
+        grid = np.zeros((size, size), dtype=np.uint8)
 
-    total_points = GRID_SIZE * GRID_SIZE
-    target_obstacle_points = int(total_points * TARGET_OBSTACLE_RATIO)
+    total_points = size * size
+    target_obstacle_points = int(total_points * ratio)
     current_obstacle_points = 0
 
+    # 单个圆形最多新增的障碍物点数
+    max_disk_points = int(_disk_stamp(max_radius).sum())
+
     # 使用 tqdm 创建一个进度条
-    with tqdm(total=target_obstacle_points, desc="正在生成障碍物") as pbar:
+    with tqdm(
+        total=target_obstacle_points, desc="正在生成障碍物", disable=not progress
+    ) as pbar:
         while current_obstacle_points < target_obstacle_points:
-            # 1. 随机选择圆心和半径
-            center_x = random.randint(0, GRID_SIZE - 1)
-            center_y = random.randint(0, GRID_SIZE - 1)
-            radius = random.randint(MIN_RADIUS, MAX_RADIUS)
+            # 1. 本批的圆形数：即使每个圆形都完全落在空白处也不会越过目标，
+            #    因此结果与逐个盖章、每次检查是否达到目标完全一致
+            remaining = target_obstacle_points - current_obstacle_points
+            count = max(1, min(batch_size, remaining // max_disk_points))
 
-            # 2. 计算圆形的边界框（优化计算）
-            x_start = max(0, center_x - radius)
-            x_end = min(GRID_SIZE, center_x + radius + 1)
-            y_start = max(0, center_y - radius)
-            y_end = min(GRID_SIZE, center_y + radius + 1)
+            # 2. 随机选择圆心和半径（与逐个生成时的随机数顺序相同）
+            circles = []
+            for _ in range(count):
+                center_x = rng.randint(0, size - 1)
+                center_y = rng.randint(0, size - 1)
+                radius = rng.randint(min_radius, max_radius)
+                circles.append((center_y, center_x, radius))
 
-            # 3. 在边界框内生成坐标网格
-            sub_yy, sub_xx = np.mgrid[y_start:y_end, x_start:x_end]
+            # 3. 将圆形区域设置为障碍物 (1)，只统计新增的障碍物点数
+            if packed:
+                # BitGrid 直接返回新增的障碍物点数
+                new_points = 0
+                for center_y, center_x, radius in circles:
+                    y_start, x_start, mask = _clip_disk(
+                        (size, size), center_y, center_x, radius
+                    )
+                    new_points += grid.stamp(y_start, x_start, mask)
+            elif count == 1:
+                new_points = _stamp_disk(grid, *circles[0])
+            else:
+                new_points = _stamp_disks(grid, circles)
 
-            # 4. 计算到圆心的距离并创建掩码
-            dist_sq = (sub_yy - center_y) ** 2 + (sub_xx - center_x) ** 2
-            mask = dist_sq <= radius**2
+            # 4. 更新当前障碍物点数和进度条
+            pbar.update(new_points)
+            current_obstacle_points += new_points
 
-            # 5. 将圆形区域设置为障碍物 (1)
-            grid[y_start:y_end, x_start:x_end][mask] = 1
+    return grid
 
-            # 6. 更新当前障碍物点数和进度条
-            new_obstacle_points = np.sum(grid)
-            # 更新进度条的增量
-            pbar.update(new_obstacle_points - current_obstacle_points)
-            current_obstacle_points = new_obstacle_points
 
-    return grid
+def _attach_output(path: str) -> None:
+    global _worker_output
+    _worker_output = np.load(path, mmap_mode="r+")
+
+
+def _tile_bounds(
+    tile_row: int, tile_col: int, tile_size: int, size: int
+) -> tuple[int, int, int, int]:
+    r0, c0 = tile_row * tile_size, tile_col * tile_size
+    return r0, min(size, r0 + tile_size), c0, min(size, c0 + tile_size)
+
+
+def _tile_circles(
+    seed: int,
+    round_index: int,
+    tile_row: int,
+    tile_col: int,
+    tile_size: int,
+    size: int,
+    density: float,
+    min_radius: int,
+    max_radius: int,
+) -> npt.NDArray[np.int64]:
+    """
+    圆心落在该块内的圆形，形如 (K, 3)，每行是 (圆心行, 圆心列, 半径)。
+    随机数只由 (种子, 轮次, 块坐标) 决定，与进程数和执行顺序无关。
+    """
+    rng = np.random.default_rng([seed, round_index, tile_row, tile_col])
+    r0, r1, c0, c1 = _tile_bounds(tile_row, tile_col, tile_size, size)
+    count = rng.poisson(density * (r1 - r0) * (c1 - c0))
+    return np.stack(
+        (
+            rng.integers(r0, r1, count),
+            rng.integers(c0, c1, count),
+            rng.integers(min_radius, max_radius, count, endpoint=True),
+        ),
+        axis=1,
+    )
+
+
+def _stamp_tile(
+    tile_row: int, tile_col: int, tile_size: int, circles: npt.NDArray[np.int64]
+) -> int:
+    """
+    在工作进程中把与该块相交的圆形直接盖到输出文件上，返回块内新增的障碍物点数。
+    """
+    size = _worker_output.shape[0]
+    r0, r1, c0, c1 = _tile_bounds(tile_row, tile_col, tile_size, size)
+    tile = _worker_output[r0:r1, c0:c1]
+    new_points = 0
+    for center_y, center_x, radius in circles.tolist():
+        new_points += _stamp_disk(tile, center_y - r0, center_x - c0, radius)
+    return new_points
+
+
+def _assign_to_tiles(
+    circles: npt.NDArray[np.int64], tile_size: int, size: int
+) -> dict[tuple[int, int], npt.NDArray[np.int64]]:
+    """
+    按圆形的边界框把圆形分配到所有与之相交的块，跨越块边界的圆形会出现在多个块中。
+    每个块内的圆形保持生成顺序。
+    """
+    centers_y, centers_x, radii = circles[:, 0], circles[:, 1], circles[:, 2]
+    tr0 = np.maximum(0, centers_y - radii) // tile_size
+    tr1 = np.minimum(size - 1, centers_y + radii) // tile_size
+    tc0 = np.maximum(0, centers_x - radii) // tile_size
+    tc1 = np.minimum(size - 1, centers_x + radii) // tile_size
+
+    # 一个圆形最多覆盖的块数很少，按行、列偏移展开成 (块编号, 圆形序号) 对
+    stride = -(-size // tile_size)
+    keys, owners = [], []
+    for dr in range(int((tr1 - tr0).max(initial=0)) + 1):
+        for dc in range(int((tc1 - tc0).max(initial=0)) + 1):
+            hit = np.flatnonzero((tr0 + dr <= tr1) & (tc0 + dc <= tc1))
+            keys.append((tr0[hit] + dr) * stride + tc0[hit] + dc)
+            owners.append(hit)
+    keys, owners = np.concatenate(keys), np.concatenate(owners)
+    order = np.lexsort((owners, keys))
+    keys, owners = keys[order], owners[order]
+    splits = np.flatnonzero(np.diff(keys)) + 1
+    return {
+        divmod(int(tile_keys[0]), stride): circles[tile_owners]
+        for tile_keys, tile_owners in zip(
+            np.split(keys, splits), np.split(owners, splits)
+        )
+    }
+
+
+def generate_grid_store_parallel(
+    path: str,
+    size: int = GRID_SIZE,
+    ratio: float = TARGET_OBSTACLE_RATIO,
+    seed: int = 0,
+    min_radius: int = MIN_RADIUS,
+    max_radius: int = MAX_RADIUS,
+    tile_size: int = GEN_TILE_SIZE,
+    workers: int | None = None,
+    progress: bool = True,
+) -> dict:
+    """
+    分块并行生成圆形障碍物网格，直接写入网格存储（grid_store 的 "uint8" 格式），返回元数据。
+
+    网格不需要放进内存：输出文件以内存映射方式打开，各工作进程直接写自己负责的块。
+    生成按轮进行，每一轮在每个块内以泊松分布投放圆心（每个块有自己的种子），
+    圆形按边界框分配给所有相交的块，由负责该块的进程盖章，块之间互不重叠。
+    每轮的投放密度由剩余的障碍物点数决定，直到达到目标比例，最后一轮最多多出约一个圆形。
+    对给定的种子，结果与进程数、块的执行顺序无关，逐位相同
+    （与 create_grid_with_circular_obstacles 使用的随机数不同，两者结果不一样）。
+
+    Args:
+        path (str): 输出的 .npy 路径，旁边会生成 .json 元数据。
+        tile_size (int): 块的边长，也是每个任务处理的区域大小。
+        workers (int | None): 进程数，默认等于 CPU 核数。
+    """
+    workers = workers or os.cpu_count() or 1
+    if progress:
+        print(f"开始分块生成 {size}x{size} 的网格（{workers} 个进程）...")
+    # 新建的文件全为 0（可通行），在支持稀疏文件的文件系统上不占实际空间
+    output = np.lib.format.open_memmap(
+        path, mode="w+", dtype=np.uint8, shape=(size, size)
+    )
+    del output
+
+    tiles_per_side = -(-size // tile_size)
+    total_points = size * size
+    target_obstacle_points = int(total_points * ratio)
+    current_obstacle_points = 0
+    # 半径在 [min_radius, max_radius] 内均匀分布时单个圆形的平均格子数
+    mean_disk_points = float(
+        np.mean([_disk_stamp(r).sum() for r in range(min_radius, max_radius + 1)])
+    )
+
+    with (
+        ProcessPoolExecutor(
+            max_workers=workers, initializer=_attach_output, initargs=(path,)
+        ) as pool,
+        tqdm(
+            total=target_obstacle_points, desc="正在生成障碍物", disable=not progress
+        ) as pbar,
+    ):
+        round_index = 0
+        while current_obstacle_points < target_obstacle_points:
+            # 圆心均匀分布、密度为 λ 时，空白格被覆盖的概率约为 1 - exp(-λ·平均面积)，
+            # 由本轮想新增的点数反推 λ；每轮至少期望投放一个圆形
+            free_points = total_points - current_obstacle_points
+            wanted = max(
+                (target_obstacle_points - current_obstacle_points) * GEN_FILL_FRACTION,
+                mean_disk_points,
+            )
+            density = max(
+                -math.log1p(-min(wanted / free_points, 0.999)) / mean_disk_points,
+                1 / total_points,
+            )
+
+            circles = np.concatenate(
+                [
+                    _tile_circles(
+                        seed,
+                        round_index,
+                        tile_row,
+                        tile_col,
+                        tile_size,
+                        size,
+                        density,
+                        min_radius,
+                        max_radius,
+                    )
+                    for tile_row in range(tiles_per_side)
+                    for tile_col in range(tiles_per_side)
+                ]
+            )
+            futures = [
+                pool.submit(_stamp_tile, tile_row, tile_col, tile_size, tile_circles)
+                for (tile_row, tile_col), tile_circles in _assign_to_tiles(
+                    circles, tile_size, size
+                ).items()
+            ]
+            new_points = sum(future.result() for future in futures)
+            pbar.update(new_points)
+            current_obstacle_points += new_points
+            round_index += 1
+
+    # 按块流式计算内容哈希，不会把整张网格读进内存
+    return write_grid_store_meta(path, np.load(path, mmap_mode="r"), "uint8")
 
 
 def main():
@@ -91,6 +412,11 @@ def main():
     file_size_mb = os.path.getsize(OUTPUT_FILENAME) / (1024 * 1024)
     print(f"文件保存成功！ 文件大小: {file_size_mb:.2f} MB")
 
+    # 同时保存一份可内存映射的网格存储
+    print(f"\n正在将网格保存到 '{GRID_STORE_FILENAME}'...")
+    meta = save_grid_store(GRID_STORE_FILENAME, obstacle_grid)
+    print(f"网格存储保存成功！ 内容哈希: {meta['digest']}")
+
 
 if __name__ == "__main__":
     # 确保在运行前已安装必要的库
@@ -0,0 +1,104 @@
+"""
+网格存储格式
+
+网格以不压缩的 .npy 保存，旁边放一个小的 .json 元数据（形状、格式、内容哈希）。
+寻路进程用 mmap_mode="r" 打开，冷启动只需要几毫秒，
+多个进程共享操作系统的页缓存，不再各自解压、各自持有一份拷贝。
+
+格式：
+    "uint8": 每格 1 字节，0 可通行，1 障碍物
+    "bitpacked": 每格 1 位，按行打包，打开后得到 BitGrid
+"""
+import json
+import os
+
+import numpy as np
+
+from .astar import OccupancyGrid, grid_digest
+from .bitgrid import BitGrid
+
+GRID_STORE_FORMATS = ("uint8", "bitpacked")
+# 分块写入时每块的格子数，避免对大网格做整体的临时拷贝
+_BLOCK_CELLS = 1 << 24
+
+
+def grid_store_meta_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".json"
+
+
+def save_grid_store(
+    path: str, grid: OccupancyGrid, packed: bool = False, extra: dict | None = None
+) -> dict:
+    """
+    把网格写成 .npy 和 .json 元数据，返回元数据。
+    packed 为 True 时按位打包保存；传入 BitGrid 时总是按位打包保存。
+    extra: 额外写进元数据的字段（例如生成网格用的种子和参数）
+    """
+    rows, cols = grid.shape
+    packed = packed or isinstance(grid, BitGrid)
+    stored_cols = (cols + 7) // 8 if packed else cols
+    stored = np.lib.format.open_memmap(
+        path, mode="w+", dtype=np.uint8, shape=(rows, stored_cols)
+    )
+    block_rows = max(1, _BLOCK_CELLS // max(cols, 1))
+    for row_start in range(0, rows, block_rows):
+        row_end = row_start + block_rows
+        if isinstance(grid, BitGrid):
+            stored[row_start:row_end] = grid.bits[row_start:row_end]
+            continue
+        occupied = np.asarray(grid[row_start:row_end]) != 0
+        stored[row_start:row_end] = (
+            np.packbits(occupied, axis=1) if packed else occupied
+        )
+    stored.flush()
+    del stored
+    return write_grid_store_meta(path, grid, "bitpacked" if packed else "uint8", extra)
+
+
+def write_grid_store_meta(
+    path: str, grid: OccupancyGrid, fmt: str, extra: dict | None = None
+) -> dict:
+    """
+    为已经写好的 .npy 生成 .json 元数据，grid 用来计算形状和内容哈希（可以是内存映射数组）。
+    """
+    meta = {
+        **(extra or {}),
+        "format": fmt,
+        "shape": [int(n) for n in grid.shape],
+        "digest": grid_digest(grid),
+    }
+    with open(grid_store_meta_path(path), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def read_grid_store_meta(path: str) -> dict:
+    with open(grid_store_meta_path(path), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def open_grid_store(
+    path: str, mmap_mode: str | None = "r", verify: bool = False
+) -> OccupancyGrid:
+    """
+    打开网格存储，"bitpacked" 格式返回包装了内存映射数组的 BitGrid。
+
+    mmap_mode: 传给 np.load，"r" 只读共享，"c" 写时复制（只有被改动的页才会复制），
+        None 则完整读入内存
+    verify: 重新计算内容哈希并与元数据比对，不一致时抛出 ValueError
+    """
+    meta = read_grid_store_meta(path)
+    if meta.get("format") not in GRID_STORE_FORMATS:
+        raise ValueError(f"不支持的网格存储格式: {meta.get('format')}")
+
+    stored = np.load(path, mmap_mode=mmap_mode)
+    if meta["format"] == "bitpacked":
+        # BitGrid 会检查打包数组与网格形状是否匹配
+        grid = BitGrid(stored, tuple(meta["shape"]))
+    else:
+        grid = stored
+    if list(grid.shape) != list(meta["shape"]):
+        raise ValueError(f"网格形状 {grid.shape} 与元数据 {meta['shape']} 不一致")
+    if verify and grid_digest(grid) != meta["digest"]:
+        raise ValueError("网格内容哈希与元数据不一致")
+    return grid
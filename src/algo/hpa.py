@@ -0,0 +1,505 @@
+"""
+分层寻路 (HPA*)
+
+预处理：把网格切成 cluster_size x cluster_size 的簇，在相邻簇的边界上找入口，
+再用簇内 Dijkstra 预计算同一簇内各入口之间的距离，得到一张抽象图。
+抽象图保存在 .npz 网格文件旁边，网格哈希一致时直接加载。
+
+查询：先用构建时一并生成的连通分量索引排除不可达的查询，再把起点和终点接入抽象图，
+在抽象图上搜索，然后只在选中的簇内用 get_path_astar_2d 细化路径。
+"""
+import heapq
+import os
+import time
+
+import numpy as np
+import numpy.typing as npt
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from .astar import (
+    MOVE_COST_DIAGONAL,
+    MOVE_COST_STRAIGHT,
+    NEIGHBORS_MOVES,
+    Coord,
+    Grid,
+    Path,
+    get_path_astar_2d,
+    grid_digest,
+    heuristic,
+)
+from .components import ComponentIndex, build_component_index
+
+DEFAULT_CLUSTER_SIZE = 64
+# 入口宽度达到该值时在两端各放一个过渡点，否则只在中间放一个
+ENTRANCE_SPLIT_WIDTH = 6
+
+
+class AbstractGraph:
+    """
+    抽象图：节点是簇边界上的过渡点，边是跨簇的一步或簇内的最短距离。
+    """
+
+    def __init__(
+        self,
+        shape: tuple[int, int],
+        cluster_size: int,
+        digest: str,
+        nodes: npt.NDArray[np.int32],
+        edge_src: npt.NDArray[np.int32],
+        edge_dst: npt.NDArray[np.int32],
+        edge_cost: npt.NDArray[np.float32],
+    ):
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.cluster_size = int(cluster_size)
+        self.digest = str(digest)
+        self.nodes = nodes
+        self.edge_src = edge_src
+        self.edge_dst = edge_dst
+        self.edge_cost = edge_cost
+        self.cluster_cols = -(-self.shape[1] // self.cluster_size)
+        # 网格的连通分量索引，由 build_abstract_graph / load_or_build_abstract_graph 附上，
+        # 不写进 .npz（与网格同样大小），加载后重新标记一次
+        self.components: ComponentIndex | None = None
+
+        # 无向边展开成 CSR 邻接表，转成 list 以便在 Python 循环里快速访问
+        src = np.concatenate([edge_src, edge_dst])
+        dst = np.concatenate([edge_dst, edge_src])
+        cost = np.concatenate([edge_cost, edge_cost])
+        order = np.argsort(src, kind="stable")
+        self._indptr = np.searchsorted(src[order], np.arange(len(nodes) + 1)).tolist()
+        self._indices = dst[order].tolist()
+        self._costs = cost[order].astype(np.float64).tolist()
+        self._coords: list[Coord] = [(int(r), int(c)) for r, c in nodes]
+
+        # 每个簇包含的节点
+        self._cluster_nodes: dict[int, list[int]] = {}
+        for node_id, coord in enumerate(self._coords):
+            self._cluster_nodes.setdefault(self.cluster_id(coord), []).append(node_id)
+
+    def cluster_id(self, cell: Coord) -> int:
+        return (cell[0] // self.cluster_size) * self.cluster_cols + (
+            cell[1] // self.cluster_size
+        )
+
+    def cluster_bounds(self, cluster: int) -> tuple[int, int, int, int]:
+        cluster_r, cluster_c = divmod(cluster, self.cluster_cols)
+        r0 = cluster_r * self.cluster_size
+        c0 = cluster_c * self.cluster_size
+        return (
+            r0,
+            min(r0 + self.cluster_size, self.shape[0]),
+            c0,
+            min(c0 + self.cluster_size, self.shape[1]),
+        )
+
+    def cluster_nodes(self, cluster: int) -> list[int]:
+        return self._cluster_nodes.get(cluster, [])
+
+    def neighbors(self, node_id: int):
+        begin, end = self._indptr[node_id], self._indptr[node_id + 1]
+        return zip(self._indices[begin:end], self._costs[begin:end])
+
+    def coord(self, node_id: int) -> Coord:
+        return self._coords[node_id]
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            shape=np.asarray(self.shape, dtype=np.int64),
+            cluster_size=np.asarray(self.cluster_size, dtype=np.int64),
+            digest=np.asarray(self.digest),
+            nodes=self.nodes,
+            edge_src=self.edge_src,
+            edge_dst=self.edge_dst,
+            edge_cost=self.edge_cost,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "AbstractGraph":
+        with np.load(path) as data:
+            return cls(
+                shape=tuple(data["shape"]),
+                cluster_size=int(data["cluster_size"]),
+                digest=str(data["digest"]),
+                nodes=data["nodes"],
+                edge_src=data["edge_src"],
+                edge_dst=data["edge_dst"],
+                edge_cost=data["edge_cost"],
+            )
+
+
+# 把一个簇（或任意小块）的可通行表转成八连通的稀疏图
+def _block_graph(free_block: npt.NDArray[np.bool_]) -> csr_matrix:
+    h, w = free_block.shape
+    cell_ids = np.arange(h * w).reshape(h, w)
+    src_list, dst_list, cost_list = [], [], []
+    for (dr, dc), move_cost in NEIGHBORS_MOVES:
+        r_from, r_to = max(0, -dr), h - max(0, dr)
+        c_from, c_to = max(0, -dc), w - max(0, dc)
+        if r_from >= r_to or c_from >= c_to:
+            continue
+        both_free = (
+            free_block[r_from:r_to, c_from:c_to]
+            & free_block[r_from + dr : r_to + dr, c_from + dc : c_to + dc]
+        )
+        src_list.append(cell_ids[r_from:r_to, c_from:c_to][both_free])
+        dst_list.append(
+            cell_ids[r_from + dr : r_to + dr, c_from + dc : c_to + dc][both_free]
+        )
+        cost_list.append(np.full(src_list[-1].size, move_cost))
+    if not cost_list:
+        # 1x1 的块（网格边长不是簇大小的整数倍时会出现）没有任何方向的边
+        return csr_matrix((h * w, h * w))
+    return csr_matrix(
+        (
+            np.concatenate(cost_list),
+            (np.concatenate(src_list), np.concatenate(dst_list)),
+        ),
+        shape=(h * w, h * w),
+    )
+
+
+# 在边界线上找出两侧都可通行的连续段，并按簇切开
+def _entrance_runs(both_free: npt.NDArray[np.bool_], cluster_size: int):
+    for seg_start in range(0, both_free.size, cluster_size):
+        segment = both_free[seg_start : seg_start + cluster_size].astype(np.int8)
+        edges = np.diff(np.concatenate(([0], segment, [0])))
+        for run_start, run_end in zip(
+            np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        ):
+            yield seg_start + int(run_start), seg_start + int(run_end)
+
+
+# 每段入口放置的过渡点位置
+def _transition_points(run_start: int, run_end: int) -> list[int]:
+    if run_end - run_start >= ENTRANCE_SPLIT_WIDTH:
+        return [run_start, run_end - 1]
+    return [(run_start + run_end - 1) // 2]
+
+
+# 只能斜着穿过簇边界的格子对：两格都可通行，拐角上的两格都是障碍物，直行入口替代不了。
+# 四个簇交汇处的簇角穿越也在这里，上下、左右两次扫描都会找到，按排好序的格子对去重
+def _diagonal_crossings(grid: Grid, cluster_size: int) -> list[tuple[Coord, Coord]]:
+    rows, cols = grid.shape
+    crossings: set[tuple[Coord, Coord]] = set()
+    for border in range(cluster_size, rows, cluster_size):
+        upper = np.asarray(grid[border - 1]) == 0
+        lower = np.asarray(grid[border]) == 0
+        for dc in (1, -1):
+            c = np.arange(max(0, -dc), cols - max(0, dc))
+            diagonal_only = upper[c] & lower[c + dc] & ~lower[c] & ~upper[c + dc]
+            for col in c[diagonal_only].tolist():
+                pair = ((border - 1, col), (border, col + dc))
+                crossings.add((min(pair), max(pair)))
+    for border in range(cluster_size, cols, cluster_size):
+        left = np.asarray(grid[:, border - 1]) == 0
+        right = np.asarray(grid[:, border]) == 0
+        for dr in (1, -1):
+            r = np.arange(max(0, -dr), rows - max(0, dr))
+            diagonal_only = left[r] & right[r + dr] & ~right[r] & ~left[r + dr]
+            for row in r[diagonal_only].tolist():
+                pair = ((row, border - 1), (row + dr, border))
+                crossings.add((min(pair), max(pair)))
+    return sorted(crossings)
+
+
+def build_abstract_graph(
+    grid: Grid, cluster_size: int = DEFAULT_CLUSTER_SIZE, digest: str | None = None
+) -> AbstractGraph:
+    """
+    预处理：找出所有簇间入口，并计算每个簇内入口两两之间的距离，
+    同时为网格建立连通分量索引（graph.components）。
+    """
+    rows, cols = grid.shape
+    node_ids: dict[Coord, int] = {}
+    edges: list[tuple[int, int, float]] = []
+
+    def node_of(cell: Coord) -> int:
+        if cell not in node_ids:
+            node_ids[cell] = len(node_ids)
+        return node_ids[cell]
+
+    # 1. 上下相邻的簇之间的入口
+    for border in range(cluster_size, rows, cluster_size):
+        both_free = (grid[border - 1] == 0) & (grid[border] == 0)
+        for run_start, run_end in _entrance_runs(both_free, cluster_size):
+            for c in _transition_points(run_start, run_end):
+                edges.append(
+                    (node_of((border - 1, c)), node_of((border, c)), MOVE_COST_STRAIGHT)
+                )
+
+    # 2. 左右相邻的簇之间的入口
+    for border in range(cluster_size, cols, cluster_size):
+        both_free = (grid[:, border - 1] == 0) & (grid[:, border] == 0)
+        for run_start, run_end in _entrance_runs(both_free, cluster_size):
+            for r in _transition_points(run_start, run_end):
+                edges.append(
+                    (node_of((r, border - 1)), node_of((r, border)), MOVE_COST_STRAIGHT)
+                )
+
+    # 3. 只能斜着穿过边界的地方，缺了它们抽象图会把可达的查询判成不可达
+    for u, v in _diagonal_crossings(grid, cluster_size):
+        edges.append((node_of(u), node_of(v), MOVE_COST_DIAGONAL))
+
+    nodes = np.array(list(node_ids), dtype=np.int32).reshape(-1, 2)
+
+    # 4. 簇内入口之间的最短距离
+    cluster_cols = -(-cols // cluster_size)
+    cluster_members: dict[int, list[int]] = {}
+    for node_id, (r, c) in enumerate(node_ids):
+        cluster = (r // cluster_size) * cluster_cols + c // cluster_size
+        cluster_members.setdefault(cluster, []).append(node_id)
+
+    for cluster, members in cluster_members.items():
+        if len(members) < 2:
+            continue
+        cluster_r, cluster_c = divmod(cluster, cluster_cols)
+        r0, c0 = cluster_r * cluster_size, cluster_c * cluster_size
+        block = np.asarray(grid[r0 : r0 + cluster_size, c0 : c0 + cluster_size]) == 0
+        local = [
+            (nodes[m, 0] - r0) * block.shape[1] + (nodes[m, 1] - c0) for m in members
+        ]
+        distances = dijkstra(_block_graph(block), indices=local)
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                distance = distances[i, local[j]]
+                if np.isfinite(distance):
+                    edges.append((members[i], members[j], float(distance)))
+
+    edge_array = np.array(edges, dtype=np.float64).reshape(-1, 3)
+    digest = digest if digest is not None else grid_digest(grid)
+    graph = AbstractGraph(
+        shape=(rows, cols),
+        cluster_size=cluster_size,
+        digest=digest,
+        nodes=nodes,
+        edge_src=edge_array[:, 0].astype(np.int32),
+        edge_dst=edge_array[:, 1].astype(np.int32),
+        edge_cost=edge_array[:, 2].astype(np.float32),
+    )
+    graph.components = build_component_index(grid, digest)
+    return graph
+
+
+# 抽象图文件放在网格文件旁边，例如 obstacle_grid_8000x8000.hpa.npz
+def abstract_graph_path(grid_path: str) -> str:
+    return os.path.splitext(grid_path)[0] + ".hpa.npz"
+
+
+def load_or_build_abstract_graph(
+    grid: Grid, grid_path: str, cluster_size: int = DEFAULT_CLUSTER_SIZE
+) -> AbstractGraph:
+    """
+    网格哈希和簇大小都一致时直接加载已保存的抽象图，否则重新构建并保存。
+    加载时重新标记一次连通分量。
+    """
+    graph_path = abstract_graph_path(grid_path)
+    digest = grid_digest(grid)
+    if os.path.exists(graph_path):
+        graph = AbstractGraph.load(graph_path)
+        if graph.digest == digest and graph.cluster_size == cluster_size:
+            graph.components = build_component_index(grid, digest)
+            return graph
+        print("抽象图与网格不一致，重新构建...")
+
+    graph = build_abstract_graph(grid, cluster_size, digest=digest)
+    graph.save(graph_path)
+    return graph
+
+
+# 在簇内从 cell 出发做 Dijkstra，返回到该簇各节点的距离
+def _links_in_cluster(
+    grid: Grid, graph: AbstractGraph, cell: Coord
+) -> tuple[dict[int, float], npt.NDArray[np.float64], tuple[int, int, int, int]]:
+    bounds = graph.cluster_bounds(graph.cluster_id(cell))
+    r0, r1, c0, c1 = bounds
+    block = np.asarray(grid[r0:r1, c0:c1]) == 0
+    width = c1 - c0
+    distances = dijkstra(
+        _block_graph(block), indices=(cell[0] - r0) * width + (cell[1] - c0)
+    )
+    links = {}
+    for node_id in graph.cluster_nodes(graph.cluster_id(cell)):
+        r, c = graph.coord(node_id)
+        distance = distances[(r - r0) * width + (c - c0)]
+        if np.isfinite(distance):
+            links[node_id] = float(distance)
+    return links, distances, bounds
+
+
+# 在抽象图上做 A*，返回坐标序列（含起点和终点）
+def _search_abstract(
+    grid: Grid, graph: AbstractGraph, start: Coord, end: Coord, stats: dict
+) -> list[Coord] | None:
+    start_links, start_distances, bounds = _links_in_cluster(grid, graph, start)
+    goal_links, _, _ = _links_in_cluster(grid, graph, end)
+
+    source, target = -1, -2
+    # 起点和终点在同一个簇内时，直接连一条簇内边
+    if graph.cluster_id(start) == graph.cluster_id(end):
+        r0, _, c0, c1 = bounds
+        direct = start_distances[(end[0] - r0) * (c1 - c0) + (end[1] - c0)]
+        if np.isfinite(direct):
+            start_links[target] = float(direct)
+
+    def coord_of(node_id: int) -> Coord:
+        if node_id == source:
+            return start
+        if node_id == target:
+            return end
+        return graph.coord(node_id)
+
+    open_set: list[tuple[float, int]] = [(heuristic(start, end), source)]
+    g_score: dict[int, float] = {source: 0.0}
+    came_from: dict[int, int] = {}
+    closed_set: set[int] = set()
+    expansions = 0
+
+    while open_set:
+        _, current = heapq.heappop(open_set)
+        if current in closed_set:
+            continue
+        closed_set.add(current)
+        expansions += 1
+
+        if current == target:
+            stats["abstract_expansions"] = expansions
+            coords = [end]
+            while current in came_from:
+                current = came_from[current]
+                coords.append(coord_of(current))
+            return coords[::-1]
+
+        if current == source:
+            links = start_links.items()
+        else:
+            links = list(graph.neighbors(current))
+            if current in goal_links:
+                links.append((target, goal_links[current]))
+
+        for neighbor, cost in links:
+            if neighbor in closed_set:
+                continue
+            tentative_g_score = g_score[current] + cost
+            if tentative_g_score < g_score.get(neighbor, float("inf")):
+                g_score[neighbor] = tentative_g_score
+                came_from[neighbor] = current
+                heapq.heappush(
+                    open_set,
+                    (tentative_g_score + heuristic(coord_of(neighbor), end), neighbor),
+                )
+
+    stats["abstract_expansions"] = expansions
+    return None
+
+
+# 逐段细化：每段都在单个簇内用 A* 求解
+def _refine_segments(grid: Grid, graph: AbstractGraph, coords: list[Coord]) -> Path:
+    cells: list[Coord] = [coords[0]]
+    for a, b in zip(coords, coords[1:]):
+        cluster_a, cluster_b = graph.cluster_id(a), graph.cluster_id(b)
+        if cluster_a != cluster_b:
+            # 跨簇的边就是相邻两格
+            cells.append(b)
+            continue
+        r0, r1, c0, c1 = graph.cluster_bounds(cluster_a)
+        segment = get_path_astar_2d(
+            grid[r0:r1, c0:c1],
+            (a[0] - r0, a[1] - c0),
+            (b[0] - r0, b[1] - c0),
+            mode="array",
+        )
+        if len(segment) == 0:
+            return np.array([])
+        cells.extend((int(r) + r0, int(c) + c0) for r, c in segment[1:])
+    return np.array(cells)
+
+
+# 走廊细化：把抽象路径经过的簇拼成一个窗口，在窗口内做一次 A*
+def _refine_corridor(grid: Grid, graph: AbstractGraph, coords: list[Coord]) -> Path:
+    clusters = {graph.cluster_id(coord) for coord in coords}
+    bounds = [graph.cluster_bounds(cluster) for cluster in clusters]
+    win_r0 = min(b[0] for b in bounds)
+    win_r1 = max(b[1] for b in bounds)
+    win_c0 = min(b[2] for b in bounds)
+    win_c1 = max(b[3] for b in bounds)
+
+    # 走廊以外的簇全部当作障碍物，只拷贝窗口大小的数据
+    window = np.ones((win_r1 - win_r0, win_c1 - win_c0), dtype=np.uint8)
+    for r0, r1, c0, c1 in bounds:
+        window[r0 - win_r0 : r1 - win_r0, c0 - win_c0 : c1 - win_c0] = (
+            np.asarray(grid[r0:r1, c0:c1]) != 0
+        )
+
+    start, end = coords[0], coords[-1]
+    path = get_path_astar_2d(
+        window,
+        (start[0] - win_r0, start[1] - win_c0),
+        (end[0] - win_r0, end[1] - win_c0),
+        mode="array",
+    )
+    if len(path) == 0:
+        return path
+    return path + np.array([win_r0, win_c0])
+
+
+def get_path_hpa(
+    grid: Grid,
+    start: Coord,
+    end: Coord,
+    graph: AbstractGraph,
+    refine: str = "segments",
+    stats: dict | None = None,
+    components=None,
+    fallback: bool = False,
+) -> Path:
+    """
+    基于抽象图的分层寻路，输出格式与 get_path_astar_2d 相同。
+
+    refine:
+        "segments": 逐段在单个簇内细化，延迟最低，路径是近似最优
+        "corridor": 在抽象路径经过的所有簇组成的走廊里做一次 A*，
+                    更接近最优（走廊内最优），代价是更大的搜索范围
+
+    先用 components（默认 graph.components）判断可达性，不可达的查询直接返回空路径，
+    不会搜索整张网格。入口包含直行和只能斜行的穿越，可达的查询在抽象图上总能找到路径。
+    fallback 为 True 时，抽象搜索或细化仍然失败就退回到整张网格上的 A*；
+    这在大网格上很慢，默认关闭，失败时返回空路径并在 stats 中记录 abstract_failed。
+    """
+    begin = time.perf_counter()
+    start, end = (int(start[0]), int(start[1])), (int(end[0]), int(end[1]))
+    info: dict = {}
+
+    components = components if components is not None else graph.components
+    if components is not None and not components.is_reachable(start, end):
+        if stats is not None:
+            stats.update(unreachable=True, elapsed_s=time.perf_counter() - begin)
+        return np.array([])
+
+    coords = _search_abstract(grid, graph, start, end, info)
+    abstract_done = time.perf_counter()
+
+    path = np.array([])
+    if coords is not None:
+        if refine == "segments":
+            path = _refine_segments(grid, graph, coords)
+        elif refine == "corridor":
+            path = _refine_corridor(grid, graph, coords)
+        else:
+            raise ValueError(f"未知的细化方式: {refine}")
+
+    info["abstract_failed"] = len(path) == 0
+    info["fallback"] = fallback and info["abstract_failed"]
+    if info["fallback"]:
+        path = get_path_astar_2d(grid, start, end, mode="array")
+
+    if stats is not None:
+        end_time = time.perf_counter()
+        stats.update(
+            info,
+            abstract_s=abstract_done - begin,
+            refine_s=end_time - abstract_done,
+            elapsed_s=end_time - begin,
+        )
+    return path
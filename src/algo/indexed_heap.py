@@ -0,0 +1,140 @@
+"""
+带索引的二叉堆
+
+以格子下标为键，记录每个格子在堆中的位置，支持 decrease-key。
+同一个格子在堆里最多只有一个条目，不会出现 heapq 那种重复入堆、靠关闭列表丢弃的过时条目，
+堆的大小始终等于真正处于开放状态的节点数。
+位置表是按节点下标预分配的整数数组（每个节点 4 字节），但不做初始化：
+只有 nodes[position[node]] == node 时该项才有效，所以创建堆不需要整块写一遍，
+操作系统也只为实际写过的页面分配物理内存，所以它的内存单独用 position_bytes 按页估算，
+不计入 heap_bytes。
+"""
+import mmap
+import sys
+
+import numpy as np
+
+# 每个堆条目的内存：两个列表各一个指针槽位，加上 float 对象和 int 对象
+# （格子下标通常超过小整数缓存范围，按 sys.getsizeof 实测）
+ENTRY_BYTES = 2 * 8 + sys.getsizeof(0.0) + sys.getsizeof(2**20)
+
+
+class IndexedHeap:
+    """
+    优先级和节点分别存放在两个并行的列表里，_position 记录节点在列表中的下标。
+    capacity 是节点下标的上界（不含），例如加边网格的格子总数。
+    """
+
+    def __init__(self, capacity: int):
+        index_dtype = np.int32 if capacity < 2**31 else np.int64
+        self._position_array = np.empty(capacity, dtype=index_dtype)
+        self._position = memoryview(self._position_array)
+        self._priorities: list[float] = []
+        self._nodes: list[int] = []
+
+        self.pushes = 0
+        self.decrease_keys = 0
+        self.pops = 0
+        self.max_size = 0
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def _index_of(self, node: int) -> int:
+        """
+        节点在列表中的下标，不在堆中时返回 -1；位置表里未初始化的垃圾值在这里被过滤掉。
+        """
+        index = self._position[node]
+        if 0 <= index < len(self._nodes) and self._nodes[index] == node:
+            return index
+        return -1
+
+    def __contains__(self, node: int) -> bool:
+        return self._index_of(node) != -1
+
+    def push(self, priority: float, node: int) -> None:
+        """
+        节点不在堆中时插入；已在堆中且新优先级更小时执行 decrease-key；否则忽略。
+        """
+        index = self._index_of(node)
+        if index == -1:
+            index = len(self._nodes)
+            self._priorities.append(priority)
+            self._nodes.append(node)
+            self._position[node] = index
+            self.pushes += 1
+            if index + 1 > self.max_size:
+                self.max_size = index + 1
+        elif priority < self._priorities[index]:
+            self._priorities[index] = priority
+            self.decrease_keys += 1
+        else:
+            return
+        self._sift_up(index)
+
+    def pop(self) -> tuple[float, int]:
+        priorities, nodes = self._priorities, self._nodes
+        top_priority, top_node = priorities[0], nodes[0]
+        last_priority, last_node = priorities.pop(), nodes.pop()
+        if nodes:
+            priorities[0], nodes[0] = last_priority, last_node
+            self._position[last_node] = 0
+            self._sift_down(0)
+        self.pops += 1
+        return top_priority, top_node
+
+    def peek(self) -> tuple[float, int]:
+        return self._priorities[0], self._nodes[0]
+
+    def _sift_up(self, index: int) -> None:
+        priorities, nodes, position = self._priorities, self._nodes, self._position
+        priority, node = priorities[index], nodes[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if priorities[parent] <= priority:
+                break
+            priorities[index], nodes[index] = priorities[parent], nodes[parent]
+            position[nodes[index]] = index
+            index = parent
+        priorities[index], nodes[index] = priority, node
+        position[node] = index
+
+    def _sift_down(self, index: int) -> None:
+        priorities, nodes, position = self._priorities, self._nodes, self._position
+        size = len(nodes)
+        priority, node = priorities[index], nodes[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and priorities[child + 1] < priorities[child]:
+                child += 1
+            if priorities[child] >= priority:
+                break
+            priorities[index], nodes[index] = priorities[child], nodes[child]
+            position[nodes[index]] = index
+            index = child
+        priorities[index], nodes[index] = priority, node
+        position[node] = index
+
+    def stats(self) -> dict:
+        return {
+            "heap_size": len(self._nodes),
+            "max_heap_size": self.max_size,
+            "pushes": self.pushes,
+            "decrease_keys": self.decrease_keys,
+            "pops": self.pops,
+            "stale_pops": 0,
+            "heap_bytes": self.max_size * ENTRY_BYTES,
+        }
+
+    def position_bytes(self, touched_nodes) -> int:
+        """
+        位置表实际占用的物理内存估算：只统计 touched_nodes（写过位置的节点）所在的页面，
+        没写过的页面不占物理内存，不能直接用 nbytes。
+        """
+        itemsize = self._position_array.itemsize
+        pages = np.unique(
+            np.asarray(touched_nodes, dtype=np.int64) * itemsize // mmap.PAGESIZE
+        )
+        return pages.size * mmap.PAGESIZE
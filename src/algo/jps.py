@@ -0,0 +1,207 @@
+"""
+二维跳点搜索 (Jump Point Search)
+
+适用于均匀代价的八连通二值网格（grid == 0 可通行，直行代价 MOVE_COST_STRAIGHT，
+斜行代价 MOVE_COST_DIAGONAL），移动规则与 get_path_astar_2d 完全一致（允许斜穿拐角）。
+只把跳点放进开放列表，对称路径被剪枝掉，在开阔区域能少展开几个数量级的节点。
+"""
+import heapq
+import time
+
+import numpy as np
+
+from .astar import (
+    MOVE_COST_DIAGONAL,
+    MOVE_COST_STRAIGHT,
+    Coord,
+    OccupancyGrid,
+    Path,
+    _padded_free_map,
+)
+
+# 起点没有父节点时，向8个方向都尝试跳跃
+_ALL_DIRECTIONS: list[Coord] = [
+    (0, 1),
+    (0, -1),
+    (1, 0),
+    (-1, 0),
+    (1, 1),
+    (-1, 1),
+    (-1, -1),
+    (1, -1),
+]
+
+
+def _sign(value: int) -> int:
+    return (value > 0) - (value < 0)
+
+
+# 二维跳点搜索
+def get_path_jps_2d(
+    grid: OccupancyGrid, start: Coord, end: Coord, stats: dict | None = None
+) -> Path:
+    """
+    返回最优的八角距离路径，输出格式与 get_path_astar_2d 相同（逐格展开的 (N, 2) 数组）。
+
+    如果传入 stats 字典，会写入展开数、入堆数、跳点数和耗时。
+    """
+    begin = time.perf_counter()
+    # 坐标可能是 numpy 整数，统一转成 int，避免热循环里的标量开销
+    start, end = (int(start[0]), int(start[1])), (int(end[0]), int(end[1]))
+    free_array, width = _padded_free_map(grid)
+    free = memoryview(free_array)
+
+    start_idx = (start[0] + 1) * width + start[1] + 1
+    end_idx = (end[0] + 1) * width + end[1] + 1
+    end_r, end_c = end[0] + 1, end[1] + 1
+    straight = MOVE_COST_STRAIGHT
+    diagonal_extra = MOVE_COST_DIAGONAL - MOVE_COST_STRAIGHT
+
+    def octile(node: int) -> float:
+        r, c = divmod(node, width)
+        dx = abs(r - end_r)
+        dy = abs(c - end_c)
+        if dx > dy:
+            return straight * dx + diagonal_extra * dy
+        return straight * dy + diagonal_extra * dx
+
+    # 直线跳跃：step 是前进方向的偏移，side 是垂直方向的偏移
+    def jump_straight(node: int, step: int, side: int) -> int:
+        while True:
+            node += step
+            if not free[node]:
+                return -1
+            if node == end_idx:
+                return node
+            # 出现强制邻居，当前点就是跳点
+            if (free[node + side + step] and not free[node + side]) or (
+                free[node - side + step] and not free[node - side]
+            ):
+                return node
+
+    # 斜向跳跃：每走一步都要沿两个分量方向做直线跳跃
+    def jump_diagonal(node: int, dr: int, dc: int) -> int:
+        vertical = dr * width
+        step = vertical + dc
+        while True:
+            node += step
+            if not free[node]:
+                return -1
+            if node == end_idx:
+                return node
+            if (free[node - dc + vertical] and not free[node - dc]) or (
+                free[node + dc - vertical] and not free[node - vertical]
+            ):
+                return node
+            if (
+                jump_straight(node, dc, width) != -1
+                or jump_straight(node, vertical, 1) != -1
+            ):
+                return node
+
+    # 根据父节点方向剪枝，只保留自然邻居和强制邻居
+    def pruned_directions(node: int, parent: int) -> list[Coord]:
+        if parent == -1:
+            return _ALL_DIRECTIONS
+        r, c = divmod(node, width)
+        pr, pc = divmod(parent, width)
+        dr, dc = _sign(r - pr), _sign(c - pc)
+        directions: list[Coord] = []
+        if dr and dc:
+            if free[node + dr * width]:
+                directions.append((dr, 0))
+            if free[node + dc]:
+                directions.append((0, dc))
+            directions.append((dr, dc))
+            if not free[node - dc]:
+                directions.append((dr, -dc))
+            if not free[node - dr * width]:
+                directions.append((-dr, dc))
+        elif dr:
+            directions.append((dr, 0))
+            if not free[node + 1]:
+                directions.append((dr, 1))
+            if not free[node - 1]:
+                directions.append((dr, -1))
+        else:
+            directions.append((0, dc))
+            if not free[node + width]:
+                directions.append((1, dc))
+            if not free[node - width]:
+                directions.append((-1, dc))
+        return directions
+
+    open_set: list[tuple[float, int]] = [(octile(start_idx), start_idx)]
+    closed_set: set[int] = set()
+    came_from: dict[int, int] = {start_idx: -1}
+    g_score: dict[int, float] = {start_idx: 0.0}
+    expansions = pushes = 0
+    found = False
+
+    while open_set:
+        _, current = heapq.heappop(open_set)
+        if current in closed_set:
+            continue
+        closed_set.add(current)
+        expansions += 1
+
+        if current == end_idx:
+            found = True
+            break
+
+        current_g = g_score[current]
+        for dr, dc in pruned_directions(current, came_from[current]):
+            if dr and dc:
+                jump_point = jump_diagonal(current, dr, dc)
+            elif dr:
+                jump_point = jump_straight(current, dr * width, 1)
+            else:
+                jump_point = jump_straight(current, dc, width)
+            if jump_point == -1 or jump_point in closed_set:
+                continue
+
+            # 跳点之间只可能是纯直线或纯斜线，八角距离就是真实代价
+            r, c = divmod(jump_point, width)
+            cr, cc = divmod(current, width)
+            dx, dy = abs(r - cr), abs(c - cc)
+            tentative_g_score = current_g + (
+                straight * max(dx, dy) + diagonal_extra * min(dx, dy)
+            )
+            if tentative_g_score < g_score.get(jump_point, float("inf")):
+                g_score[jump_point] = tentative_g_score
+                came_from[jump_point] = current
+                heapq.heappush(
+                    open_set, (tentative_g_score + octile(jump_point), jump_point)
+                )
+                pushes += 1
+
+    path = np.array([])
+    if found:
+        # 回溯跳点，再把相邻跳点之间的格子逐个补齐
+        jump_points: list[int] = []
+        node = end_idx
+        while node != -1:
+            jump_points.append(node)
+            node = came_from[node]
+        jump_points.reverse()
+
+        cells: list[Coord] = [start]
+        for a, b in zip(jump_points, jump_points[1:]):
+            ar, ac = divmod(a, width)
+            br, bc = divmod(b, width)
+            dr, dc = _sign(br - ar), _sign(bc - ac)
+            for _ in range(max(abs(br - ar), abs(bc - ac))):
+                ar += dr
+                ac += dc
+                cells.append((ar - 1, ac - 1))
+        path = np.array(cells)
+
+    if stats is not None:
+        stats.update(
+            expansions=expansions,
+            pushes=pushes,
+            jump_points=len(g_score),
+            elapsed_s=time.perf_counter() - begin,
+        )
+
+    return path
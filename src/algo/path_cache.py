@@ -0,0 +1,176 @@
+"""
+路径结果缓存
+
+生产环境中同样的起点 / 终点（仓库、充电桩）会在不变的网格上被反复查询。
+PathCache 放在 get_path_astar_2d 前面，键为 (网格哈希, 起点, 终点, 模式)：
+网格一旦变化，哈希随之变化，旧结果自然不会再命中。
+
+内存层是按字节数限制大小的 LRU；可选的磁盘层按网格哈希分目录保存 .npy，
+进程重启后仍然可以命中。命中 / 未命中等计数通过 stats() 取出。
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .astar import Coord, OccupancyGrid, Path, get_path_astar_2d, grid_digest
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# 估算每个缓存条目除路径数组之外的固定开销（键、OrderedDict 节点、数组对象头）
+_ENTRY_OVERHEAD_BYTES = 400
+
+CacheKey = tuple[str, Coord, Coord, str]
+
+
+class PathCache:
+    """
+    用法：
+        cache = PathCache(disk_dir="path_cache")
+        path = cache.get_path(grid, start, end, mode="array")
+
+    返回的路径数组是只读的，多个调用方共享同一份结果。
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_entries: int | None = None,
+        disk_dir: str | None = None,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[CacheKey, Path]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(digest: str, start: Coord, end: Coord, mode: str) -> CacheKey:
+        return (
+            digest,
+            (int(start[0]), int(start[1])),
+            (int(end[0]), int(end[1])),
+            mode,
+        )
+
+    def _disk_path(self, key: CacheKey) -> str:
+        digest, (sr, sc), (er, ec), mode = key
+        return os.path.join(self.disk_dir, digest, f"{sr}_{sc}_{er}_{ec}_{mode}.npy")
+
+    def _remember(self, key: CacheKey, path: Path) -> None:
+        entry_bytes = path.nbytes + _ENTRY_OVERHEAD_BYTES
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = path
+            self._bytes += entry_bytes
+            while self._entries and (
+                self._bytes > self.max_bytes
+                or (
+                    self.max_entries is not None
+                    and len(self._entries) > self.max_entries
+                )
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes + _ENTRY_OVERHEAD_BYTES
+                self.evictions += 1
+
+    def lookup(self, key: CacheKey) -> Path | None:
+        """
+        依次查内存层和磁盘层，未命中返回 None（不计入未命中次数）。
+        """
+        with self._lock:
+            path = self._entries.get(key)
+            if path is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return path
+
+        if self.disk_dir is not None:
+            disk_path = self._disk_path(key)
+            if os.path.exists(disk_path):
+                path = np.load(disk_path)
+                path.setflags(write=False)
+                self._remember(key, path)
+                with self._lock:
+                    self.disk_hits += 1
+                return path
+        return None
+
+    def record_miss(self) -> None:
+        """
+        lookup 不计未命中；调用方确认要重新计算时调用，与命中计数一样在锁内累加。
+        """
+        with self._lock:
+            self.misses += 1
+
+    def store(self, key: CacheKey, path: Path) -> Path:
+        path = np.array(path)
+        path.setflags(write=False)
+        self._remember(key, path)
+        if self.disk_dir is not None:
+            disk_path = self._disk_path(key)
+            os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+            # 先写临时文件再改名，避免并发读到写了一半的文件
+            temp_path = f"{disk_path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                np.save(f, path)
+            os.replace(temp_path, disk_path)
+        return path
+
+    def get_path(
+        self,
+        grid: OccupancyGrid,
+        start: Coord,
+        end: Coord,
+        mode: str = "classic",
+        digest: str | None = None,
+    ) -> Path:
+        """
+        带缓存的 get_path_astar_2d。
+
+        digest: 可选的网格哈希。网格很大时每次都计算 grid_digest 代价不小，
+            调用方在网格不变期间可以算一次传进来；网格变化后必须重新计算
+        """
+        digest = digest if digest is not None else grid_digest(grid)
+        key = self.make_key(digest, start, end, mode)
+        path = self.lookup(key)
+        if path is not None:
+            return path
+        self.record_miss()
+        return self.store(key, get_path_astar_2d(grid, start, end, mode=mode))
+
+    def invalidate(self, digest: str | None = None) -> None:
+        """
+        清空内存层；传入 digest 时只删除该网格的条目。磁盘层按哈希分目录，需要时直接删除目录。
+        """
+        with self._lock:
+            if digest is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for key in [key for key in self._entries if key[0] == digest]:
+                evicted = self._entries.pop(key)
+                self._bytes -= evicted.nbytes + _ENTRY_OVERHEAD_BYTES
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
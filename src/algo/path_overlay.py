@@ -0,0 +1,134 @@
+"""
+稀疏路径叠加层
+
+路径只保存成两列坐标数组，不再写进网格本身，单次查询的内存与路径长度成正比。
+需要显示时，只对感兴趣的区域 (ROI) 栅格化出一个小数组。
+行程编码 (run-length) 形式便于序列化或按行扫描。
+"""
+import numpy as np
+import numpy.typing as npt
+
+# 栅格化时路径格子的取值，与 show_grid_high_clarity_overview 的配色一致
+PATH_VALUE = 2
+
+
+class PathOverlay:
+    """
+    rows / cols: 路径上各格子的行号、列号（int32，按路径顺序）
+    shape: 所属网格的形状
+    """
+
+    def __init__(
+        self,
+        rows: npt.NDArray[np.int32],
+        cols: npt.NDArray[np.int32],
+        shape: tuple[int, int],
+    ):
+        self.rows = rows
+        self.cols = cols
+        self.shape = (int(shape[0]), int(shape[1]))
+
+    @classmethod
+    def from_path(cls, path: npt.ArrayLike, shape: tuple[int, int]) -> "PathOverlay":
+        cells = np.asarray(path, dtype=np.int32).reshape(-1, 2)
+        return cls(cells[:, 0].copy(), cells[:, 1].copy(), shape)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def nbytes(self) -> int:
+        return self.rows.nbytes + self.cols.nbytes
+
+    def to_path(self) -> npt.NDArray[np.int32]:
+        return np.stack((self.rows, self.cols), axis=1)
+
+    def bbox(self) -> tuple[int, int, int, int] | None:
+        """
+        路径的外接矩形 (r0, r1, c0, c1)，右、下边界不含；空路径返回 None。
+        """
+        if len(self) == 0:
+            return None
+        return (
+            int(self.rows.min()),
+            int(self.rows.max()) + 1,
+            int(self.cols.min()),
+            int(self.cols.max()) + 1,
+        )
+
+    def to_runs(self) -> npt.NDArray[np.int32]:
+        """
+        行程编码：返回形如 (K, 3) 的数组，每行是 (行号, 起始列, 长度)，按行、列排序。
+        """
+        if len(self) == 0:
+            return np.zeros((0, 3), dtype=np.int32)
+        order = np.lexsort((self.cols, self.rows))
+        rows, cols = self.rows[order], self.cols[order]
+        # 去掉重复经过的格子
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols = rows[keep], cols[keep]
+        # 同一行且列号连续的格子属于同一段
+        starts = np.ones(len(rows), dtype=bool)
+        starts[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1] + 1)
+        start_index = np.flatnonzero(starts)
+        lengths = np.diff(np.append(start_index, len(rows)))
+        return np.stack((rows[start_index], cols[start_index], lengths), axis=1).astype(
+            np.int32
+        )
+
+    @classmethod
+    def from_runs(cls, runs: npt.ArrayLike, shape: tuple[int, int]) -> "PathOverlay":
+        """
+        由行程编码还原（只还原格子集合，不保留路径顺序）。
+        """
+        runs = np.asarray(runs, dtype=np.int32).reshape(-1, 3)
+        lengths = runs[:, 2]
+        rows = np.repeat(runs[:, 0], lengths)
+        run_offsets = np.arange(lengths.sum()) - np.repeat(
+            np.cumsum(lengths) - lengths, lengths
+        )
+        cols = np.repeat(runs[:, 1], lengths) + run_offsets
+        return cls(rows.astype(np.int32), cols.astype(np.int32), shape)
+
+    def _resolve_roi(
+        self, r0: int, r1: int | None, c0: int, c1: int | None
+    ) -> tuple[int, int, int, int]:
+        r1 = self.shape[0] if r1 is None else r1
+        c1 = self.shape[1] if c1 is None else c1
+        return r0, r1, c0, c1
+
+    def mask(
+        self, r0: int = 0, r1: int | None = None, c0: int = 0, c1: int | None = None
+    ) -> npt.NDArray[np.bool_]:
+        """
+        只含路径的布尔掩码，范围是 [r0:r1, c0:c1]。
+        """
+        r0, r1, c0, c1 = self._resolve_roi(r0, r1, c0, c1)
+        result = np.zeros((r1 - r0, c1 - c0), dtype=bool)
+        inside = (
+            (self.rows >= r0) & (self.rows < r1) & (self.cols >= c0) & (self.cols < c1)
+        )
+        result[self.rows[inside] - r0, self.cols[inside] - c0] = True
+        return result
+
+    def rasterize(
+        self,
+        grid,
+        r0: int = 0,
+        r1: int | None = None,
+        c0: int = 0,
+        c1: int | None = None,
+        value: int = PATH_VALUE,
+    ) -> npt.NDArray:
+        """
+        把 grid 的 [r0:r1, c0:c1] 区域拷贝出来，并把路径格子设为 value。
+        grid 本身不会被修改；BitGrid / TiledGrid 等通过 to_dense 取出该区域。
+        """
+        r0, r1, c0, c1 = self._resolve_roi(r0, r1, c0, c1)
+        if hasattr(grid, "to_dense"):
+            region = grid.to_dense(r0, r1, c0, c1).copy()
+        else:
+            region = np.array(grid[r0:r1, c0:c1])
+        region[self.mask(r0, r1, c0, c1)] = value
+        return region
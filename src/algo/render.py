@@ -0,0 +1,244 @@
+"""
+网格与路径的渲染
+
+整张 64M 格的网格画到 10 英寸的画布上，屏幕上也只有一千来个像素，
+没必要对全图做膨胀再 imshow 全部格子。这里先构建一个降采样金字塔：
+每一层把上一层 2x2 的格子做最大池化（有障碍物就算障碍物），细小的障碍物不会在缩小后消失。
+绘制时根据视口大小选择合适的层，路径用矢量折线画，线宽以像素计，任何缩放级别下都清晰可见。
+
+放大到某个区域 (ROI) 时自动切换到更精细的层，区域足够小时直接使用原始分辨率。
+render_png / render_tiles 只用 Figure 和 FigureCanvasAgg，不经过 pyplot，
+在没有显示器的服务器上也能输出 PNG。
+"""
+import os
+
+import numpy as np
+import numpy.typing as npt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import ListedColormap
+from matplotlib.figure import Figure
+
+from .path_overlay import PathOverlay
+
+# 金字塔最顶层的边长不超过该值
+DEFAULT_TOP_SIZE = 256
+# 0: 可通行区域 (白色)  1: 障碍物 (黑色)，路径用红色折线
+OBSTACLE_CMAP = ListedColormap(["white", "black"])
+PATH_COLOR = "red"
+# 已展开格子的叠加层（search_trace.SearchTrace.explored），未展开的部分透明
+EXPLORED_CMAP = ListedColormap([(0, 0, 0, 0), (0.2, 0.5, 1.0, 0.35)])
+# 由原始网格计算第 1 层时每次读取的行数
+_BLOCK_ROWS = 2048
+
+ROI = tuple[int, int, int, int]
+
+
+def _max_pool2(mask: npt.NDArray[np.bool_]) -> npt.NDArray[np.bool_]:
+    rows, cols = mask.shape
+    padded_rows, padded_cols = rows + rows % 2, cols + cols % 2
+    if (padded_rows, padded_cols) != (rows, cols):
+        padded = np.zeros((padded_rows, padded_cols), dtype=bool)
+        padded[:rows, :cols] = mask
+        mask = padded
+    return mask.reshape(padded_rows // 2, 2, padded_cols // 2, 2).any(axis=(1, 3))
+
+
+def _read_obstacles(grid, r0: int, r1: int, c0: int, c1: int) -> npt.NDArray[np.bool_]:
+    if hasattr(grid, "to_dense"):
+        return grid.to_dense(r0, r1, c0, c1) != 0
+    return np.asarray(grid[r0:r1, c0:c1]) != 0
+
+
+class GridPyramid:
+    """
+    levels[0] 是原始网格本身（不拷贝，可以是内存映射数组、BitGrid 或 TiledGrid），
+    levels[k] 是边长缩小 2^k 倍的布尔障碍物掩码。
+    """
+
+    def __init__(self, grid, top_size: int = DEFAULT_TOP_SIZE):
+        self.grid = grid
+        self.shape = (int(grid.shape[0]), int(grid.shape[1]))
+        rows, cols = self.shape
+
+        # 第 1 层按行分块从原始网格计算，不需要把整张网格解包进内存
+        self.levels: list = [grid]
+        if max(rows, cols) > top_size:
+            level1 = np.empty((-(-rows // 2), -(-cols // 2)), dtype=bool)
+            for row_start in range(0, rows, _BLOCK_ROWS):
+                row_end = min(rows, row_start + _BLOCK_ROWS)
+                level1[row_start // 2 : -(-row_end // 2)] = _max_pool2(
+                    _read_obstacles(grid, row_start, row_end, 0, cols)
+                )
+            self.levels.append(level1)
+        while max(self.levels[-1].shape) > top_size:
+            self.levels.append(_max_pool2(self.levels[-1]))
+
+    @property
+    def depth(self) -> int:
+        return len(self.levels)
+
+    def choose_level(self, roi: ROI, max_pixels: int) -> int:
+        """
+        选择使 ROI 的较长边不超过 max_pixels 个格子的最精细的层。
+        """
+        r0, r1, c0, c1 = roi
+        extent = max(r1 - r0, c1 - c0)
+        level = 0
+        while level + 1 < self.depth and extent > max_pixels * (1 << level):
+            level += 1
+        return level
+
+    def region(
+        self, level: int, roi: ROI
+    ) -> tuple[npt.NDArray[np.bool_], tuple[float, float, float, float]]:
+        """
+        取出第 level 层覆盖 ROI（原始坐标）的部分，同时返回 imshow 所需的 extent（原始坐标）。
+        ROI 超出网格的部分被裁掉，绘制时留白。
+        """
+        rows, cols = self.shape
+        r0, r1 = max(0, roi[0]), min(rows, roi[1])
+        c0, c1 = max(0, roi[2]), min(cols, roi[3])
+        scale = 1 << level
+        lr0, lc0 = r0 // scale, c0 // scale
+        lr1, lc1 = -(-r1 // scale), -(-c1 // scale)
+        if level == 0:
+            data = _read_obstacles(self.grid, lr0, lr1, lc0, lc1)
+        else:
+            data = self.levels[level][lr0:lr1, lc0:lc1]
+        extent = (
+            lc0 * scale - 0.5,
+            lc1 * scale - 0.5,
+            lr1 * scale - 0.5,
+            lr0 * scale - 0.5,
+        )
+        return data, extent
+
+
+def path_polyline(overlay: PathOverlay) -> tuple[npt.NDArray, npt.NDArray]:
+    """
+    把路径压缩成折线顶点（只保留起点、终点和拐点），返回 (列坐标, 行坐标)。
+    overlay 需要保持路径顺序（由 from_path 构造）。
+    """
+    cells = overlay.to_path()
+    if len(cells) > 2:
+        steps = np.diff(cells, axis=0)
+        turning = np.any(steps[1:] != steps[:-1], axis=1)
+        keep = np.concatenate(([True], turning, [True]))
+        cells = cells[keep]
+    return cells[:, 1], cells[:, 0]
+
+
+def draw_view(
+    ax,
+    pyramid: GridPyramid,
+    overlay: PathOverlay | None = None,
+    roi: ROI | None = None,
+    max_pixels: int = 2048,
+    level: int | None = None,
+    path_width: float = 1.5,
+    explored: npt.NDArray[np.bool_] | None = None,
+) -> int:
+    """
+    在给定的 Axes 上绘制 ROI（默认整张网格），返回实际使用的金字塔层。
+    explored: 可选的已展开格子掩码（与网格同形状），按同一层最大池化后半透明叠加。
+    """
+    roi = roi if roi is not None else (0, pyramid.shape[0], 0, pyramid.shape[1])
+    r0, r1, c0, c1 = roi
+    if level is None:
+        level = pyramid.choose_level(roi, max_pixels)
+    data, extent = pyramid.region(level, roi)
+    ax.imshow(
+        data,
+        cmap=OBSTACLE_CMAP,
+        vmin=0,
+        vmax=1,
+        interpolation="nearest",
+        extent=extent,
+    )
+    if explored is not None:
+        scale = 1 << level
+        lr0, lc0 = max(0, r0) // scale, max(0, c0) // scale
+        region = explored[
+            lr0 * scale : min(r1, pyramid.shape[0]),
+            lc0 * scale : min(c1, pyramid.shape[1]),
+        ]
+        for _ in range(level):
+            region = _max_pool2(region)
+        ax.imshow(
+            region,
+            cmap=EXPLORED_CMAP,
+            vmin=0,
+            vmax=1,
+            interpolation="nearest",
+            extent=extent,
+        )
+    if overlay is not None and len(overlay) > 0:
+        xs, ys = path_polyline(overlay)
+        ax.plot(xs, ys, color=PATH_COLOR, linewidth=path_width, solid_capstyle="round")
+    ax.set_xlim(c0 - 0.5, c1 - 0.5)
+    ax.set_ylim(r1 - 0.5, r0 - 0.5)
+    ax.set_xticks([])
+    ax.set_yticks([])
+    return level
+
+
+def render_png(
+    out_path: str,
+    pyramid: GridPyramid,
+    overlay: PathOverlay | None = None,
+    roi: ROI | None = None,
+    size_px: int = 1024,
+    level: int | None = None,
+    path_width: float = 1.5,
+    explored: npt.NDArray[np.bool_] | None = None,
+) -> int:
+    """
+    不经过 pyplot 直接输出 PNG，较长边为 size_px 像素，返回使用的金字塔层。
+    """
+    roi = roi if roi is not None else (0, pyramid.shape[0], 0, pyramid.shape[1])
+    r0, r1, c0, c1 = roi
+    longest = max(r1 - r0, c1 - c0)
+    dpi = 100
+    width_px = max(1, round(size_px * (c1 - c0) / longest))
+    height_px = max(1, round(size_px * (r1 - r0) / longest))
+
+    fig = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.set_axis_off()
+    used_level = draw_view(
+        ax, pyramid, overlay, roi, size_px, level, path_width, explored
+    )
+    canvas.print_png(out_path)
+    return used_level
+
+
+def render_tiles(
+    out_dir: str,
+    pyramid: GridPyramid,
+    overlay: PathOverlay | None = None,
+    level: int = 0,
+    tile_px: int = 256,
+) -> int:
+    """
+    把第 level 层切成 tile_px x tile_px 的 PNG 瓦片，保存为 <out_dir>/<level>/<ty>_<tx>.png，
+    每个瓦片覆盖原始网格中 tile_px * 2^level 见方的区域，返回瓦片数量。
+    """
+    rows, cols = pyramid.shape
+    span = tile_px << level
+    level_dir = os.path.join(out_dir, str(level))
+    os.makedirs(level_dir, exist_ok=True)
+    count = 0
+    for tile_row in range(-(-rows // span)):
+        for tile_col in range(-(-cols // span)):
+            # 边缘瓦片同样覆盖完整的 span，超出网格的部分留白，保证各瓦片比例一致
+            roi = (
+                tile_row * span,
+                (tile_row + 1) * span,
+                tile_col * span,
+                (tile_col + 1) * span,
+            )
+            out_path = os.path.join(level_dir, f"{tile_row}_{tile_col}.png")
+            render_png(out_path, pyramid, overlay, roi, tile_px, level)
+            count += 1
+    return count
@@ -0,0 +1,461 @@
+"""
+合成场景语料库
+
+create_grid_with_circular_obstacles 只能生成圆形斑块，真实地图还有走廊、迷宫、房间和噪声地形，
+寻路器在这些地图上的表现（长走廊、大量死胡同、狭窄门洞、不规则边界）差别很大。
+这里用向量化的方式生成这几类地图，障碍物比例可配置，并把种子和参数写进网格存储的元数据，
+任何一张地图都可以用元数据中的参数重新生成。
+
+    circles:   圆形斑块（调用 create_grid_with_circular_obstacles）
+    corridors: 实心地图上挖出横竖交错的走廊
+    maze:      二叉树算法生成的完美迷宫，braid 控制额外打通的墙（产生环路）
+    rooms:     随机房间，按放置顺序用 L 形走廊依次连通
+    noise:     多倍频的值噪声，按分位数阈值化，障碍物比例精确
+
+运行：python -m src.algo.scenarios
+"""
+import json
+import os
+
+import numpy as np
+import numpy.typing as npt
+
+from .generate_grid import MAX_RADIUS, MIN_RADIUS, create_grid_with_circular_obstacles
+from .grid_store import open_grid_store, read_grid_store_meta, save_grid_store
+
+SCENARIO_KINDS = ("circles", "corridors", "maze", "rooms", "noise")
+# --- 默认语料库 ---
+CORPUS_SIZES = (512, 2048)
+CORPUS_DENSITIES = (0.2, 0.4)
+CORPUS_SEEDS = (0,)
+CORPUS_DIRECTORY = "scenarios"
+CORPUS_INDEX_FILENAME = "corpus.json"
+# 挖走廊、放房间时每批最多的矩形数
+_BATCH_RECTS = 1024
+# 不超过这么多个矩形时逐个切片赋值，不构建整张网格大小的差分数组
+_SLICE_RECTS = 16
+# 迷宫能达到的障碍物比例与目标相差超过该值时报错，而不是悄悄生成另一种密度的地图
+MAZE_DENSITY_TOLERANCE = 0.03
+# 生成后才知道的结果，写在 params 里供查阅，重新生成时忽略
+_DERIVED_PARAMS = ("achieved_density",)
+
+
+def _paint_rects(
+    grid: npt.NDArray[np.uint8],
+    r0: npt.NDArray[np.int64],
+    r1: npt.NDArray[np.int64],
+    c0: npt.NDArray[np.int64],
+    c1: npt.NDArray[np.int64],
+    value: int,
+) -> int:
+    """
+    把多个矩形 [r0:r1, c0:c1] 设为 value，返回取值发生变化的格子数。坐标会被裁剪到网格范围内。
+    矩形较多时在差分数组的四个角上加减，两次累加和之后大于 0 的格子就是被覆盖的格子，
+    整张网格只扫一遍；矩形很少时直接逐个切片赋值更快。
+    """
+    rows, cols = grid.shape
+    r0, r1 = np.clip(r0, 0, rows), np.clip(r1, 0, rows)
+    c0, c1 = np.clip(c0, 0, cols), np.clip(c1, 0, cols)
+    keep = (r0 < r1) & (c0 < c1)
+    r0, r1, c0, c1 = r0[keep], r1[keep], c0[keep], c1[keep]
+    if len(r0) <= _SLICE_RECTS:
+        changed = 0
+        for a, b, c, d in zip(r0.tolist(), r1.tolist(), c0.tolist(), c1.tolist()):
+            region = grid[a:b, c:d]
+            changed += int(np.count_nonzero(region != value))
+            region[...] = value
+        return changed
+    diff = np.zeros((rows + 1, cols + 1), dtype=np.int32)
+    np.add.at(diff, (r0, c0), 1)
+    np.add.at(diff, (r0, c1), -1)
+    np.add.at(diff, (r1, c0), -1)
+    np.add.at(diff, (r1, c1), 1)
+    np.cumsum(diff, axis=0, out=diff)
+    np.cumsum(diff, axis=1, out=diff)
+    covered = diff[:rows, :cols] > 0
+    covered &= grid != value
+    grid[covered] = value
+    return int(np.count_nonzero(covered))
+
+
+def _batch_count(remaining: float, per_item: float) -> int:
+    """
+    按剩余量和单个矩形的预计贡献决定本批数量，避免一批越过目标太多。
+    """
+    return int(min(_BATCH_RECTS, max(1, remaining // max(per_item, 1.0))))
+
+
+def generate_corridors(
+    size: int,
+    density: float,
+    rng: np.random.Generator,
+    width: int | None = None,
+) -> tuple[npt.NDArray[np.uint8], dict]:
+    """
+    从全是障碍物的地图开始，成批挖出随机位置、随机长度的横向和纵向走廊，
+    直到障碍物比例降到 density。走廊长度在边长的 1/8 到 1/2 之间，大多会相互交叉。
+    """
+    width = width or max(1, size // 512)
+    grid = np.ones((size, size), dtype=np.uint8)
+    target_free = (1 - density) * size * size
+    free = 0
+    mean_length = size * 5 / 16
+    while free < target_free:
+        # 已挖开的区域越多，新走廊与旧走廊重叠的部分越多
+        blocked_fraction = 1 - free / (size * size)
+        count = _batch_count(target_free - free, width * mean_length * blocked_fraction)
+        horizontal = rng.random(count) < 0.5
+        length = rng.integers(size // 8, size // 2, count, endpoint=True)
+        r0 = rng.integers(0, size, count)
+        c0 = rng.integers(0, size, count)
+        r1 = r0 + np.where(horizontal, width, length)
+        c1 = c0 + np.where(horizontal, length, width)
+        free += _paint_rects(grid, r0, r1, c0, c1, 0)
+    return grid, {"width": width}
+
+
+def _maze_obstacle_ratio(size: int, passage: int, wall: int, braid: float) -> float:
+    """
+    按二叉树迷宫的结构直接算出障碍物比例（编织部分取期望值）：每个迷宫格内部 passage²，
+    除左上角外每格恰好打通一堵 passage x wall 的墙，编织再给不在首行首列的格子多打通一堵。
+    """
+    cells = max(1, (size - wall) // (passage + wall))
+    openings = cells * cells - 1 + braid * (cells - 1) ** 2
+    free = cells * cells * passage * passage + openings * passage * wall
+    return 1 - free / (size * size)
+
+
+def _maze_layout(
+    size: int, density: float, braid: float, passage: int | None, wall: int | None
+) -> tuple[int, int]:
+    """
+    通道宽和墙厚一起选：枚举节距不超过 max(8, size // 16) 的组合（已指定的一项固定不变），
+    取障碍物比例最接近 density 的一组；与最优误差相差不超过 0.01 的组合里取节距最小的，
+    迷宫格更多。
+    """
+    max_pitch = max(8, size // 16, (passage or 0) + (wall or 0) + 1)
+    candidates = []
+    for p in [passage] if passage else range(1, max_pitch):
+        for w in [wall] if wall else range(1, max_pitch - p + 1):
+            error = abs(_maze_obstacle_ratio(size, p, w, braid) - density)
+            candidates.append((error, p + w, p, w))
+    best_error = min(candidates)[0]
+    if best_error > MAZE_DENSITY_TOLERANCE:
+        raise ValueError(
+            f"边长 {size} 的迷宫无法达到障碍物比例 {density}，"
+            f"最接近的比例误差为 {best_error:.3f}"
+        )
+    near = [item for item in candidates if item[0] <= best_error + 0.01]
+    _, _, passage, wall = min(near, key=lambda item: (item[1], item[0]))
+    return passage, wall
+
+
+def generate_maze(
+    size: int,
+    density: float,
+    rng: np.random.Generator,
+    passage: int | None = None,
+    wall: int | None = None,
+    braid: float = 0.0,
+) -> tuple[npt.NDArray[np.uint8], dict]:
+    """
+    二叉树算法：每个迷宫格向上或向左打通一堵墙，所有格子的选择互相独立，可以一次性向量化生成，
+    结果是一个完美迷宫（任意两格之间恰好一条路）。
+    通道宽 passage、墙厚 wall 时障碍物比例约为 wall / (passage + wall)。两者都指定时直接使用；
+    否则按 density 选出未指定的部分（见 _maze_layout），达不到 density 时抛出 ValueError。
+    braid: 额外打通另一个方向的墙的比例，0 是完美迷宫，越大环路越多、死胡同越少。
+    返回的参数里 achieved_density 是实际的障碍物比例。
+    """
+    if not (passage and wall):
+        passage, wall = _maze_layout(size, density, braid, passage, wall)
+    pitch = passage + wall
+    # 迷宫格数，最外圈留一道墙
+    cells = max(1, (size - wall) // pitch)
+    grid = np.ones((size, size), dtype=np.uint8)
+
+    # 迷宫格内部
+    origin = wall + np.arange(cells) * pitch
+    rows, cols = np.meshgrid(origin, origin, indexing="ij")
+    rows, cols = rows.ravel(), cols.ravel()
+    _paint_rects(grid, rows, rows + passage, cols, cols + passage, 0)
+
+    # 每个格子向上 (north) 或向左打通；第一行只能向左，第一列只能向上，左上角不动
+    index_r, index_c = np.meshgrid(np.arange(cells), np.arange(cells), indexing="ij")
+    index_r, index_c = index_r.ravel(), index_c.ravel()
+    north = rng.random(cells * cells) < 0.5
+    north[index_r == 0] = False
+    north[index_c == 0] = True
+    north[(index_r == 0) & (index_c == 0)] = False
+    west = ~north & (index_c > 0)
+    # 编织：部分格子把另一个方向的墙也打通
+    extra = rng.random(cells * cells) < braid
+    north |= extra & (index_r > 0)
+    west |= extra & (index_c > 0)
+
+    _paint_rects(
+        grid,
+        rows[north] - wall,
+        rows[north],
+        cols[north],
+        cols[north] + passage,
+        0,
+    )
+    _paint_rects(
+        grid,
+        rows[west],
+        rows[west] + passage,
+        cols[west] - wall,
+        cols[west],
+        0,
+    )
+    return grid, {
+        "passage": passage,
+        "wall": wall,
+        "braid": braid,
+        "achieved_density": float(np.count_nonzero(grid)) / grid.size,
+    }
+
+
+def generate_rooms(
+    size: int,
+    density: float,
+    rng: np.random.Generator,
+    min_room: int | None = None,
+    max_room: int | None = None,
+    corridor_width: int | None = None,
+) -> tuple[npt.NDArray[np.uint8], dict]:
+    """
+    从全是障碍物的地图开始成批放置随机大小的房间，每个房间的中心用 L 形走廊
+    （先横后竖）连到上一个房间的中心，所有房间连成一个整体，直到障碍物比例降到 density。
+    """
+    min_room = min_room or max(4, size // 64)
+    max_room = max_room or max(min_room + 1, size // 16)
+    corridor_width = corridor_width or max(1, size // 512)
+    grid = np.ones((size, size), dtype=np.uint8)
+    target_free = (1 - density) * size * size
+    free = 0
+    # 每个房间的预计面积加上一条 L 形走廊（随机两点的曼哈顿距离平均约为边长的 2/3）
+    mean_area = ((min_room + max_room) / 2) ** 2 + corridor_width * size * 2 / 3
+    previous: tuple[int, int] | None = None
+    while free < target_free:
+        blocked_fraction = 1 - free / (size * size)
+        count = _batch_count(target_free - free, mean_area * blocked_fraction)
+        heights = rng.integers(min_room, max_room, count, endpoint=True)
+        widths = rng.integers(min_room, max_room, count, endpoint=True)
+        r0 = rng.integers(0, size - heights + 1)
+        c0 = rng.integers(0, size - widths + 1)
+        center_r, center_c = r0 + heights // 2, c0 + widths // 2
+
+        # 相邻两个房间中心之间的 L 形走廊：横段在前一个中心所在的行，竖段在后一个中心所在的列
+        from_r = np.concatenate(
+            ([center_r[0] if previous is None else previous[0]], center_r[:-1])
+        )
+        from_c = np.concatenate(
+            ([center_c[0] if previous is None else previous[1]], center_c[:-1])
+        )
+        half = corridor_width // 2
+        rect_r0 = np.concatenate(
+            (r0, from_r - half, np.minimum(from_r, center_r) - half)
+        )
+        rect_r1 = np.concatenate(
+            (
+                r0 + heights,
+                from_r - half + corridor_width,
+                np.maximum(from_r, center_r) - half + corridor_width,
+            )
+        )
+        rect_c0 = np.concatenate(
+            (c0, np.minimum(from_c, center_c) - half, center_c - half)
+        )
+        rect_c1 = np.concatenate(
+            (
+                c0 + widths,
+                np.maximum(from_c, center_c) - half + corridor_width,
+                center_c - half + corridor_width,
+            )
+        )
+        free += _paint_rects(grid, rect_r0, rect_r1, rect_c0, rect_c1, 0)
+        previous = (int(center_r[-1]), int(center_c[-1]))
+    return grid, {
+        "min_room": min_room,
+        "max_room": max_room,
+        "corridor_width": corridor_width,
+    }
+
+
+def _value_noise(
+    size: int, spacing: int, rng: np.random.Generator
+) -> npt.NDArray[np.float32]:
+    """
+    在间距为 spacing 的格点上取随机值，用 smoothstep 做双线性插值得到平滑的噪声场。
+    先沿行插值再沿列插值，中间结果只有 (size, 格点数)。
+    """
+    points = size // spacing + 2
+    lattice = rng.random((points, points), dtype=np.float32)
+    coords = np.arange(size, dtype=np.float32) / spacing
+    index = coords.astype(np.int64)
+    t = coords - index
+    t = t * t * (3 - 2 * t)
+    along_rows = lattice[index] * (1 - t)[:, None] + lattice[index + 1] * t[:, None]
+    return along_rows[:, index] * (1 - t) + along_rows[:, index + 1] * t
+
+
+def generate_noise(
+    size: int,
+    density: float,
+    rng: np.random.Generator,
+    scale: int | None = None,
+    octaves: int = 4,
+    persistence: float = 0.5,
+) -> tuple[npt.NDArray[np.uint8], dict]:
+    """
+    分形值噪声：第 k 个倍频的格点间距是 scale / 2^k，振幅是 persistence^k，
+    叠加后取噪声值最高的 density 比例的格子作为障碍物，障碍物比例与 density 一致。
+    """
+    scale = scale or max(2, size // 8)
+    field = np.zeros((size, size), dtype=np.float32)
+    amplitude = 1.0
+    for octave in range(octaves):
+        field += np.float32(amplitude) * _value_noise(
+            size, max(1, scale >> octave), rng
+        )
+        amplitude *= persistence
+    params = {"scale": scale, "octaves": octaves, "persistence": persistence}
+    free_points = int(round((1 - density) * size * size))
+    if free_points >= size * size:
+        return np.zeros((size, size), dtype=np.uint8), params
+    threshold = np.partition(field.ravel(), free_points)[free_points]
+    return (field >= threshold).astype(np.uint8), params
+
+
+def generate_circles(
+    size: int,
+    density: float,
+    seed: int,
+    min_radius: int | None = None,
+    max_radius: int | None = None,
+) -> tuple[npt.NDArray[np.uint8], dict]:
+    """
+    圆形斑块，半径范围默认按边长从 8000x8000 的生产地图等比缩放。
+    """
+    scale = size / 8000
+    min_radius = min_radius or max(1, round(MIN_RADIUS * scale))
+    max_radius = max_radius or max(min_radius + 1, round(MAX_RADIUS * scale))
+    grid = create_grid_with_circular_obstacles(
+        size=size,
+        ratio=density,
+        seed=seed,
+        min_radius=min_radius,
+        max_radius=max_radius,
+        progress=False,
+    )
+    return grid, {"min_radius": min_radius, "max_radius": max_radius}
+
+
+def generate_scenario(
+    kind: str, size: int, density: float, seed: int, **params
+) -> tuple[npt.NDArray[np.uint8], dict]:
+    """
+    生成一张场景地图，返回 (网格, 场景描述)。
+    场景描述包含类型、边长、目标障碍物比例、种子和补全了默认值的全部参数，
+    把其中的 params 原样传回来可以重新生成完全相同的网格。
+    """
+    if kind not in SCENARIO_KINDS:
+        raise ValueError(f"不支持的场景类型: {kind}，可选 {list(SCENARIO_KINDS)}")
+    if not 0 <= density < 1:
+        raise ValueError(f"障碍物比例必须在 [0, 1) 内: {density}")
+    params = {k: v for k, v in params.items() if k not in _DERIVED_PARAMS}
+
+    if kind == "circles":
+        grid, resolved = generate_circles(size, density, seed, **params)
+    else:
+        rng = np.random.default_rng(seed)
+        generator = {
+            "corridors": generate_corridors,
+            "maze": generate_maze,
+            "rooms": generate_rooms,
+            "noise": generate_noise,
+        }[kind]
+        grid, resolved = generator(size, density, rng, **params)
+
+    scenario = {
+        "kind": kind,
+        "size": size,
+        "density": density,
+        "seed": seed,
+        "params": resolved,
+        "obstacle_ratio": float(np.count_nonzero(grid)) / grid.size,
+    }
+    return grid, scenario
+
+
+def scenario_filename(kind: str, size: int, density: float, seed: int) -> str:
+    return f"{kind}_{size}_{density:g}_{seed}.npy"
+
+
+def save_scenario(
+    path: str, grid: npt.NDArray[np.uint8], scenario: dict, packed: bool = False
+) -> dict:
+    """
+    保存为网格存储（.npy + .json），场景描述写在元数据的 "scenario" 字段里。
+    """
+    return save_grid_store(path, grid, packed=packed, extra={"scenario": scenario})
+
+
+def load_scenario(path: str, mmap_mode: str | None = "r") -> tuple:
+    """
+    打开场景地图，返回 (网格, 场景描述)。
+    """
+    scenario = read_grid_store_meta(path).get("scenario")
+    if scenario is None:
+        raise ValueError(f"{path} 不是场景地图，元数据中没有 scenario 字段")
+    return open_grid_store(path, mmap_mode=mmap_mode), scenario
+
+
+def generate_corpus(
+    directory: str = CORPUS_DIRECTORY,
+    kinds=SCENARIO_KINDS,
+    sizes=CORPUS_SIZES,
+    densities=CORPUS_DENSITIES,
+    seeds=CORPUS_SEEDS,
+    packed: bool = False,
+) -> list[dict]:
+    """
+    生成 类型 x 边长 x 障碍物比例 x 种子 的全部组合，写入 directory，
+    并把每张地图的文件名、内容哈希和场景描述汇总到 corpus.json。
+    """
+    os.makedirs(directory, exist_ok=True)
+    entries: list[dict] = []
+    for kind in kinds:
+        for size in sizes:
+            for density in densities:
+                for seed in seeds:
+                    filename = scenario_filename(kind, size, density, seed)
+                    grid, scenario = generate_scenario(kind, size, density, seed)
+                    meta = save_scenario(
+                        os.path.join(directory, filename), grid, scenario, packed
+                    )
+                    entries.append(
+                        {"file": filename, "digest": meta["digest"], **scenario}
+                    )
+                    print(
+                        f"  {filename:<32}障碍物比例 {scenario['obstacle_ratio']:.4f}"
+                    )
+    with open(
+        os.path.join(directory, CORPUS_INDEX_FILENAME), "w", encoding="utf-8"
+    ) as f:
+        json.dump(entries, f, indent=2)
+    return entries
+
+
+def main():
+    """
+    主函数：生成默认语料库。
+    """
+    print(f"正在生成场景语料库到 '{CORPUS_DIRECTORY}'...")
+    entries = generate_corpus()
+    print(f"\n共生成 {len(entries)} 张地图，索引保存在 '{CORPUS_INDEX_FILENAME}'")
+
+
+if __name__ == "__main__":
+    main()
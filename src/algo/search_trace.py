@@ -0,0 +1,80 @@
+"""
+A* 搜索的埋点
+
+生产查询变慢时需要知道慢在哪里。把 SearchTrace 传给 get_path_astar_2d_array（或
+get_path_astar_2d 的 "array" 模式），可以得到：
+    邻居生成的累计耗时、按间隔采样的展开轨迹、每次展开的回调，
+    以及搜索结束时的“已展开格子”掩码，可以交给 render.draw_view 叠加显示。
+不传时引擎里只多一次布尔判断，几乎没有开销。
+"""
+from typing import Callable
+
+import numpy as np
+import numpy.typing as npt
+
+from .path_overlay import PathOverlay
+
+# 默认最多保存的采样点数，避免长时间搜索占满内存
+DEFAULT_MAX_SAMPLES = 100_000
+
+# 展开回调：(格子坐标, g 值, 已展开节点数)
+ExpandCallback = Callable[[tuple[int, int], float, int], None]
+
+
+class SearchTrace:
+    """
+    sample_every: 每展开多少个节点采样一次到 samples，0 表示不采样
+    on_expand: 可选的回调，每次展开都会调用（开销较大，只在排查问题时使用）
+    max_samples: samples 的上限，达到后不再追加
+    """
+
+    def __init__(
+        self,
+        sample_every: int = 1,
+        on_expand: ExpandCallback | None = None,
+        max_samples: int = DEFAULT_MAX_SAMPLES,
+    ):
+        self.sample_every = sample_every
+        self.on_expand = on_expand
+        self.max_samples = max_samples
+
+        # (行, 列, g 值, 展开序号)
+        self.samples: list[tuple[int, int, float, int]] = []
+        self.neighbor_time_s = 0.0
+        self.explored: npt.NDArray[np.bool_] | None = None
+
+    def record_expansion(self, r: int, c: int, g: float, order: int) -> None:
+        """
+        由寻路引擎在每次展开时调用，order 从 1 开始。
+        """
+        if (
+            self.sample_every
+            and order % self.sample_every == 0
+            and len(self.samples) < self.max_samples
+        ):
+            self.samples.append((r, c, g, order))
+        if self.on_expand is not None:
+            self.on_expand((r, c), g, order)
+
+    def record_explored(self, explored: npt.NDArray[np.bool_]) -> None:
+        """
+        由寻路引擎在搜索结束时调用，explored 与网格同形状。
+        """
+        self.explored = explored
+
+    def sampled_cells(self) -> npt.NDArray[np.int32]:
+        """
+        采样到的展开格子，形如 (K, 2)，按展开顺序排列。
+        """
+        if not self.samples:
+            return np.zeros((0, 2), dtype=np.int32)
+        return np.array([(r, c) for r, c, _, _ in self.samples], dtype=np.int32)
+
+    def explored_overlay(self) -> PathOverlay:
+        """
+        已展开的格子转成 PathOverlay（不保留顺序），可以用 rasterize 栅格化任意区域。
+        """
+        if self.explored is None:
+            raise ValueError("搜索尚未结束，没有已展开格子的掩码")
+        cells = np.argwhere(self.explored)
+        return PathOverlay.from_path(cells, self.explored.shape)
@@ -23,6 +23,63 @@ def read_map(mapdata):
     return lons, lats, height
 
 
+class LonLatGrid:
+    """
+    原始点到二进制表格的映射，只和经纬度有关，不同高度阈值之间可以复用。
+
+    unique_lons / unique_lats: 排好序的不重复经度、纬度，即表格的列、行对应的坐标
+    lon_idx / lat_idx: 每个原始点所在的列号、行号，与 lons / lats 等长
+    """
+
+    def __init__(self, lons, lats):
+        # return_inverse 直接给出每个点在去重数组中的位置，不需要按浮点数查字典
+        self.unique_lons, self.lon_idx = np.unique(lons, return_inverse=True)
+        self.unique_lats, self.lat_idx = np.unique(lats, return_inverse=True)
+        # 网格大小，行数、列数
+        self.shape = (len(self.unique_lats), len(self.unique_lons))
+        # 按 (行号, 列号) 排序的原始点下标：同一行内一段连续列上的点，排序后也是连续的一段
+        cells = self.lat_idx.astype(np.int64) * self.shape[1] + self.lon_idx
+        self.cell_order = np.argsort(cells, kind="stable")
+        self.sorted_cells = cells[self.cell_order]
+
+    def box_ranges(
+        self, lon_min: float, lon_max: float, lat_min: float, lat_max: float
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        经纬度落在闭区间矩形内的原始点，在 cell_order 中按行分成若干段，
+        返回各段的 (起始位置, 长度)。只查看矩形覆盖的表格行。
+        """
+        col_start = np.searchsorted(self.unique_lons, lon_min, side="left")
+        col_stop = np.searchsorted(self.unique_lons, lon_max, side="right")
+        row_start = np.searchsorted(self.unique_lats, lat_min, side="left")
+        row_stop = np.searchsorted(self.unique_lats, lat_max, side="right")
+        if col_start >= col_stop or row_start >= row_stop:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        rows = np.arange(row_start, row_stop, dtype=np.int64) * self.shape[1]
+        starts = np.searchsorted(self.sorted_cells, rows + col_start, side="left")
+        stops = np.searchsorted(self.sorted_cells, rows + col_stop, side="left")
+        return starts, stops - starts
+
+    def points_in_box(
+        self, lon_min: float, lon_max: float, lat_min: float, lat_max: float
+    ) -> np.ndarray:
+        """
+        经纬度落在闭区间矩形内的原始点下标（按行、列排序）。
+        """
+        starts, sizes = self.box_ranges(lon_min, lon_max, lat_min, lat_max)
+        position = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        return self.cell_order[np.repeat(starts, sizes) + position]
+
+    def binary_grid(self, selected) -> np.ndarray:
+        """
+        把 selected（布尔掩码或下标数组）选中的原始点标记为 True，返回布尔表格。
+        """
+        binary_grid = np.zeros(self.shape, dtype=bool)
+        binary_grid[self.lat_idx[selected], self.lon_idx[selected]] = True
+        return binary_grid
+
+
 # ======================= 【新增】椭圆包含关系检测和去重 =======================
 def is_ellipse_contained(
     ellipse1: Dict[str, float], ellipse2: Dict[str, float]
@@ -58,7 +115,132 @@ def is_ellipse_contained(
     return np.all(ellipse2_equation <= 1.0)
 
 
-def get_ellipse_original_points(lons, lats, heights, height_threshold):
+# is_ellipse_contained 在椭圆 1 边界上采样的 36 个点的方向余弦、正弦，批量检测时共用
+_BOUNDARY_ANGLES = np.linspace(0, 2 * np.pi, 36)
+_BOUNDARY_COS = np.cos(_BOUNDARY_ANGLES)
+_BOUNDARY_SIN = np.sin(_BOUNDARY_ANGLES)
+# 批量检测时每批最多的候选椭圆对数，限制 (对数, 36) 临时数组的大小
+_CANDIDATE_PAIRS_PER_BATCH = 1 << 16
+# 圈选椭圆附近的环带：椭圆方程左侧值在 [0.97, 1.03] 内的点
+RING_INNER = 0.97
+RING_OUTER = 1.03
+# 环带外接矩形的相对放大量，只用来粗筛，保证浮点误差（包括 float32 的经纬度）不会漏掉点
+_RING_BOX_PAD = 1e-4
+
+
+def _ellipses_contained_batch(inner, outer) -> np.ndarray:
+    """
+    is_ellipse_contained 的向量化版本：inner、outer 都是形如 (4, P) 的数组，
+    每列是 (中心经度, 中心纬度, a_lon, b_lat)，返回长度为 P 的布尔数组，
+    表示 inner 的每个椭圆是否被同一列的 outer 椭圆包含。面积的比较由调用方完成。
+    逐个元素的运算顺序与 is_ellipse_contained 相同，结果逐位一致。
+    """
+    center1_lon, center1_lat, a1, b1 = (v[:, None] for v in inner)
+    center2_lon, center2_lat, a2, b2 = (v[:, None] for v in outer)
+    boundary_lons = center1_lon + a1 * _BOUNDARY_COS
+    boundary_lats = center1_lat + b1 * _BOUNDARY_SIN
+    relative_lons = boundary_lons - center2_lon
+    relative_lats = boundary_lats - center2_lat
+    ellipse2_equation = (relative_lons**2 / a2**2) + (relative_lats**2 / b2**2)
+    return np.all(ellipse2_equation <= 1.0, axis=1)
+
+
+def find_contained_ellipses(ellipse_info_list) -> np.ndarray:
+    """
+    返回布尔数组，标记每个椭圆是否被列表中另一个面积更大的椭圆包含，
+    结果与对所有有序对调用 is_ellipse_contained 的双层循环相同。
+
+    椭圆 1 被椭圆 2 包含时，椭圆 1 的采样边界点一定落在椭圆 2 的外接矩形内，
+    所以先用外接矩形筛选候选对：按宽度把候选容器分成若干档（同一档内宽度相差不超过一倍），
+    每一档按左边界排序，扫描线只需要查看左边界落在 [采样点最右 - 本档最大宽度, 采样点最左] 内的容器，
+    再按右边界、上下边界和面积过滤，最后对剩下的候选对批量做精确检测。
+    """
+    count = len(ellipse_info_list)
+    contained = np.zeros(count, dtype=bool)
+    if count < 2:
+        return contained
+
+    params = np.array(
+        [
+            [e["center_lon"], e["center_lat"], e["a_lon"], e["b_lat"]]
+            for e in ellipse_info_list
+        ],
+        dtype=np.float64,
+    ).T
+    areas = np.array([e["area"] for e in ellipse_info_list], dtype=np.float64)
+    center_lon, center_lat, a_lon, b_lat = params
+
+    # 椭圆 1 采样边界点的范围
+    sample_lon_min = center_lon + a_lon * _BOUNDARY_COS.min()
+    sample_lon_max = center_lon + a_lon * _BOUNDARY_COS.max()
+    sample_lat_min = center_lat + b_lat * _BOUNDARY_SIN.min()
+    sample_lat_max = center_lat + b_lat * _BOUNDARY_SIN.max()
+    # 容器的外接矩形，稍微放大一点，保证浮点误差不会漏掉真正的容器
+    pad_lon = 1e-9 * (np.abs(center_lon) + a_lon)
+    pad_lat = 1e-9 * (np.abs(center_lat) + b_lat)
+    box_lon_min = center_lon - a_lon - pad_lon
+    box_lon_max = center_lon + a_lon + pad_lon
+    box_lat_min = center_lat - b_lat - pad_lat
+    box_lat_max = center_lat + b_lat + pad_lat
+
+    width_class = np.floor(np.log2(box_lon_max - box_lon_min)).astype(np.int64)
+    for width in np.unique(width_class):
+        # 本档的容器按左边界排序
+        members = np.flatnonzero(width_class == width)
+        members = members[np.argsort(box_lon_min[members], kind="stable")]
+        sorted_lon_min = box_lon_min[members]
+        max_width = (box_lon_max[members] - sorted_lon_min).max()
+
+        # 已经确定被包含的椭圆不需要再找容器
+        pending = np.flatnonzero(~contained)
+        window_start = np.searchsorted(
+            sorted_lon_min, sample_lon_max[pending] - max_width, side="left"
+        )
+        window_stop = np.searchsorted(
+            sorted_lon_min, sample_lon_min[pending], side="right"
+        )
+        window_size = np.maximum(window_stop - window_start, 0)
+
+        # 按候选对数分批展开 (椭圆, 容器) 对
+        cumulative = np.cumsum(window_size)
+        batch_start = 0
+        while batch_start < len(pending):
+            offset = cumulative[batch_start - 1] if batch_start else 0
+            batch_stop = max(
+                batch_start + 1,
+                int(
+                    np.searchsorted(
+                        cumulative, offset + _CANDIDATE_PAIRS_PER_BATCH, side="right"
+                    )
+                ),
+            )
+            sizes = window_size[batch_start:batch_stop]
+            inner = np.repeat(pending[batch_start:batch_stop], sizes)
+            position = np.arange(sizes.sum()) - np.repeat(
+                np.cumsum(sizes) - sizes, sizes
+            )
+            outer = members[
+                np.repeat(window_start[batch_start:batch_stop], sizes) + position
+            ]
+            batch_start = batch_stop
+
+            candidate = (
+                (areas[inner] < areas[outer])
+                & (box_lon_max[outer] >= sample_lon_max[inner])
+                & (box_lat_min[outer] <= sample_lat_min[inner])
+                & (box_lat_max[outer] >= sample_lat_max[inner])
+            )
+            inner, outer = inner[candidate], outer[candidate]
+            if len(inner) == 0:
+                continue
+            is_contained = _ellipses_contained_batch(params[:, inner], params[:, outer])
+            contained[inner[is_contained]] = True
+    return contained
+
+
+def get_ellipse_original_points(
+    lons, lats, heights, height_threshold, lon_lat_grid: LonLatGrid | None = None
+):
     """
     根据高度阈值筛选点，识别这些点形成的离散矩形区域，
     然后为每个矩形计算其外接椭圆，并返回所有被这些椭圆圈选中的原始经度点和纬度点。
@@ -69,6 +251,8 @@ def get_ellipse_original_points(lons, lats, heights, height_threshold):
     lats : 纬度numpy数组。
     heights : 高度numpy数组。
     height_threshold : 高度阈值。
+    lon_lat_grid : 可选，由同一组 lons、lats 构建的 LonLatGrid。
+                   对同一份数据处理多个阈值时构建一次传进来，省去每次的排序去重。
 
     返回:
     tuple: 包含两个numpy数组的元组 (lons_in_ellipse_result, lats_in_ellipse_result)。
@@ -80,36 +264,19 @@ def get_ellipse_original_points(lons, lats, heights, height_threshold):
 
     # 第一步：根据高度阈值筛选经纬度
     above_threshold_indices = np.where(heights > height_threshold)[0]
-    lons_above_threshold = lons[above_threshold_indices]
-    lats_above_threshold = lats[above_threshold_indices]
 
-    if lons_above_threshold.size == 0:
+    if above_threshold_indices.size == 0:
         print("没有找到高于高度阈值的点。")
-        return np.array([]), np.array([])
+        return np.array([]), np.array([]), np.array([])
 
     # 第二步：识别离散的矩形区域，用二进制表格做的
-    unique_lons = np.unique(lons)
-    unique_lats = np.unique(lats)
-
-    # 网格大小，行数、列数
-    grid_shape = (len(unique_lats), len(unique_lons))
-
-    # 二进制表格，初始默认全是 0
-    binary_grid = np.zeros(grid_shape, dtype=int)
-
-    # 定义原始经度、纬度，到二进制表格的映射关系
-    lon_to_idx = dict()
-    lat_to_idx = dict()
-    for i, lon in enumerate(unique_lons):
-        lon_to_idx[lon] = i
-    for i, lat in enumerate(unique_lats):
-        lat_to_idx[lat] = i
+    if lon_lat_grid is None:
+        lon_lat_grid = LonLatGrid(lons, lats)
+    unique_lons = lon_lat_grid.unique_lons
+    unique_lats = lon_lat_grid.unique_lats
 
-    # 将高度高于阈值的二进制格子，值赋为 1
-    for i in range(lons_above_threshold.size):
-        lon_idx = lon_to_idx[lons_above_threshold[i]]
-        lat_idx = lat_to_idx[lats_above_threshold[i]]
-        binary_grid[lat_idx, lon_idx] = 1
+    # 二进制表格（布尔类型，每格 1 字节），高度高于阈值的格子为 True
+    binary_grid = lon_lat_grid.binary_grid(above_threshold_indices)
 
     # 使用四连通规则，找出二进制表格上所有互相连接的 1 的区域
     four_connectivity_structure = np.array([[0, 1, 0], [1, 1, 1], [0, 1, 0]])
@@ -170,63 +337,75 @@ def get_ellipse_original_points(lons, lats, heights, height_threshold):
     # 按面积从小到大排序，优先检查小椭圆
     ellipse_info_list.sort(key=lambda x: x["area"])
 
-    # 双层循环标记需要保留的有效椭圆
-    valid_ellipses = []
-    for i, ellipse in enumerate(ellipse_info_list):
-        is_contained = False
-        # 检查当前椭圆是否被其他椭圆包含
-        for j, other_ellipse in enumerate(ellipse_info_list):
-            if i != j and is_ellipse_contained(ellipse, other_ellipse):
-                is_contained = True
-                break
-        if not is_contained:
-            valid_ellipses.append(ellipse)
+    # 用外接矩形筛选候选容器后批量检测，标记需要保留的有效椭圆
+    contained = find_contained_ellipses(ellipse_info_list)
+    valid_ellipses = [
+        ellipse
+        for ellipse, is_contained in zip(ellipse_info_list, contained)
+        if not is_contained
+    ]
 
     print(f"去重前椭圆数量: {len(ellipse_info_list)}")
     print(f"去重后椭圆数量: {len(valid_ellipses)}")
 
     # ======================= 【修改】使用去重后的椭圆列表处理原始点 =======================
-    # 用于聚合所有被外接圆圈选的原始经度和纬度点和高度
-    all_lons_in_ellipse = []
-    all_lats_in_ellipse = []
-    all_heights_in_ellipse = []
+    # 环带一定落在椭圆外接矩形按 √1.03 放大后的范围内，
+    # 利用表格只取出矩形内的原始点计算椭圆方程，不再对全部原始点逐个椭圆计算
+    ring_boxes = []
+    for ellipse_info_dict in valid_ellipses:
+        extent_lon = ellipse_info_dict["a_lon"] * np.sqrt(RING_OUTER)
+        extent_lat = ellipse_info_dict["b_lat"] * np.sqrt(RING_OUTER)
+        extent_lon += extent_lon * _RING_BOX_PAD
+        extent_lat += extent_lat * _RING_BOX_PAD
+        ring_boxes.append(
+            (
+                ellipse_info_dict["center_lon"] - extent_lon,
+                ellipse_info_dict["center_lon"] + extent_lon,
+                ellipse_info_dict["center_lat"] - extent_lat,
+                ellipse_info_dict["center_lat"] + extent_lat,
+            )
+        )
+
+    # 矩形内的点数是结果点数的上限，据此一次性分配存放结果下标的缓冲区
+    capacity = sum(int(lon_lat_grid.box_ranges(*box)[1].sum()) for box in ring_boxes)
+    selected_indices = np.empty(capacity, dtype=np.int64)
+    selected_count = 0
 
     # 遍历每个有效的椭圆
-    for ellipse_info_dict in valid_ellipses:
+    for ellipse_info_dict, ring_box in zip(valid_ellipses, ring_boxes):
         center_lon = ellipse_info_dict["center_lon"]
         center_lat = ellipse_info_dict["center_lat"]
         a_lon = ellipse_info_dict["a_lon"]
         b_lat = ellipse_info_dict["b_lat"]
 
-        # 计算所有原始点到椭圆中心的相对坐标
-        relative_lons = lons - center_lon
-        relative_lats = lats - center_lat
+        # 外接矩形内的原始点，按原始顺序排列（与逐点扫描全部原始点时的顺序一致）
+        candidate_indices = np.sort(lon_lat_grid.points_in_box(*ring_box))
+
+        # 计算这些点到椭圆中心的相对坐标
+        relative_lons = lons[candidate_indices] - center_lon
+        relative_lats = lats[candidate_indices] - center_lat
 
         # 计算椭圆方程的左侧值
         ellipse_equation_lhs = (relative_lons**2 / a_lon**2) + (
             relative_lats**2 / b_lat**2
         )
 
-        # 筛选出距离小于等于椭圆方程左侧值小于等于1的点，也就是在椭圆内的点
-        # 同样筛选靠近边界的环带
-        condition_1 = ellipse_equation_lhs <= 1.03
-        condition_2 = ellipse_equation_lhs >= 0.97
-        in_ellipse_indices = np.where(condition_1 & condition_2)[0]
-
-        # 提取被当前圆圈选中的原始经度点和纬度点
-        temp_lons_in_ellipse = lons[in_ellipse_indices]
-        temp_lats_in_ellipse = lats[in_ellipse_indices]
-        temp_heights_in_ellipse = heights[in_ellipse_indices]
+        # 筛选出椭圆方程左侧值在 1 附近的点，也就是靠近椭圆边界的环带
+        condition_1 = ellipse_equation_lhs <= RING_OUTER
+        condition_2 = ellipse_equation_lhs >= RING_INNER
+        in_ellipse_indices = candidate_indices[condition_1 & condition_2]
 
-        # 添加到总列表中
-        all_lons_in_ellipse.extend(temp_lons_in_ellipse)
-        all_lats_in_ellipse.extend(temp_lats_in_ellipse)
-        all_heights_in_ellipse.extend(temp_heights_in_ellipse)
+        # 写入结果缓冲区
+        selected_indices[selected_count : selected_count + len(in_ellipse_indices)] = (
+            in_ellipse_indices
+        )
+        selected_count += len(in_ellipse_indices)
 
-    # 转变为 numpy array，返回。
-    lons_in_ellipse_result = np.array(all_lons_in_ellipse)
-    lats_in_ellipse_result = np.array(all_lats_in_ellipse)
-    heights_in_ellipse_result = np.array(all_heights_in_ellipse)
+    # 按下标一次性取出被圈选的原始经度、纬度和高度
+    selected_indices = selected_indices[:selected_count]
+    lons_in_ellipse_result = lons[selected_indices]
+    lats_in_ellipse_result = lats[selected_indices]
+    heights_in_ellipse_result = heights[selected_indices]
 
     return lons_in_ellipse_result, lats_in_ellipse_result, heights_in_ellipse_result
 
@@ -238,6 +417,8 @@ if __name__ == "__main__":
     mapdata = folder_path + "/" + "geotiff_coordinates.parquet"
 
     map_lons, map_lats, map_heights = read_map(mapdata)
+    # 经纬度到表格的映射与高度阈值无关，只构建一次
+    map_grid = LonLatGrid(map_lons, map_lats)
 
     date_str = datetime.datetime.now().strftime("%Y%m%d-%H:%M:%S")
 
@@ -246,7 +427,7 @@ if __name__ == "__main__":
 
         # 获取圈选的坐标数据
         lons_in_shape, lats_in_shape, heights_in_shape = get_ellipse_original_points(
-            map_lons, map_lats, map_heights, height_threshold
+            map_lons, map_lats, map_heights, height_threshold, map_grid
         )
 
         display_terrain_list = []
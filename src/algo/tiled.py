@@ -0,0 +1,357 @@
+"""
+分块网格存储与分块 A*
+
+40000x40000 以上的网格放不进内存，更放不下逐格的搜索状态。
+网格按 tile_size x tile_size 切成块，每块按位打包（可选 zlib 压缩）单独存成一个文件，
+全是空地的块不落盘；读取时按需加载，用 LRU 缓存最近用到的块。
+
+分块 A* 的搜索状态（g 值、父节点方向、关闭标记）也按块分配，
+只有搜索实际经过的块才会占内存，内存上限由被触及的块数决定，而不是整张网格的大小。
+
+目录结构：
+    <directory>/meta.json          形状、块大小、压缩方式、内容哈希
+    <directory>/<tr>_<tc>.bin      第 tr 行第 tc 列的块
+"""
+import heapq
+import json
+import os
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+import numpy.typing as npt
+
+from .astar import (
+    MOVE_COST_DIAGONAL,
+    MOVE_COST_STRAIGHT,
+    NEIGHBORS_MOVES,
+    Coord,
+    OccupancyGrid,
+    Path,
+    grid_digest,
+)
+
+DEFAULT_TILE_SIZE = 1024
+DEFAULT_CACHE_TILES = 64
+TILE_COMPRESSIONS = ("none", "zlib")
+# 每个格子的搜索状态：float32 g 值 + int8 父节点方向 + uint8 关闭标记 + uint8 可通行表
+_STATE_BYTES_PER_CELL = 4 + 1 + 1 + 1
+
+
+def tiled_meta_path(directory: str) -> str:
+    return os.path.join(directory, "meta.json")
+
+
+def tile_path(directory: str, tile_row: int, tile_col: int) -> str:
+    return os.path.join(directory, f"{tile_row}_{tile_col}.bin")
+
+
+class _TiledRow:
+    """
+    单行的只读视图，让 grid[r][c] 这种写法也能用在 TiledGrid 上。
+    """
+
+    __slots__ = ("_grid", "_r")
+
+    def __init__(self, grid: "TiledGrid", r: int):
+        self._grid = grid
+        self._r = r
+
+    def __getitem__(self, c: int) -> int:
+        tile_size = self._grid.tile_size
+        tile = self._grid.tile(self._r // tile_size, c // tile_size)
+        return int(tile[self._r % tile_size, c % tile_size])
+
+
+class TiledGrid:
+    """
+    按需加载的分块网格，tile() 返回 tile_size x tile_size 的 uint8 数组（0 可通行，1 障碍物），
+    边缘块超出网格的部分补成障碍物。
+    """
+
+    def __init__(self, directory: str, cache_tiles: int = DEFAULT_CACHE_TILES):
+        with open(tiled_meta_path(directory), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("compression") not in TILE_COMPRESSIONS:
+            raise ValueError(f"不支持的块压缩方式: {meta.get('compression')}")
+        self.directory = directory
+        self.meta = meta
+        self.shape = (int(meta["shape"][0]), int(meta["shape"][1]))
+        self.tile_size = int(meta["tile_size"])
+        self.compression = meta["compression"]
+        self.tile_rows = -(-self.shape[0] // self.tile_size)
+        self.tile_cols = -(-self.shape[1] // self.tile_size)
+
+        self.cache_tiles = cache_tiles
+        self._cache: "OrderedDict[tuple[int, int], npt.NDArray[np.uint8]]" = (
+            OrderedDict()
+        )
+        self.tile_loads = 0
+        self.tile_hits = 0
+
+    @property
+    def digest(self) -> str:
+        return self.meta["digest"]
+
+    def __getitem__(self, r: int) -> _TiledRow:
+        return _TiledRow(self, r)
+
+    def _load_tile(self, tile_row: int, tile_col: int) -> npt.NDArray[np.uint8]:
+        size = self.tile_size
+        path = tile_path(self.directory, tile_row, tile_col)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            if self.compression == "zlib":
+                data = zlib.decompress(data)
+            packed = np.frombuffer(data, dtype=np.uint8).reshape(size, size // 8)
+            tile = np.unpackbits(packed, axis=1)
+        else:
+            tile = np.zeros((size, size), dtype=np.uint8)
+
+        # 边缘块超出网格的部分当作障碍物
+        valid_rows = self.shape[0] - tile_row * size
+        valid_cols = self.shape[1] - tile_col * size
+        tile[valid_rows:, :] = 1
+        tile[:, valid_cols:] = 1
+        return tile
+
+    def tile(self, tile_row: int, tile_col: int) -> npt.NDArray[np.uint8]:
+        key = (tile_row, tile_col)
+        tile = self._cache.get(key)
+        if tile is not None:
+            self._cache.move_to_end(key)
+            self.tile_hits += 1
+            return tile
+        tile = self._load_tile(tile_row, tile_col)
+        self.tile_loads += 1
+        self._cache[key] = tile
+        if len(self._cache) > self.cache_tiles:
+            self._cache.popitem(last=False)
+        return tile
+
+    def is_free(self, r: int, c: int) -> bool:
+        rows, cols = self.shape
+        if not (0 <= r < rows and 0 <= c < cols):
+            return False
+        size = self.tile_size
+        return self.tile(r // size, c // size)[r % size, c % size] == 0
+
+    def to_dense(
+        self, r0: int = 0, r1: int | None = None, c0: int = 0, c1: int | None = None
+    ) -> npt.NDArray[np.uint8]:
+        """
+        把 [r0:r1, c0:c1] 区域拼成 uint8 数组（0 可通行，1 障碍物）。
+        """
+        r1 = self.shape[0] if r1 is None else r1
+        c1 = self.shape[1] if c1 is None else c1
+        size = self.tile_size
+        window = np.empty((r1 - r0, c1 - c0), dtype=np.uint8)
+        for tile_row in range(r0 // size, -(-r1 // size)):
+            for tile_col in range(c0 // size, -(-c1 // size)):
+                tile = self.tile(tile_row, tile_col)
+                tr0, tc0 = tile_row * size, tile_col * size
+                rs, re = max(r0, tr0), min(r1, tr0 + size)
+                cs, ce = max(c0, tc0), min(c1, tc0 + size)
+                window[rs - r0 : re - r0, cs - c0 : ce - c0] = tile[
+                    rs - tr0 : re - tr0, cs - tc0 : ce - tc0
+                ]
+        return window
+
+
+def save_tiled_grid(
+    directory: str,
+    grid: OccupancyGrid,
+    tile_size: int = DEFAULT_TILE_SIZE,
+    compression: str = "zlib",
+) -> dict:
+    """
+    把网格切块写入 directory，返回元数据。grid 可以是内存映射数组或 BitGrid，
+    每次只读取一个块大小的区域。
+    """
+    if compression not in TILE_COMPRESSIONS:
+        raise ValueError(f"不支持的块压缩方式: {compression}")
+    if tile_size <= 0 or tile_size % 8:
+        raise ValueError(f"块大小必须是 8 的正整数倍: {tile_size}")
+    os.makedirs(directory, exist_ok=True)
+    rows, cols = grid.shape
+    stored_tiles = 0
+    for tile_row in range(-(-rows // tile_size)):
+        r0 = tile_row * tile_size
+        r1 = min(rows, r0 + tile_size)
+        for tile_col in range(-(-cols // tile_size)):
+            c0 = tile_col * tile_size
+            c1 = min(cols, c0 + tile_size)
+            if hasattr(grid, "to_dense"):
+                block = grid.to_dense(r0, r1, c0, c1)
+            else:
+                block = np.asarray(grid[r0:r1, c0:c1])
+            path = tile_path(directory, tile_row, tile_col)
+            if not block.any():
+                # 全空的块不落盘，读取时按全空处理
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            tile = np.zeros((tile_size, tile_size), dtype=bool)
+            tile[: r1 - r0, : c1 - c0] = block != 0
+            data = np.packbits(tile, axis=1).tobytes()
+            if compression == "zlib":
+                data = zlib.compress(data, 1)
+            with open(path, "wb") as f:
+                f.write(data)
+            stored_tiles += 1
+
+    meta = {
+        "shape": [rows, cols],
+        "tile_size": tile_size,
+        "compression": compression,
+        "digest": grid_digest(grid),
+        "stored_tiles": stored_tiles,
+    }
+    with open(tiled_meta_path(directory), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def open_tiled_grid(
+    directory: str, cache_tiles: int = DEFAULT_CACHE_TILES
+) -> TiledGrid:
+    return TiledGrid(directory, cache_tiles)
+
+
+class _TileState:
+    """
+    单个块的搜索状态，parent 存的是从父节点走到本格的方向（NEIGHBORS_MOVES 的下标）。
+    """
+
+    __slots__ = ("free", "g", "parent", "closed", "_arrays")
+
+    def __init__(self, tile: npt.NDArray[np.uint8]):
+        cells = tile.size
+        free_array = (tile.reshape(-1) == 0).view(np.uint8)
+        g_array = np.full(cells, np.inf, dtype=np.float32)
+        parent_array = np.full(cells, -1, dtype=np.int8)
+        closed_array = np.zeros(cells, dtype=np.uint8)
+        # 持有数组本身，memoryview 才不会失效
+        self._arrays = (free_array, g_array, parent_array, closed_array)
+        self.free = memoryview(free_array)
+        self.g = memoryview(g_array)
+        self.parent = memoryview(parent_array)
+        self.closed = memoryview(closed_array)
+
+
+def get_path_astar_tiled(
+    grid: TiledGrid,
+    start: Coord,
+    end: Coord,
+    stats: dict | None = None,
+    max_tiles: int | None = None,
+) -> Path:
+    """
+    在分块网格上做 A*，移动规则和返回格式与 get_path_astar_2d 相同。
+
+    搜索状态按块分配，stats 中的 tiles_touched / state_bytes 给出实际占用。
+    max_tiles: 可选，触及的块数超过该值时放弃搜索并返回空数组，用来限制内存
+    """
+    begin = time.perf_counter()
+    rows, cols = grid.shape
+    size = grid.tile_size
+    start = (int(start[0]), int(start[1]))
+    end = (int(end[0]), int(end[1]))
+    if not (grid.is_free(*start) and grid.is_free(*end)):
+        return np.array([])
+
+    states: dict[tuple[int, int], _TileState] = {}
+
+    def state_of(tile_row: int, tile_col: int) -> _TileState:
+        key = (tile_row, tile_col)
+        state = states.get(key)
+        if state is None:
+            state = _TileState(grid.tile(tile_row, tile_col))
+            states[key] = state
+        return state
+
+    end_r, end_c = end
+    straight = MOVE_COST_STRAIGHT
+    diagonal_extra = MOVE_COST_DIAGONAL - MOVE_COST_STRAIGHT
+    moves = [
+        (dr, dc, cost, code) for code, ((dr, dc), cost) in enumerate(NEIGHBORS_MOVES)
+    ]
+    heappush, heappop = heapq.heappush, heapq.heappop
+
+    start_state = state_of(start[0] // size, start[1] // size)
+    start_state.g[(start[0] % size) * size + start[1] % size] = 0.0
+    # 堆里存 (f, g, r, c)，g 用于识别过期条目
+    open_set: list[tuple[float, float, int, int]] = [(0.0, 0.0, start[0], start[1])]
+    expansions = pushes = 0
+    found = False
+    exceeded = False
+
+    while open_set:
+        _, current_g, r, c = heappop(open_set)
+        state = state_of(r // size, c // size)
+        local = (r % size) * size + c % size
+        if state.closed[local]:
+            continue
+        state.closed[local] = 1
+        expansions += 1
+        if r == end_r and c == end_c:
+            found = True
+            break
+
+        for dr, dc, move_cost, code in moves:
+            nr, nc = r + dr, c + dc
+            if not (0 <= nr < rows and 0 <= nc < cols):
+                continue
+            neighbor_state = state_of(nr // size, nc // size)
+            neighbor_local = (nr % size) * size + nc % size
+            if (
+                not neighbor_state.free[neighbor_local]
+                or neighbor_state.closed[neighbor_local]
+            ):
+                continue
+            tentative_g = current_g + move_cost
+            if tentative_g < neighbor_state.g[neighbor_local]:
+                neighbor_state.g[neighbor_local] = tentative_g
+                neighbor_state.parent[neighbor_local] = code
+                dx = nr - end_r if nr > end_r else end_r - nr
+                dy = nc - end_c if nc > end_c else end_c - nc
+                if dx > dy:
+                    h = straight * dx + diagonal_extra * dy
+                else:
+                    h = straight * dy + diagonal_extra * dx
+                heappush(open_set, (tentative_g + h, tentative_g, nr, nc))
+                pushes += 1
+
+        if max_tiles is not None and len(states) > max_tiles:
+            exceeded = True
+            break
+
+    path: Path = np.array([])
+    if found:
+        cells: list[Coord] = []
+        r, c = end
+        while True:
+            cells.append((r, c))
+            state = states[(r // size, c // size)]
+            code = state.parent[(r % size) * size + c % size]
+            if code < 0:
+                break
+            (dr, dc), _ = NEIGHBORS_MOVES[code]
+            r, c = r - dr, c - dc
+        path = np.array(cells[::-1])
+
+    if stats is not None:
+        tile_cells = size * size
+        stats.update(
+            expansions=expansions,
+            pushes=pushes,
+            tiles_touched=len(states),
+            max_tiles_exceeded=exceeded,
+            tile_loads=grid.tile_loads,
+            tile_hits=grid.tile_hits,
+            state_bytes=len(states) * tile_cells * _STATE_BYTES_PER_CELL,
+            elapsed_s=time.perf_counter() - begin,
+        )
+    return path
@@ -0,0 +1,277 @@
+# path_service/main.py
+
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+import numpy as np
+
+# FastAPI 框架相关
+from fastapi import FastAPI, HTTPException, Request, Response, status
+
+# 寻路算法：只导入寻路和网格存储，不会加载 matplotlib
+from algo.grid_store import open_grid_store, read_grid_store_meta
+from algo.path_cache import PathCache
+
+# 从当前应用模块导入应用配置、进程池任务和 Pydantic schema
+from .settings import settings
+from .planner import init_worker, plan_chunk
+from . import schemas
+
+# ------------------- 日志配置 -----------------------------
+logger = logging.getLogger("PathServiceLogger")
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler(sys.stdout)
+handler.setLevel(logging.INFO)
+
+formatter = logging.Formatter(
+    "%(asctime)s - %(name)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+)
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+
+# ------------------- 初始化部分 -------------------
+
+# 服务支持的寻路模式（get_path_astar_2d 的 mode 参数）
+VALID_MODES = ("classic", "array", "jps")
+
+
+class ServiceState:
+    """
+    应用运行期间共享的状态：网格元数据、进程池、路径缓存和统计信息。
+    """
+
+    def __init__(self):
+        self.grid = None
+        self.shape: tuple[int, int] = (0, 0)
+        self.digest = ""
+        self.pool: ProcessPoolExecutor | None = None
+        self.cache: PathCache | None = None
+        # 已提交到进程池但尚未完成的任务数
+        self.queue_depth = 0
+        self.requests = 0
+        self.latencies_ms: deque = deque(maxlen=settings.LATENCY_WINDOW)
+
+
+state = ServiceState()
+
+
+# ------------------- 核心业务逻辑 -------------------
+
+
+def validate_query(start: list[int], end: list[int]) -> None:
+    rows, cols = state.shape
+    for name, (r, c) in (("start", start), ("end", end)):
+        if not (0 <= r < rows and 0 <= c < cols):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"{name} {[r, c]} 超出网格范围 {list(state.shape)}",
+            )
+
+
+def resolve_mode(mode: str | None) -> str:
+    mode = mode or settings.DEFAULT_MODE
+    if mode not in VALID_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"不支持的寻路模式: {mode}，可选 {list(VALID_MODES)}",
+        )
+    return mode
+
+
+async def run_in_pool(
+    queries: list[tuple], mode: str
+) -> list[tuple[np.ndarray, float]]:
+    """
+    把一组查询交给进程池，事件循环在等待期间不会被阻塞。
+    """
+    loop = asyncio.get_running_loop()
+    state.queue_depth += 1
+    try:
+        return await loop.run_in_executor(state.pool, plan_chunk, queries, mode)
+    finally:
+        state.queue_depth -= 1
+
+
+def to_result(path: np.ndarray, plan_s: float, cached: bool) -> schemas.PathResult:
+    return schemas.PathResult(
+        found=len(path) > 0,
+        length=len(path),
+        path=path.tolist(),
+        plan_ms=plan_s * 1000,
+        cached=cached,
+    )
+
+
+async def plan_queries(
+    queries: list[schemas.PathQuery], mode: str
+) -> list[tuple[np.ndarray, float, bool]]:
+    """
+    先查缓存，未命中的查询按 BATCH_CHUNK_SIZE 分块并发提交到进程池，结果按原顺序返回。
+    """
+    results: list[tuple[np.ndarray, float, bool] | None] = [None] * len(queries)
+    pending: list[int] = []
+    for i, query in enumerate(queries):
+        cached = None
+        if state.cache is not None:
+            cached = state.cache.lookup(
+                PathCache.make_key(state.digest, query.start, query.end, mode)
+            )
+        if cached is not None:
+            results[i] = (cached, 0.0, True)
+        else:
+            if state.cache is not None:
+                state.cache.record_miss()
+            pending.append(i)
+
+    chunk_size = max(1, settings.BATCH_CHUNK_SIZE)
+    chunks = [pending[i : i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    chunk_results = await asyncio.gather(
+        *(
+            run_in_pool([(queries[i].start, queries[i].end) for i in chunk], mode)
+            for chunk in chunks
+        )
+    )
+    for chunk, planned in zip(chunks, chunk_results):
+        for i, (path, plan_s) in zip(chunk, planned):
+            if state.cache is not None:
+                key = PathCache.make_key(
+                    state.digest, queries[i].start, queries[i].end, mode
+                )
+                path = state.cache.store(key, path)
+            results[i] = (path, plan_s, False)
+    return results
+
+
+# ------------------- FastAPI 生命周期事件 -------------------
+
+
+@asynccontextmanager
+async def lifespan(fastapi_app: FastAPI):
+    """
+    启动时内存映射网格、创建进程池；关闭时释放进程池。
+    """
+    # --- 应用启动时 ---
+    logger.info("应用启动...")
+    meta = read_grid_store_meta(settings.GRID_STORE_PATH)
+    # 主进程只用网格做范围检查，内存映射打开几乎没有开销
+    state.grid = open_grid_store(settings.GRID_STORE_PATH, mmap_mode="r")
+    state.shape = tuple(meta["shape"])
+    # 直接使用元数据中的内容哈希作为缓存键，不必重新计算
+    state.digest = meta["digest"]
+    logger.info(
+        f"网格已映射: {settings.GRID_STORE_PATH} 形状 {state.shape} 格式 {meta['format']}"
+    )
+
+    if settings.CACHE_MAX_BYTES > 0:
+        state.cache = PathCache(max_bytes=settings.CACHE_MAX_BYTES)
+
+    state.pool = ProcessPoolExecutor(
+        max_workers=settings.WORKERS,
+        initializer=init_worker,
+        initargs=(settings.GRID_STORE_PATH,),
+    )
+    logger.info(f"寻路进程池已启动，进程数 {settings.WORKERS}。")
+
+    yield  # 应用在此处运行
+
+    # --- 应用关闭时 ---
+    logger.info("应用关闭...")
+    state.pool.shutdown(wait=True, cancel_futures=True)
+    logger.info("寻路进程池已关闭。")
+
+
+# 初始化 FastAPI 应用实例，并应用上面定义的生命周期管理器
+app = FastAPI(title="Pathfinding Service", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """
+    记录每个请求的处理耗时，写入响应头并计入延迟统计。
+    """
+    begin = time.perf_counter()
+    response = await call_next(request)
+    elapsed_ms = (time.perf_counter() - begin) * 1000
+    response.headers["X-Process-Time-Ms"] = f"{elapsed_ms:.2f}"
+    response.headers["X-Queue-Depth"] = str(state.queue_depth)
+    if request.url.path in ("/path", "/paths"):
+        state.requests += 1
+        state.latencies_ms.append(elapsed_ms)
+        logger.info(
+            f"{request.method} {request.url.path} {response.status_code} "
+            f"{elapsed_ms:.1f}ms 队列深度 {state.queue_depth}"
+        )
+    return response
+
+
+# ------------------- API 接口 (Endpoints) -------------------
+
+
+@app.post("/path", response_model=schemas.PathResult, summary="规划单条路径")
+async def get_path(request: schemas.PathRequest):
+    validate_query(request.start, request.end)
+    mode = resolve_mode(request.mode)
+    [(path, plan_s, cached)] = await plan_queries([request], mode)
+
+    if request.format == "binary":
+        # 紧凑的二进制格式：小端 int32，(N, 2)，长度等信息放在响应头里
+        return Response(
+            content=np.ascontiguousarray(path, dtype="<i4").tobytes(),
+            media_type="application/octet-stream",
+            headers={
+                "X-Path-Length": str(len(path)),
+                "X-Plan-Ms": f"{plan_s * 1000:.2f}",
+                "X-Cached": "1" if cached else "0",
+            },
+        )
+    return to_result(path, plan_s, cached)
+
+
+@app.post("/paths", response_model=schemas.BatchPathResult, summary="批量规划路径")
+async def get_paths(request: schemas.BatchPathRequest):
+    if len(request.queries) > settings.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"单次最多 {settings.MAX_BATCH_SIZE} 条查询",
+        )
+    for query in request.queries:
+        validate_query(query.start, query.end)
+    mode = resolve_mode(request.mode)
+
+    begin = time.perf_counter()
+    planned = await plan_queries(request.queries, mode)
+    return schemas.BatchPathResult(
+        results=[to_result(path, plan_s, cached) for path, plan_s, cached in planned],
+        elapsed_ms=(time.perf_counter() - begin) * 1000,
+    )
+
+
+@app.get("/stats", response_model=schemas.ServiceStats, summary="服务状态与延迟统计")
+async def get_stats():
+    # 在事件循环里执行，与写入 latencies_ms 的中间件不会并发，遍历时 deque 不会被修改
+    latencies = sorted(state.latencies_ms)
+
+    def percentile(q: float) -> float:
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    return schemas.ServiceStats(
+        grid_shape=list(state.shape),
+        grid_digest=state.digest,
+        workers=settings.WORKERS,
+        queue_depth=state.queue_depth,
+        requests=state.requests,
+        latency_ms_p50=statistics.median(latencies) if latencies else 0.0,
+        latency_ms_p95=percentile(0.95),
+        latency_ms_max=latencies[-1] if latencies else 0.0,
+        cache=state.cache.stats() if state.cache is not None else None,
+    )
@@ -0,0 +1,44 @@
+"""
+寻路进程池中执行的函数
+
+每个工作进程在初始化时以只读方式内存映射网格存储，
+所有进程共享操作系统的页缓存，不会各自持有一份网格拷贝。
+"""
+import time
+
+import numpy as np
+
+from algo.astar import AStarWorkspace, Coord, get_path_astar_2d
+from algo.grid_store import open_grid_store
+
+# 工作进程内打开的网格
+_worker_grid = None
+# 工作进程内复用的数组 A* 工作区，第一次 "array" 查询时创建
+_worker_workspace: AStarWorkspace | None = None
+
+
+def init_worker(grid_store_path: str) -> None:
+    global _worker_grid, _worker_workspace
+    _worker_grid = open_grid_store(grid_store_path, mmap_mode="r")
+    _worker_workspace = None
+
+
+def plan_chunk(
+    queries: list[tuple[Coord, Coord]], mode: str
+) -> list[tuple[np.ndarray, float]]:
+    """
+    依次规划一组查询，返回 (int32 路径数组, 规划耗时秒) 列表，路径为空时形状是 (0, 2)。
+    """
+    global _worker_workspace
+    if mode == "array" and _worker_workspace is None:
+        _worker_workspace = AStarWorkspace(_worker_grid)
+    workspace = _worker_workspace if mode == "array" else None
+    results = []
+    for start, end in queries:
+        begin = time.perf_counter()
+        path = get_path_astar_2d(
+            _worker_grid, tuple(start), tuple(end), mode=mode, workspace=workspace
+        )
+        elapsed = time.perf_counter() - begin
+        results.append((np.asarray(path, dtype=np.int32).reshape(-1, 2), elapsed))
+    return results
@@ -0,0 +1,59 @@
+# path_service/schemas.py
+
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+# 坐标 (行, 列)
+Coordinate = List[int]
+
+
+# 单条寻路请求 (输入)
+class PathQuery(BaseModel):
+    start: Coordinate = Field(
+        ..., min_length=2, max_length=2, description="起点 [行, 列]"
+    )
+    end: Coordinate = Field(
+        ..., min_length=2, max_length=2, description="终点 [行, 列]"
+    )
+
+
+class PathRequest(PathQuery):
+    mode: Optional[str] = Field(None, description="寻路模式，默认使用服务配置")
+    format: Literal["json", "binary"] = Field(
+        "json", description="binary 返回小端 int32 的 (N, 2) 坐标数组"
+    )
+
+
+# 批量寻路请求 (输入)
+class BatchPathRequest(BaseModel):
+    queries: List[PathQuery]
+    mode: Optional[str] = None
+
+
+# 单条路径结果 (输出)
+class PathResult(BaseModel):
+    found: bool
+    length: int
+    path: List[Coordinate]
+    plan_ms: float = Field(..., description="寻路进程内的规划耗时")
+    cached: bool = False
+
+
+# 批量结果 (输出)，顺序与请求中的 queries 一致
+class BatchPathResult(BaseModel):
+    results: List[PathResult]
+    elapsed_ms: float
+
+
+# 服务状态 (输出)
+class ServiceStats(BaseModel):
+    grid_shape: List[int]
+    grid_digest: str
+    workers: int
+    queue_depth: int
+    requests: int
+    latency_ms_p50: float
+    latency_ms_p95: float
+    latency_ms_max: float
+    cache: Optional[dict] = None
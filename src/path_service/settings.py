@@ -0,0 +1,34 @@
+# path_service/settings.py
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    # 加载 .env 文件，变量名统一带 PATH_SERVICE_ 前缀
+    model_config = SettingsConfigDict(
+        env_file="../.env",
+        env_file_encoding="utf-8",
+        env_prefix="PATH_SERVICE_",
+        extra="ignore",
+    )
+
+    # 网格存储（grid_store.save_grid_store 生成的 .npy，旁边要有 .json 元数据）
+    # 相对于工作目录；容器内即 docker-compose 挂载的 /app/grid_store
+    GRID_STORE_PATH: str = "grid_store/obstacle_grid_8000x8000.npy"
+
+    # 寻路进程池大小
+    WORKERS: int = 2
+    # 默认寻路模式，传给 get_path_astar_2d
+    DEFAULT_MODE: str = "array"
+    # /paths 单次请求最多包含的查询数
+    MAX_BATCH_SIZE: int = 1000
+    # /paths 中每个进程池任务包含的查询数，查询很短时调大可以减少调度开销
+    BATCH_CHUNK_SIZE: int = 8
+
+    # 路径缓存的内存上限（字节），0 表示不缓存
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # 延迟统计保留的最近请求数
+    LATENCY_WINDOW: int = 1000
+
+
+# 创建一个全局可用的配置实例
+settings = Settings()
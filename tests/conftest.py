@@ -0,0 +1,7 @@
+"""
+测试时把 src 加入模块搜索路径，与 `cd src && python -m algo.xxx` 的运行方式一致
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
@@ -0,0 +1,22 @@
+"""
+连通分量索引：传入预先算好的 digest 时不再对整张网格重新哈希
+"""
+import numpy as np
+
+from algo import components
+from algo.astar import grid_digest
+
+
+def test_get_component_index_reuses_digest(monkeypatch):
+    grid = np.zeros((16, 16), dtype=np.int64)
+    grid[:, 8] = 1
+    digest = grid_digest(grid)
+
+    def fail(_grid):
+        raise AssertionError("grid_digest 不应被调用")
+
+    monkeypatch.setattr(components, "grid_digest", fail)
+    index = components.get_component_index(grid, digest=digest)
+    assert components.get_component_index(grid, digest=digest) is index
+    assert index.is_reachable((0, 0), (15, 7))
+    assert not index.is_reachable((0, 0), (0, 9))
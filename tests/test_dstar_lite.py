@@ -0,0 +1,74 @@
+"""
+D* Lite 增量修复后的路径必须与在新网格上从头搜索的结果一致
+"""
+import numpy as np
+import pytest
+
+from algo.astar import MOVE_COST_DIAGONAL, get_path_astar_2d_array
+from algo.dstar_lite import DStarLitePlanner
+
+
+def _path_cost(path) -> float:
+    if len(path) < 2:
+        return 0.0
+    steps = np.abs(np.diff(path, axis=0)).sum(axis=1)
+    return float(np.sum(np.where(steps == 2, MOVE_COST_DIAGONAL, 1.0)))
+
+
+def _assert_same_as_fresh(grid, path, start, goal):
+    reference = get_path_astar_2d_array(grid, start, goal)
+    assert (len(path) == 0) == (len(reference) == 0)
+    if len(path):
+        assert tuple(path[0]) == start and tuple(path[-1]) == goal
+        assert not grid[path[:, 0], path[:, 1]].any()
+        # 定点代价与浮点代价的差异远小于该容差
+        assert _path_cost(path) == pytest.approx(_path_cost(reference), abs=1e-4)
+
+
+@pytest.mark.parametrize("seed", range(24))
+def test_update_cells_matches_fresh_astar(seed):
+    rng = np.random.default_rng(seed)
+    size = 40
+    grid = (rng.random((size, size)) < 0.25).astype(np.int64)
+    start, goal = (0, 0), (size - 1, size - 1)
+    grid[start] = grid[goal] = 0
+    planner = DStarLitePlanner(grid, start, goal)
+    _assert_same_as_fresh(grid, planner.plan(), start, goal)
+
+    for _ in range(10):
+        cells = [tuple(int(x) for x in rng.integers(0, size, 2)) for _ in range(8)]
+        cells = [cell for cell in cells if cell not in (start, goal)]
+        for cell in cells:
+            grid[cell] ^= 1
+        _assert_same_as_fresh(grid, planner.update_cells(cells), start, goal)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_move_start_then_update_matches_fresh_astar(seed):
+    rng = np.random.default_rng(100 + seed)
+    size = 40
+    grid = (rng.random((size, size)) < 0.2).astype(np.int64)
+    start, goal = (0, 0), (size - 1, size - 1)
+    grid[start] = grid[goal] = 0
+    planner = DStarLitePlanner(grid, start, goal)
+    path = planner.plan()
+
+    for _ in range(10):
+        if len(path) < 3:
+            break
+        # 沿路径前进几步，再改动路径附近的格子
+        start = tuple(int(x) for x in path[2])
+        planner.move_start(start)
+        near = path[min(len(path) - 1, 4)]
+        cells = [
+            (
+                int(np.clip(near[0] + dr, 0, size - 1)),
+                int(np.clip(near[1] + dc, 0, size - 1)),
+            )
+            for dr, dc in rng.integers(-2, 3, (6, 2))
+        ]
+        cells = [cell for cell in cells if cell not in (start, goal)]
+        for cell in cells:
+            grid[cell] ^= 1
+        path = planner.update_cells(cells)
+        _assert_same_as_fresh(grid, path, start, goal)
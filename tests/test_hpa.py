@@ -0,0 +1,79 @@
+"""
+分层寻路：网格边长不是簇大小整数倍时，最后一行 / 列会出现 1xN、Nx1 甚至 1x1 的簇
+"""
+import numpy as np
+import pytest
+
+from algo.astar import get_path_astar_2d
+from algo.hpa import build_abstract_graph, get_path_hpa
+
+
+@pytest.mark.parametrize(
+    "shape, cluster_size",
+    [((65, 65), 64), ((65, 130), 64), ((97, 65), 32), ((33, 17), 16), ((10, 10), 1)],
+)
+def test_hpa_non_multiple_grid_size(shape, cluster_size):
+    rng = np.random.default_rng(0)
+    grid = (rng.random(shape) < 0.15).astype(np.int64)
+    graph = build_abstract_graph(grid, cluster_size)
+
+    for _ in range(40):
+        start = (int(rng.integers(shape[0])), int(rng.integers(shape[1])))
+        end = (int(rng.integers(shape[0])), int(rng.integers(shape[1])))
+        if grid[start] or grid[end]:
+            continue
+        path = get_path_hpa(grid, start, end, graph)
+        reference = get_path_astar_2d(grid, start, end)
+        assert (len(path) == 0) == (len(reference) == 0)
+        if len(path):
+            assert tuple(path[0]) == start and tuple(path[-1]) == end
+            assert np.all(np.abs(np.diff(path, axis=0)) <= 1)
+            assert not grid[path[:, 0], path[:, 1]].any()
+
+
+def _blocked_borders(anti_diagonal: bool):
+    # 8x8、簇大小 4：两条簇边界整条封死，只在簇角留一对斜向相邻的格子
+    grid = np.zeros((8, 8), dtype=np.int64)
+    grid[3:5, :] = 1
+    grid[:, 3:5] = 1
+    if anti_diagonal:
+        grid[3, 4] = grid[4, 3] = 0
+    else:
+        grid[3, 3] = grid[4, 4] = 0
+    return grid
+
+
+def _diagonal_border():
+    grid = np.zeros((8, 8), dtype=np.int64)
+    grid[3:5, :] = 1
+    grid[3, 1] = grid[4, 2] = 0
+    return grid
+
+
+@pytest.mark.parametrize(
+    "grid, start, end",
+    [
+        (_diagonal_border(), (0, 0), (7, 7)),
+        (_blocked_borders(False), (0, 0), (7, 7)),
+        (_blocked_borders(True), (0, 7), (7, 0)),
+    ],
+)
+def test_hpa_diagonal_only_crossing(grid, start, end):
+    graph = build_abstract_graph(grid, 4)
+    stats = {}
+    path = get_path_hpa(grid, start, end, graph, stats=stats)
+    assert len(path)
+    assert not stats["abstract_failed"] and not stats["fallback"]
+    assert tuple(path[0]) == start and tuple(path[-1]) == end
+    assert np.all(np.abs(np.diff(path, axis=0)) <= 1)
+    assert not grid[path[:, 0], path[:, 1]].any()
+
+
+def test_hpa_unreachable_returns_early():
+    grid = np.zeros((8, 8), dtype=np.int64)
+    grid[:, 4] = 1
+    graph = build_abstract_graph(grid, 4)
+    stats = {}
+    path = get_path_hpa(grid, (0, 0), (7, 7), graph, stats=stats)
+    assert len(path) == 0
+    assert stats["unreachable"] and "fallback" not in stats
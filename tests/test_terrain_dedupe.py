@@ -0,0 +1,90 @@
+"""
+椭圆去重：find_contained_ellipses 必须与对所有有序对调用 is_ellipse_contained 的双层循环逐个一致
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from algo.terrain_algo_distinct import find_contained_ellipses, is_ellipse_contained
+
+
+def _contained_reference(ellipse_info_list) -> np.ndarray:
+    # 原来的 O(n²) 实现
+    contained = np.zeros(len(ellipse_info_list), dtype=bool)
+    for i, ellipse in enumerate(ellipse_info_list):
+        for j, other in enumerate(ellipse_info_list):
+            if i != j and is_ellipse_contained(ellipse, other):
+                contained[i] = True
+                break
+    return contained
+
+
+def _ellipse(center_lon, center_lat, a_lon, b_lat) -> dict:
+    return {
+        "center_lon": center_lon,
+        "center_lat": center_lat,
+        "a_lon": a_lon,
+        "b_lat": b_lat,
+        "area": np.pi * a_lon * b_lat,
+    }
+
+
+def _random_fixture(count: int, seed: int, dtype=np.float64) -> list[dict]:
+    """
+    随机椭圆，其中约 40% 由已有椭圆缩放、平移得到，包含嵌套、几乎同样大小
+    （缩放系数与 1 只差 1e-7）和宽窄比例不同的情况，中心坐标可以是 float32。
+    """
+    rng = np.random.default_rng(seed)
+    ellipses: list[dict] = []
+    for _ in range(count):
+        if ellipses and rng.random() < 0.4:
+            parent = ellipses[rng.integers(len(ellipses))]
+            scale = rng.choice([0.5, 0.99, 1.0, 1.0000001, 0.9999999, rng.random()])
+            shift = rng.integers(0, 2) * 0.1
+            center_lon = dtype(
+                parent["center_lon"] + rng.normal() * parent["a_lon"] * shift
+            )
+            center_lat = dtype(
+                parent["center_lat"] + rng.normal() * parent["b_lat"] * shift
+            )
+            a_lon = parent["a_lon"] * scale
+            b_lat = parent["b_lat"] * scale * rng.choice([1.0, 1.2, 0.7])
+        else:
+            center_lon = dtype(rng.uniform(70, 80))
+            center_lat = dtype(rng.uniform(20, 30))
+            a_lon = rng.choice([0.01, 0.1, 1.0]) * rng.uniform(0.1, 2)
+            b_lat = a_lon * rng.uniform(0.3, 3)
+        ellipses.append(_ellipse(center_lon, center_lat, a_lon, b_lat))
+    ellipses.sort(key=lambda e: e["area"])
+    return ellipses
+
+
+def test_find_contained_ellipses_edge_cases():
+    ellipses = [
+        # 完全相同的两个椭圆面积相等，互不包含
+        _ellipse(75.0, 25.0, 1.0, 0.5),
+        _ellipse(75.0, 25.0, 1.0, 0.5),
+        # 同心、略小一点，被包含
+        _ellipse(75.0, 25.0, 0.9999999, 0.4999999),
+        # 面积更小但更宽，伸出容器之外
+        _ellipse(75.0, 25.0, 1.2, 0.3),
+        # 远处孤立的椭圆
+        _ellipse(10.0, -10.0, 0.1, 0.1),
+        # 几何上在里面，但面积字段（例如按像素数统计）与容器相等，不算被包含
+        {**_ellipse(75.0, 25.0, 0.5, 0.25), "area": np.pi * 1.0 * 0.5},
+    ]
+    contained = find_contained_ellipses(ellipses)
+    assert contained.tolist() == [False, False, True, False, False, False]
+    assert np.array_equal(contained, _contained_reference(ellipses))
+    assert find_contained_ellipses([]).tolist() == []
+    assert find_contained_ellipses(ellipses[:1]).tolist() == [False]
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_find_contained_ellipses_matches_pairwise_reference(seed):
+    dtype = np.float32 if seed % 2 else np.float64
+    ellipses = _random_fixture(200, seed, dtype)
+    expected = _contained_reference(ellipses)
+    assert expected.any()
+    assert np.array_equal(find_contained_ellipses(ellipses), expected)